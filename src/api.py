@@ -1,3 +1,5 @@
+import asyncio
+import math
 import os
 from contextlib import asynccontextmanager
 from http import HTTPStatus
@@ -15,11 +17,18 @@ from starlette.middleware.cors import CORSMiddleware
 
 import src.db as db
 import src.exceptions as ex
+from src.calculation import batch
+from src.clients import elomraden
+from src.power_tariff_service import PowerTariffService, reload_tariff_data
+from src.repositories.power_tariffs_repository import repository
 from src.routers.admin_router import router as admin_router
+from src.routers.calculation_router import router as calculation_router
 from src.routers.dev_router import router as dev_router
 from src.routers.main_router import router as main_router
 from src import app
 from src import env
+from src import mga_resolver
+from src import warmup
 from src.exceptions import IllegalStateError
 
 logger = log.get_logger(__name__)
@@ -55,6 +64,7 @@ async def _init_plugin() -> int | None:
 @asynccontextmanager
 async def lifespan(fast_app: FastAPI):
     """Startup and shutdown logic using lifespan events."""
+    warmup_task = None
     try:
         if env.get_auto_register():
             logger.info("Registering plugin...")
@@ -65,10 +75,34 @@ async def lifespan(fast_app: FastAPI):
         await db.await_up(fast_app.state.db)
         logger.info("Database connection established.")
 
+        await elomraden.start()
+
         await _init_db()
+        await reload_tariff_data()
+        if boundaries_path := env.get_mga_boundaries_path():
+            logger.info("Loading MGA boundaries for local coordinate lookups...")
+            await asyncio.to_thread(mga_resolver.load, boundaries_path)
+        fast_app.state.warmup = None
+        if warmup_path := env.get_warmup_path():
+            # Runs while the app already serves; /admin/ready reports its progress
+            fast_app.state.warmup = warmup.WarmupStatus(
+                env.get_warmup_ready_threshold()
+            )
+            warmup_task = asyncio.create_task(
+                warmup.run(
+                    fast_app.state.warmup,
+                    warmup_path,
+                    PowerTariffService(repository=repository),
+                    env.get_warmup_concurrency(),
+                )
+            )
         yield
     finally:
         logger.info("Shutting down power tariffs plugin...")
+        if warmup_task is not None:
+            warmup_task.cancel()
+        await elomraden.stop()
+        await asyncio.to_thread(batch.shutdown)
         if fast_app.state.db:
             logger.info("Closing database connection...")
             await db.stop(fast_app.state.db)
@@ -138,6 +172,15 @@ async def illegal_argument_error_handler(request: Request, exc: ex.UnexpectedVal
     )
 
 
+@app.exception_handler(ex.IllegalArgumentError)
+async def illegal_argument_handler(request: Request, exc: ex.IllegalArgumentError):
+    logger.warning(f"Illegal argument: {exc}")
+    return JSONResponse(
+        status_code=400,
+        content={"detail": str(exc)},
+    )
+
+
 @app.exception_handler(ex.NotEnabledError)
 async def not_enabled_error_handler(request: Request, exc: ex.NotEnabledError):
     uid = uuid7()
@@ -148,6 +191,32 @@ async def not_enabled_error_handler(request: Request, exc: ex.NotEnabledError):
     )
 
 
+@app.exception_handler(ex.UpstreamUnavailableError)
+async def upstream_unavailable_error_handler(
+    request: Request, exc: ex.UpstreamUnavailableError
+):
+    logger.warning(f"Upstream unavailable: {exc}")
+    headers = {}
+    if exc.retry_after is not None:
+        headers["Retry-After"] = str(max(1, math.ceil(exc.retry_after)))
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"{exc.service} is temporarily unavailable: {exc.reason}"},
+        headers=headers,
+    )
+
+
+@app.exception_handler(ex.DeadlineExceededError)
+async def deadline_exceeded_error_handler(
+    request: Request, exc: ex.DeadlineExceededError
+):
+    logger.warning(f"Deadline exceeded: {exc}")
+    return JSONResponse(
+        status_code=504,
+        content={"detail": f"Timed out waiting for {exc.service}"},
+    )
+
+
 @app.exception_handler(ex.UnknownError)
 async def unknown_error_exception_handler(request: Request, exc: ex.UnknownError):
     uid = uuid7()
@@ -193,6 +262,7 @@ app.add_middleware(
 app.router.lifespan_context = lifespan
 # Include routers based on environment
 app.include_router(main_router)
+app.include_router(calculation_router)
 if env.is_admin_mode():
     app.include_router(admin_router)
 if env.is_dev_mode():
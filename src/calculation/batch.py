@@ -0,0 +1,162 @@
+import itertools
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Self
+
+import numpy as np
+from engrate_sdk.utils import log
+
+from src import env
+from src.calculation import engine
+from src.calculation.engine import BatchPowerFeeResult
+from src.exceptions import IllegalArgumentError
+from src.model import PowerTariffSpec
+
+logger = log.get_logger(__name__)
+
+# Shards per worker, so a slow shard doesn't leave the other workers idle
+_SHARDS_PER_WORKER = 4
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+class SharedLoads:
+    """A meters x readings kW array in shared memory.
+
+    Workers attach to the block by name, so the loads are never pickled.
+    The owner must ``close()`` it, which also frees the block.
+    """
+
+    __slots__ = ("_shm", "array")
+
+    def __init__(self, n_meters: int, n_readings: int):
+        shape = (n_meters, n_readings)
+        self._shm = SharedMemory(create=True, size=max(1, n_meters * n_readings * 8))
+        self.array = np.ndarray(shape, dtype=np.float64, buffer=self._shm.buf)
+
+    @classmethod
+    def from_array(cls, kw: np.ndarray) -> "SharedLoads":
+        kw = np.asarray(kw, dtype=np.float64)
+        if kw.ndim != 2:
+            raise IllegalArgumentError("Readings must be meters x timestamps")
+        loads = cls(*kw.shape)
+        loads.array[:] = kw
+        return loads
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def close(self) -> None:
+        del self.array
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def calculate_power_fees(
+    tariff: PowerTariffSpec,
+    timestamps: np.ndarray,
+    kw: np.ndarray,
+    fuse: str | None = None,
+) -> BatchPowerFeeResult:
+    """Prices a meters x readings kW array across the calculation worker processes.
+
+    Blocks until every shard is priced; callers on the event loop should run it
+    in a thread.
+    """
+    with SharedLoads.from_array(kw) as loads:
+        return _calculate(tariff, timestamps, loads, fuse)
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """The calculation process pool, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = env.get_calculation_workers()
+            logger.info(f"Starting {workers} calculation worker processes...")
+            # Spawned workers don't inherit the event loop, db pool or http clients
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def _calculate(
+    tariff: PowerTariffSpec,
+    timestamps: np.ndarray,
+    loads: SharedLoads,
+    fuse: str | None,
+) -> BatchPowerFeeResult:
+    n_meters = loads.array.shape[0]
+    if n_meters == 0:
+        raise IllegalArgumentError("No meters provided")
+    # Fails fast on unpriceable tariffs instead of in every worker
+    engine.compile_for(tariff, fuse)
+    pool = get_pool()
+    n_shards = min(n_meters, env.get_calculation_workers() * _SHARDS_PER_WORKER)
+    bounds = np.linspace(0, n_meters, n_shards + 1).astype(int)
+    futures = [
+        pool.submit(
+            _price_shard,
+            loads.name,
+            loads.array.shape,
+            int(lo),
+            int(hi),
+            tariff,
+            timestamps,
+            fuse,
+        )
+        for lo, hi in itertools.pairwise(bounds)
+    ]
+    try:
+        shards = [future.result() for future in futures]
+    finally:
+        # The shared block is freed on return; no shard may still be reading it
+        for future in futures:
+            future.cancel()
+        for future in futures:
+            if not future.cancelled():
+                future.exception()
+    return BatchPowerFeeResult(
+        shards[0].months,
+        np.concatenate([shard.billed_kw for shard in shards]),
+        np.concatenate([shard.fee_exc_vat for shard in shards]),
+        np.concatenate([shard.fee_inc_vat for shard in shards]),
+    )
+
+
+def _price_shard(
+    shm_name: str,
+    shape: tuple[int, int],
+    lo: int,
+    hi: int,
+    tariff: PowerTariffSpec,
+    timestamps: np.ndarray,
+    fuse: str | None,
+) -> BatchPowerFeeResult:
+    """Runs in a worker process: prices rows [lo, hi) of the shared loads."""
+    shm = SharedMemory(name=shm_name)
+    try:
+        # Copied out so no view outlives the mapping, even on errors
+        kw = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)[lo:hi].copy()
+    finally:
+        shm.close()
+    return engine.calculate_power_fees(tariff, timestamps, kw, fuse)
@@ -0,0 +1,198 @@
+import numpy as np
+
+from src.calculation import engine
+from src.calculation.engine import PowerFeeResult
+from src.exceptions import IllegalArgumentError
+from src.model import PowerTariffSpec
+
+# Caps tried at once per bisection round, and rounds per month; each round
+# narrows the bracket 32 times
+_CANDIDATES = 33
+_ROUNDS = 4
+_TOLERANCE = 1e-9
+
+
+class BatteryDispatch:
+    """A battery schedule shaving a load series' peaks, with the fees it saves.
+
+    Series are per reading of the tariff's time unit: ``battery_kw`` is positive
+    when discharging into the load and negative when charging from the grid,
+    ``grid_kw`` is the load left on the grid and ``charge_kwh`` the stored
+    energy at the end of each reading. ``peak_caps`` holds the weighted peak
+    each month of ``without`` was capped at, NaN for months without priced
+    readings.
+    """
+
+    __slots__ = (
+        "timestamps",
+        "grid_kw",
+        "battery_kw",
+        "charge_kwh",
+        "peak_caps",
+        "without",
+        "with_battery",
+    )
+
+    def __init__(
+        self,
+        timestamps: np.ndarray,
+        grid_kw: np.ndarray,
+        battery_kw: np.ndarray,
+        charge_kwh: np.ndarray,
+        peak_caps: np.ndarray,
+        without: PowerFeeResult,
+        with_battery: PowerFeeResult,
+    ):
+        self.timestamps = timestamps
+        self.grid_kw = grid_kw
+        self.battery_kw = battery_kw
+        self.charge_kwh = charge_kwh
+        self.peak_caps = peak_caps
+        self.without = without
+        self.with_battery = with_battery
+
+
+def optimize_battery(
+    tariff: PowerTariffSpec,
+    timestamps: np.ndarray,
+    kw: np.ndarray,
+    capacity_kwh: float,
+    power_kw: float,
+    efficiency: float = 1.0,
+    fuse: str | None = None,
+    initial_charge_kwh: float | None = None,
+) -> BatteryDispatch:
+    """Finds the lowest peak cap per month a battery can hold, and its dispatch.
+
+    Every reading is capped at the month's weighted peak divided by its highest
+    interval multiplier, so no composition bills more than the cap; the battery
+    discharges above that limit and recharges below it, never lifting the grid
+    load over it. Readings outside every interval are uncapped. Caps are found
+    by bisection, each round testing a set of caps at once: for a cap the
+    state of charge is a cumulative sum clipped at the capacity, which is a
+    running minimum, so a month is a few array passes. Months are solved in
+    order, each starting with the charge the previous one ended with; the
+    battery starts full unless ``initial_charge_kwh`` is given. Charging loses
+    ``1 - efficiency`` of the energy. Missing readings leave the battery idle.
+    """
+    if capacity_kwh <= 0 or power_kw <= 0:
+        raise IllegalArgumentError("Battery capacity and power must be positive")
+    if not 0 < efficiency <= 1:
+        raise IllegalArgumentError("Battery efficiency must be in (0, 1]")
+    charge = capacity_kwh if initial_charge_kwh is None else initial_charge_kwh
+    if not 0 <= charge <= capacity_kwh:
+        raise IllegalArgumentError("Initial charge must be within the capacity")
+    plan, compositions = engine.compile_for(tariff, fuse)
+    kw = np.asarray(kw, dtype=np.float64)
+    utc = np.asarray(timestamps, dtype="datetime64[s]").astype(np.int64)
+    if kw.ndim != 1 or utc.shape != kw.shape:
+        raise IllegalArgumentError("Timestamps and kW readings must match")
+    if kw.size == 0:
+        raise IllegalArgumentError("No readings provided")
+    unit = engine.TIME_UNITS[tariff.time_unit]
+    utc, load = engine.resample(utc, kw[None, :], unit)
+    load = load[0]
+    month_index, weights = engine.reading_weights(plan, compositions, utc)
+    # Highest multiplier per reading, NaN outside every interval
+    level = np.fmax.reduce(weights, axis=0)
+    hours = unit / 3600
+
+    battery = _Battery(capacity_kwh, power_kw, efficiency, hours)
+    start_charge = charge
+    first_month = int(month_index[0])
+    peak_caps = np.full(int(month_index[-1]) - first_month + 1, np.nan)
+    charge_kwh = np.empty(load.size)
+    bounds = np.flatnonzero(np.diff(month_index)) + 1
+    for lo, hi in zip([0, *bounds.tolist()], [*bounds.tolist(), load.size]):
+        cap = battery.lowest_cap(load[lo:hi], level[lo:hi], charge)
+        charge_kwh[lo:hi] = battery.charge(
+            np.array([cap]), load[lo:hi], level[lo:hi], charge
+        )[0]
+        charge = float(charge_kwh[hi - 1])
+        peak_caps[int(month_index[lo]) - first_month] = cap
+
+    stored = np.diff(charge_kwh, prepend=start_charge)
+    # + 0.0 turns idle readings' -0.0 into 0.0
+    battery_kw = np.where(stored < 0, -stored, -stored / efficiency) / hours + 0.0
+    battery_kw[np.isnan(load)] = 0.0
+    grid_kw = load - battery_kw
+    result = engine.calculate_power_fees(
+        tariff, utc.astype("datetime64[s]"), np.stack([load, grid_kw]), fuse
+    )
+    return BatteryDispatch(
+        utc.astype("datetime64[s]"),
+        grid_kw,
+        battery_kw,
+        charge_kwh,
+        peak_caps,
+        result.meter(0),
+        result.meter(1),
+    )
+
+
+class _Battery:
+    __slots__ = ("capacity", "power", "efficiency", "hours")
+
+    def __init__(self, capacity: float, power: float, efficiency: float, hours: float):
+        self.capacity = capacity
+        self.power = power
+        self.efficiency = efficiency
+        self.hours = hours
+
+    def lowest_cap(self, load: np.ndarray, level: np.ndarray, charge: float) -> float:
+        """Lowest weighted peak the battery holds over a month, NaN if none is priced."""
+        capped = level > 0
+        weighted = np.where(capped, load * level, np.nan)
+        if np.all(np.isnan(weighted)):
+            return np.nan
+        # The month's own peak needs no battery
+        lo, hi = 0.0, float(np.nanmax(weighted))
+        for _ in range(_ROUNDS):
+            caps = np.linspace(lo, hi, _CANDIDATES)
+            # Holding is monotone in the cap, the highest cap always holds
+            first = int(np.argmax(self.holds(caps, load, level, charge)))
+            if first == 0:
+                return float(caps[0])
+            lo, hi = float(caps[first - 1]), float(caps[first])
+        return hi
+
+    def holds(
+        self, caps: np.ndarray, load: np.ndarray, level: np.ndarray, charge: float
+    ) -> np.ndarray:
+        """Whether the battery keeps the load under each cap."""
+        excess = self._excess(caps, load, level)
+        return np.all(excess <= self.power + _TOLERANCE, axis=1) & np.all(
+            self.charge(caps, load, level, charge, excess) >= -_TOLERANCE, axis=1
+        )
+
+    def charge(
+        self,
+        caps: np.ndarray,
+        load: np.ndarray,
+        level: np.ndarray,
+        charge: float,
+        excess: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """Stored energy after each reading per cap, negative where it runs out.
+
+        With net energy x per reading, charge_i = min(capacity, charge_i-1 + x_i),
+        so charge_i = S_i + min(charge_0, min_k<=i(capacity - S_k)) with S the
+        cumulative sum of x.
+        """
+        if excess is None:
+            excess = self._excess(caps, load, level)
+        net = (
+            np.minimum(self.power, np.maximum(-excess, 0.0)) * self.efficiency
+            - np.maximum(excess, 0.0)
+        ) * self.hours
+        cumulative = np.cumsum(net, axis=1)
+        return cumulative + np.minimum(
+            charge, np.minimum.accumulate(self.capacity - cumulative, axis=1)
+        )
+
+    @staticmethod
+    def _excess(caps: np.ndarray, load: np.ndarray, level: np.ndarray) -> np.ndarray:
+        """Load over each cap's limit per reading, 0 where the reading is missing."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            limits = np.where(level > 0, caps[:, None] / level, np.inf)
+        return np.where(np.isnan(load), 0.0, load - limits)
@@ -0,0 +1,184 @@
+import calendar
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from src.calculation.plan import SLOT_SECONDS, SLOTS_PER_DAY
+
+TIMEZONE = ZoneInfo("Europe/Stockholm")
+
+
+class CalendarGrid:
+    """Local calendar of every quarter hour of one UTC year.
+
+    Position ``i`` is the quarter hour starting ``i * SLOT_SECONDS`` after
+    ``start`` (UTC epoch seconds). Fields are in Europe/Stockholm wall-clock
+    time, so DST days have 92 or 100 positions per local date: ``month_index``
+    counts months since 1970-01, ``weekday`` is 0 for Monday, ``slot`` is the
+    quarter hour of the local day and ``cell`` the flat (month of year,
+    weekday, slot) index into a TariffPlan's multipliers. ``holiday`` marks
+    Swedish public holidays, see ``holidays``.
+    """
+
+    __slots__ = (
+        "year",
+        "start",
+        "utc_offset",
+        "month_index",
+        "weekday",
+        "slot",
+        "cell",
+        "holiday",
+    )
+
+    def __init__(self, year: int):
+        self.year = year
+        self.start = int(datetime(year, 1, 1, tzinfo=timezone.utc).timestamp())
+        n_slots = (366 if calendar.isleap(year) else 365) * SLOTS_PER_DAY
+        self.utc_offset = np.repeat(_hourly_utc_offsets(year), 3600 // SLOT_SECONDS)
+        local = self.start + np.arange(n_slots, dtype=np.int64) * SLOT_SECONDS
+        local += self.utc_offset
+        days = local // 86400
+        self.month_index = (
+            days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        )
+        self.weekday = (days + 3) % 7  # 1970-01-01 was a Thursday
+        self.slot = (local % 86400) // SLOT_SECONDS
+        month_of_year = self.month_index % 12
+        self.cell = (month_of_year * 7 + self.weekday) * SLOTS_PER_DAY + self.slot
+        self.holiday = np.isin(
+            days,
+            [
+                (day - date(1970, 1, 1)).days
+                for y in (year - 1, year, year + 1)
+                for day in holidays(y)
+            ],
+        )
+        for field in self.__slots__[2:]:
+            getattr(self, field).flags.writeable = False
+
+    def positions(self, utc: np.ndarray) -> np.ndarray:
+        """Grid positions of UTC epoch seconds within the year."""
+        return (utc - self.start) // SLOT_SECONDS
+
+
+@lru_cache(maxsize=64)
+def year_grid(year: int) -> CalendarGrid:
+    """The shared, read-only grid of a UTC year, built once."""
+    return CalendarGrid(year)
+
+
+def cells(utc: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Local month (months since 1970-01) and plan cell of every UTC epoch second."""
+    month_index = np.empty(utc.shape, dtype=np.int64)
+    cell = np.empty(utc.shape, dtype=np.int64)
+    for rows, grid in _by_year(utc):
+        positions = grid.positions(utc[rows])
+        month_index[rows] = grid.month_index[positions]
+        cell[rows] = grid.cell[positions]
+    return month_index, cell
+
+
+def local_seconds(utc: np.ndarray) -> np.ndarray:
+    """Shifts UTC epoch seconds to Europe/Stockholm wall-clock epoch seconds."""
+    local = np.empty(utc.shape, dtype=np.int64)
+    for rows, grid in _by_year(utc):
+        local[rows] = utc[rows] + grid.utc_offset[grid.positions(utc[rows])]
+    return local
+
+
+def is_holiday(utc: np.ndarray) -> np.ndarray:
+    """Whether every UTC epoch second falls on a Swedish public holiday."""
+    holiday = np.empty(utc.shape, dtype=bool)
+    for rows, grid in _by_year(utc):
+        holiday[rows] = grid.holiday[grid.positions(utc[rows])]
+    return holiday
+
+
+def holidays(year: int) -> list[date]:
+    """Swedish public holidays of a year, with the Midsummer, Christmas and New
+    Year's eves that grid operators bill as holidays.
+    """
+    easter = _easter_sunday(year)
+    # Midsummer Day is the Saturday between June 20 and 26
+    midsummer = date(year, 6, 20) + timedelta(
+        days=(5 - date(year, 6, 20).weekday()) % 7
+    )
+    # All Saints' Day is the Saturday between October 31 and November 6
+    all_saints = date(year, 10, 31) + timedelta(
+        days=(5 - date(year, 10, 31).weekday()) % 7
+    )
+    days = [
+        date(year, 1, 1),
+        date(year, 1, 6),
+        easter - timedelta(days=2),
+        easter,
+        easter + timedelta(days=1),
+        date(year, 5, 1),
+        easter + timedelta(days=39),
+        easter + timedelta(days=49),
+        midsummer - timedelta(days=1),
+        midsummer,
+        all_saints,
+        date(year, 12, 24),
+        date(year, 12, 25),
+        date(year, 12, 26),
+        date(year, 12, 31),
+    ]
+    # National Day replaced Whit Monday in 2005
+    days.append(date(year, 6, 6) if year >= 2005 else easter + timedelta(days=50))
+    return sorted(days)
+
+
+def _by_year(utc: np.ndarray):
+    """(rows, grid) per UTC year of the timestamps; all rows at once in a single year."""
+    if utc.size == 0:
+        return
+    first, last = _utc_year(int(utc.min())), _utc_year(int(utc.max()))
+    if first == last:
+        yield slice(None), year_grid(first)
+        return
+    years = utc.astype("datetime64[s]").astype("datetime64[Y]").astype(np.int64) + 1970
+    for year in range(first, last + 1):
+        rows = years == year
+        if rows.any():
+            yield rows, year_grid(year)
+
+
+def _utc_year(epoch_seconds: int) -> int:
+    return datetime.fromtimestamp(epoch_seconds, timezone.utc).year
+
+
+def _hourly_utc_offsets(year: int) -> np.ndarray:
+    """UTC offset in seconds of every hour of a UTC year.
+
+    Offsets are read per day and only resolved per hour on the days they change.
+    """
+    start = datetime(year, 1, 1, tzinfo=timezone.utc)
+    n_days = 366 if calendar.isleap(year) else 365
+
+    def offset(hours: int) -> int:
+        moment = start + timedelta(hours=hours)
+        return int(moment.astimezone(TIMEZONE).utcoffset().total_seconds())
+
+    daily = [offset(day * 24) for day in range(n_days + 1)]
+    offsets = np.repeat(np.array(daily[:-1], dtype=np.int64), 24)
+    for day in np.flatnonzero(np.diff(daily)):
+        hours = range(day * 24, (day + 1) * 24)
+        offsets[hours.start : hours.stop] = [offset(hour) for hour in hours]
+    return offsets
+
+
+def _easter_sunday(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7  # noqa: E741
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
@@ -0,0 +1,185 @@
+import io
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from src.calculation import calendar_grid, engine
+from src.exceptions import IllegalArgumentError
+from src.model import PowerTariffSpec
+
+# Longest range a curve is exported for
+MAX_CURVE_DAYS = 366
+# Layout of a curve exported as .npy
+CURVE_DTYPE = np.dtype(
+    [
+        ("timestamp", "datetime64[s]"),
+        ("price_exc_vat", np.float32),
+        ("price_inc_vat", np.float32),
+        ("multiplier", np.float32),
+    ]
+)
+
+
+class TimeOfUseCurve:
+    """Effective power price of a tariff per reading period.
+
+    ``timestamps`` are consecutive UTC period starts. ``multiplier`` is the
+    highest interval multiplier applying to a period, 0 where none does, and
+    the prices are summed over the applicable compositions, each times its
+    multiplier: what a kW of the monthly peak costs when it falls in the period.
+    """
+
+    __slots__ = ("timestamps", "price_exc_vat", "price_inc_vat", "multiplier")
+
+    def __init__(
+        self,
+        timestamps: np.ndarray,
+        price_exc_vat: np.ndarray,
+        price_inc_vat: np.ndarray,
+        multiplier: np.ndarray,
+    ):
+        self.timestamps = timestamps
+        self.price_exc_vat = price_exc_vat
+        self.price_inc_vat = price_inc_vat
+        self.multiplier = multiplier
+
+    def __getitem__(self, periods: slice) -> "TimeOfUseCurve":
+        return TimeOfUseCurve(
+            self.timestamps[periods],
+            self.price_exc_vat[periods],
+            self.price_inc_vat[periods],
+            self.multiplier[periods],
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @staticmethod
+    def concat(curves: list["TimeOfUseCurve"]) -> "TimeOfUseCurve":
+        return TimeOfUseCurve(
+            *(
+                np.concatenate([getattr(curve, field) for curve in curves])
+                for field in TimeOfUseCurve.__slots__
+            )
+        )
+
+    def to_npy(self) -> bytes:
+        """The curve as a structured .npy array, see CURVE_DTYPE."""
+        records = np.empty(len(self), dtype=CURVE_DTYPE)
+        records["timestamp"] = self.timestamps
+        records["price_exc_vat"] = self.price_exc_vat
+        records["price_inc_vat"] = self.price_inc_vat
+        records["multiplier"] = self.multiplier
+        buffer = io.BytesIO()
+        np.save(buffer, records, allow_pickle=False)
+        return buffer.getvalue()
+
+
+class TimeOfUseCurveCache:
+    """Yearly curves by (tariff uid, fuse, year, period), recomputed when the
+    tariff's ``last_updated`` changes.
+
+    Used from calculation worker threads, hence the lock.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self._max_entries = max_entries
+        self._curves: OrderedDict[tuple, tuple[datetime, TimeOfUseCurve]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(
+        self, tariff: PowerTariffSpec, fuse: str | None, year: int, seconds: int
+    ) -> TimeOfUseCurve:
+        if tariff.uid is None:
+            return year_curve(tariff, fuse, year, seconds)
+        key = (tariff.uid, fuse, year, seconds)
+        with self._lock:
+            cached = self._curves.get(key)
+            if cached is not None and cached[0] == tariff.last_updated:
+                self._curves.move_to_end(key)
+                return cached[1]
+        curve = year_curve(tariff, fuse, year, seconds)
+        with self._lock:
+            self._curves[key] = (tariff.last_updated, curve)
+            self._curves.move_to_end(key)
+            while len(self._curves) > self._max_entries:
+                self._curves.popitem(last=False)
+        return curve
+
+    def clear(self) -> None:
+        with self._lock:
+            self._curves.clear()
+
+    def __len__(self) -> int:
+        return len(self._curves)
+
+
+def time_of_use_curve(
+    tariff: PowerTariffSpec,
+    start: date,
+    end: date,
+    fuse: str | None = None,
+    resolution_minutes: int = 60,
+) -> TimeOfUseCurve:
+    """The tariff's curve from local midnight of ``start`` to that of ``end``.
+
+    Sliced from cached yearly curves, which are computed from the compiled
+    tariff in one gather.
+    """
+    if end <= start:
+        raise IllegalArgumentError("The end date must be after the start date")
+    if (end - start).days > MAX_CURVE_DAYS:
+        raise IllegalArgumentError(
+            f"Curves are limited to {MAX_CURVE_DAYS} days per request"
+        )
+    seconds = resolution_minutes * 60
+    if seconds not in engine.TIME_UNITS.values():
+        raise IllegalArgumentError(f"Unsupported resolution {resolution_minutes} min")
+    lo, hi = _local_midnight(start), _local_midnight(end)
+    parts = []
+    for year in range(start.year, (end - timedelta(days=1)).year + 1):
+        curve = curves.get(tariff, fuse, year, seconds)
+        utc = curve.timestamps.astype(np.int64)
+        parts.append(
+            curve[int(np.searchsorted(utc, lo)) : int(np.searchsorted(utc, hi))]
+        )
+    return TimeOfUseCurve.concat(parts)
+
+
+def year_curve(
+    tariff: PowerTariffSpec, fuse: str | None, year: int, seconds: int
+) -> TimeOfUseCurve:
+    """The tariff's curve over a local calendar year, in periods of ``seconds``."""
+    plan, compositions = engine.compile_for(tariff, fuse)
+    utc = np.arange(
+        _local_midnight(date(year, 1, 1)),
+        _local_midnight(date(year + 1, 1, 1)),
+        seconds,
+        dtype=np.int64,
+    )
+    _, weights = engine.reading_weights(plan, compositions, utc)
+    curve = TimeOfUseCurve(
+        utc.astype("datetime64[s]"),
+        np.nansum(weights * plan.price_exc_vat[compositions, None], axis=0),
+        np.nansum(weights * plan.price_inc_vat[compositions, None], axis=0),
+        np.nan_to_num(np.fmax.reduce(weights, axis=0)),
+    )
+    # Cached curves are shared between requests
+    for field in TimeOfUseCurve.__slots__:
+        getattr(curve, field).flags.writeable = False
+    return curve
+
+
+def _local_midnight(day: date) -> int:
+    return int(
+        datetime(
+            day.year, day.month, day.day, tzinfo=calendar_grid.TIMEZONE
+        ).timestamp()
+    )
+
+
+curves = TimeOfUseCurveCache()
@@ -0,0 +1,386 @@
+import numpy as np
+
+from src.calculation import calendar_grid
+from src.calculation.plan import SLOT_SECONDS, TariffPlan, plans
+from src.exceptions import IllegalArgumentError
+from src.model import PowerTariffSpec
+
+SUPPORTED_MODELS = ("avg_monthly_peaks",)
+# Seconds of a reading per tariff time unit; loads are resampled to it
+TIME_UNITS = {"hourly": 3600, "quarter_hourly": SLOT_SECONDS}
+
+
+# Bounds the (meters x compositions x readings) temporaries of one pass
+_MAX_PASS_ELEMENTS = 8_000_000
+
+
+class PowerFeeResult:
+    """Monthly billed power and fees of one load series under one tariff.
+
+    ``billed_kw`` has one row per applied tariff composition and one column per
+    month in ``months`` (as (year, month) pairs); fees are summed over compositions.
+    """
+
+    __slots__ = ("months", "billed_kw", "fee_exc_vat", "fee_inc_vat")
+
+    def __init__(
+        self,
+        months: list[tuple[int, int]],
+        billed_kw: np.ndarray,
+        fee_exc_vat: np.ndarray,
+        fee_inc_vat: np.ndarray,
+    ):
+        self.months = months
+        self.billed_kw = billed_kw
+        self.fee_exc_vat = fee_exc_vat
+        self.fee_inc_vat = fee_inc_vat
+
+
+class BatchPowerFeeResult:
+    """Monthly billed power and fees of many meters under one tariff.
+
+    Same layout as PowerFeeResult with a leading meter axis.
+    """
+
+    __slots__ = ("months", "billed_kw", "fee_exc_vat", "fee_inc_vat")
+
+    def __init__(
+        self,
+        months: list[tuple[int, int]],
+        billed_kw: np.ndarray,
+        fee_exc_vat: np.ndarray,
+        fee_inc_vat: np.ndarray,
+    ):
+        self.months = months
+        self.billed_kw = billed_kw
+        self.fee_exc_vat = fee_exc_vat
+        self.fee_inc_vat = fee_inc_vat
+
+    def meter(self, index: int) -> PowerFeeResult:
+        return PowerFeeResult(
+            self.months,
+            self.billed_kw[index],
+            self.fee_exc_vat[index],
+            self.fee_inc_vat[index],
+        )
+
+    def __len__(self) -> int:
+        return len(self.billed_kw)
+
+
+class TariffComparison:
+    """Results of one load series under several tariffs.
+
+    ``priced`` pairs each priced tariff with its result; ``skipped`` pairs the
+    tariffs that can't price the load with the reason.
+    """
+
+    __slots__ = ("priced", "skipped")
+
+    def __init__(self):
+        self.priced: list[tuple[PowerTariffSpec, PowerFeeResult]] = []
+        self.skipped: list[tuple[PowerTariffSpec, str]] = []
+
+
+def calculate_power_fee(
+    tariff: PowerTariffSpec,
+    timestamps: np.ndarray,
+    kw: np.ndarray,
+    fuse: str | None = None,
+) -> PowerFeeResult:
+    """Prices a load series (kW per UTC reading start) under a tariff.
+
+    Readings may be quarter-hourly, hourly or mixed; they're resampled to the
+    tariff's time unit first (see ``resample``). Every applicable composition
+    bills the average of the month's ``samples_per_month`` highest loads within
+    its months, days and intervals, each load weighted by its interval
+    multiplier. Missing readings are NaN. The tariff is compiled once into a
+    TariffPlan, so weighting the readings is a single gather from its lookup
+    grid.
+    """
+    kw = np.asarray(kw, dtype=np.float64)
+    if kw.ndim != 1:
+        raise IllegalArgumentError("Readings must be 1-D, use calculate_power_fees")
+    return calculate_power_fees(tariff, timestamps, kw[None, :], fuse).meter(0)
+
+
+def calculate_power_fees(
+    tariff: PowerTariffSpec,
+    timestamps: np.ndarray,
+    kw: np.ndarray,
+    fuse: str | None = None,
+) -> BatchPowerFeeResult:
+    """Prices many meters' load series, as a meters x readings kW array.
+
+    All meters share the timestamps. Meters are priced together in passes of
+    bounded size, each a single gather, sort and bincount.
+    """
+    plan, compositions = compile_for(tariff, fuse)
+    kw = np.asarray(kw, dtype=np.float64)
+    utc = np.asarray(timestamps, dtype="datetime64[s]").astype(np.int64)
+    if kw.ndim != 2 or utc.ndim != 1 or kw.shape[1] != utc.size:
+        raise IllegalArgumentError("Readings must be meters x timestamps")
+    if kw.size == 0:
+        raise IllegalArgumentError("No readings provided")
+    utc, kw = resample(utc, kw, TIME_UNITS[tariff.time_unit])
+
+    month_index, weights = reading_weights(plan, compositions, utc)
+    first_month = int(month_index.min())
+    n_months = int(month_index.max()) - first_month + 1
+    month_pos = month_index - first_month
+    n_meters = kw.shape[0]
+    billed = np.empty((n_meters, len(compositions), n_months))
+    step = max(1, _MAX_PASS_ELEMENTS // weights.size)
+    for start in range(0, n_meters, step):
+        billed[start : start + step] = _billed_kw(
+            kw[start : start + step],
+            weights,
+            month_pos,
+            n_months,
+            tariff.samples_per_month,
+        )
+
+    price_exc = plan.price_exc_vat[compositions]
+    price_inc = plan.price_inc_vat[compositions]
+    months = month_labels(first_month, n_months)
+    return BatchPowerFeeResult(
+        months,
+        billed,
+        np.einsum("mck,c->mk", billed, price_exc),
+        np.einsum("mck,c->mk", billed, price_inc),
+    )
+
+
+def compare_power_fees(
+    tariffs: list[PowerTariffSpec],
+    timestamps: np.ndarray,
+    kw: np.ndarray,
+    fuse: str | None = None,
+) -> TariffComparison:
+    """Prices one load series under several tariffs in a single pass.
+
+    The compositions of every tariff that can price the fuse are stacked into
+    one weights array, so the readings are sorted and binned once for all of
+    them; tariffs with another time unit get a pass of their own. Tariffs that
+    can't price the load are returned as skipped with the reason.
+    """
+    kw = np.asarray(kw, dtype=np.float64)
+    utc = np.asarray(timestamps, dtype="datetime64[s]").astype(np.int64)
+    if kw.ndim != 1 or utc.shape != kw.shape:
+        raise IllegalArgumentError("Readings must be 1-D and match the timestamps")
+    if kw.size == 0:
+        raise IllegalArgumentError("No readings provided")
+
+    comparison = TariffComparison()
+    by_unit: dict[int, list[tuple[PowerTariffSpec, TariffPlan, np.ndarray]]] = {}
+    for tariff in tariffs:
+        try:
+            plan, compositions = compile_for(tariff, fuse)
+        except IllegalArgumentError as e:
+            comparison.skipped.append((tariff, e.msg))
+            continue
+        unit = TIME_UNITS[tariff.time_unit]
+        by_unit.setdefault(unit, []).append((tariff, plan, compositions))
+    for unit, compiled in by_unit.items():
+        unit_utc, unit_kw = resample(utc, kw[None, :], unit)
+        comparison.priced.extend(_compare_pass(compiled, unit_utc, unit_kw[0]))
+    return comparison
+
+
+def _compare_pass(
+    compiled: list[tuple[PowerTariffSpec, TariffPlan, np.ndarray]],
+    utc: np.ndarray,
+    kw: np.ndarray,
+) -> list[tuple[PowerTariffSpec, PowerFeeResult]]:
+    month_index, cell = reading_cells(utc)
+    first_month = int(month_index.min())
+    n_months = int(month_index.max()) - first_month + 1
+    weights = np.concatenate(
+        [_gather(plan, compositions, cell) for _, plan, compositions in compiled]
+    )
+    samples = np.concatenate(
+        [
+            np.full(len(compositions), tariff.samples_per_month)
+            for tariff, _, compositions in compiled
+        ]
+    )
+    billed = _billed_kw(
+        kw[None, :], weights, month_index - first_month, n_months, samples
+    )[0]
+
+    months = month_labels(first_month, n_months)
+    priced = []
+    row = 0
+    for tariff, plan, compositions in compiled:
+        tariff_billed = billed[row : row + len(compositions)]
+        row += len(compositions)
+        priced.append(
+            (
+                tariff,
+                PowerFeeResult(
+                    months,
+                    tariff_billed,
+                    plan.price_exc_vat[compositions] @ tariff_billed,
+                    plan.price_inc_vat[compositions] @ tariff_billed,
+                ),
+            )
+        )
+    return priced
+
+
+def compile_for(
+    tariff: PowerTariffSpec, fuse: str | None
+) -> tuple[TariffPlan, np.ndarray]:
+    """The tariff's plan and the compositions applying to the fuse.
+
+    Raises IllegalArgumentError when the tariff can't be priced.
+    """
+    if tariff.model not in SUPPORTED_MODELS:
+        raise IllegalArgumentError(f"Unsupported tariff model {tariff.model}")
+    if tariff.time_unit not in TIME_UNITS:
+        raise IllegalArgumentError(f"Unsupported time unit {tariff.time_unit}")
+    plan = plans.get(tariff)
+    return plan, plan.compositions_for(fuse)
+
+
+def resample(
+    utc: np.ndarray, kw: np.ndarray, unit: int, resolution: int | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Averages (meters x readings) loads into readings of ``unit`` seconds.
+
+    Readings start on quarter hours and may be quarter-hourly, hourly or mixed.
+    A reading is hourly when it starts on the hour and the next one starts an
+    hour later, or later still after another hourly reading; any other reading
+    is a quarter hour, so gaps read as missing data. A known ``resolution``
+    (seconds) skips that inference. Each reading is spread over the quarter
+    hours it covers and those are averaged per unit, ignoring missing ones; a
+    unit without readings is NaN. Series already at the unit are returned as
+    they are.
+    """
+    if np.any(utc % SLOT_SECONDS):
+        raise IllegalArgumentError("Readings must start on a quarter hour")
+    order = np.argsort(utc, kind="stable")
+    utc, kw = utc[order], kw[:, order]
+    gaps = np.diff(utc)
+    if np.any(gaps == 0):
+        raise IllegalArgumentError("Readings must have distinct timestamps")
+    if resolution is not None:
+        durations = np.full(utc.size, resolution)
+    elif utc.size == 1:
+        durations = np.array([unit])
+    else:
+        before = np.concatenate([gaps[:1], gaps])
+        after = np.concatenate([gaps, gaps[-1:]])
+        hourly = (utc % 3600 == 0) & (
+            (after == 3600) | ((after > 3600) & (before >= 3600))
+        )
+        durations = np.where(hourly, 3600, SLOT_SECONDS)
+    if np.all(durations == unit) and not np.any(utc % unit):
+        return utc, kw
+
+    # Quarter hours covered by every reading
+    quarters = durations // SLOT_SECONDS
+    reading = np.repeat(np.arange(utc.size), quarters)
+    offset = np.arange(reading.size) - np.repeat(
+        np.cumsum(quarters) - quarters, quarters
+    )
+    starts = (utc[reading] + offset * SLOT_SECONDS) // unit * unit
+    # Units are contiguous runs of the sorted quarter hours
+    first = np.flatnonzero(np.concatenate([[True], starts[1:] != starts[:-1]]))
+    loads = kw[:, reading]
+    present = ~np.isnan(loads)
+    sums = np.add.reduceat(np.where(present, loads, 0.0), first, axis=1)
+    counts = np.add.reduceat(present, first, axis=1)
+    return starts[first], np.divide(
+        sums, counts, out=np.full(sums.shape, np.nan), where=counts > 0
+    )
+
+
+def reading_weights(
+    plan: TariffPlan, compositions: np.ndarray, utc: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Local month (months since 1970-01) of every reading, with its multiplier per
+    composition as a (compositions x readings) array, NaN where it doesn't apply.
+    """
+    month_index, cell = reading_cells(utc)
+    return month_index, _gather(plan, compositions, cell)
+
+
+def reading_cells(utc: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Local month (months since 1970-01) of every reading, with its flat
+    (month of year, weekday, slot) cell in a TariffPlan's multipliers.
+
+    Looked up in the cached yearly calendar grids, so no timezone conversion
+    happens per reading.
+    """
+    return calendar_grid.cells(utc)
+
+
+def _gather(plan: TariffPlan, compositions: np.ndarray, cell: np.ndarray) -> np.ndarray:
+    return plan.multipliers[compositions].reshape(len(compositions), -1)[:, cell]
+
+
+def month_labels(first_month: int, n_months: int) -> list[tuple[int, int]]:
+    """(year, month) pairs of consecutive months counted from 1970-01."""
+    return [
+        (1970 + m // 12, m % 12 + 1) for m in range(first_month, first_month + n_months)
+    ]
+
+
+def _billed_kw(
+    kw: np.ndarray,
+    weights: np.ndarray,
+    month_pos: np.ndarray,
+    n_months: int,
+    samples: int | np.ndarray,
+) -> np.ndarray:
+    """Billed kW per (meter, composition, month) of a pass of meters.
+
+    ``samples`` is the tariff's samples per month, or one per composition.
+    Readings are in time order, so every month is a slice of them; the highest
+    loads of a month are selected with a partition rather than a full sort.
+    """
+    n_meters, n_compositions = kw.shape[0], weights.shape[0]
+    samples = np.broadcast_to(samples, (n_compositions,))
+    most = int(samples.max())
+    billed = np.zeros((n_meters, n_compositions, n_months))
+    bounds = np.searchsorted(month_pos, np.arange(n_months + 1))
+    for month, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:])):
+        if lo == hi:
+            continue
+        weighted = kw[:, None, lo:hi] * weights[None, :, lo:hi]
+        weighted[np.isnan(weighted)] = -np.inf
+        if hi - lo > most:
+            weighted = np.partition(weighted, hi - lo - most, axis=2)[
+                :, :, hi - lo - most :
+            ]
+        # Highest first, so every composition keeps its first ``samples`` loads
+        top = -np.sort(-weighted, axis=2)
+        kept = np.isfinite(top) & (np.arange(top.shape[2]) < samples[:, None])
+        counts = kept.sum(axis=2)
+        billed[:, :, month] = np.divide(
+            np.where(kept, top, 0.0).sum(axis=2),
+            counts,
+            out=np.zeros(counts.shape),
+            where=counts > 0,
+        )
+    return billed
+
+
+def top_n_mean(
+    keys: np.ndarray, values: np.ndarray, n: int | np.ndarray, n_keys: int
+) -> np.ndarray:
+    """Mean of the ``n`` largest values per key, 0 for keys without values.
+
+    ``n`` is either shared by every key or given per key.
+
+    Sorts once by (key, value descending) and ranks every value within its key,
+    so there is no Python loop over keys or values.
+    """
+    order = np.lexsort((-values, keys))
+    sorted_keys = keys[order]
+    rank = np.arange(sorted_keys.size) - np.searchsorted(sorted_keys, sorted_keys)
+    top = rank < (n if np.isscalar(n) else n[sorted_keys])
+    sums = np.bincount(sorted_keys[top], weights=values[order][top], minlength=n_keys)
+    counts = np.bincount(sorted_keys[top], minlength=n_keys)
+    return np.divide(sums, counts, out=np.zeros(n_keys), where=counts > 0)
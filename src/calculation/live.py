@@ -0,0 +1,300 @@
+import heapq
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import numpy as np
+
+from src import env
+from src.calculation import engine
+from src.calculation.engine import PowerFeeResult
+from src.exceptions import IllegalArgumentError, MissingError
+from src.model import PowerTariffSpec
+
+# Months kept besides the latest, so a checkpoint still holds the last one
+_KEPT_PAST_MONTHS = 1
+
+
+class PeakTracker:
+    """Month-to-date power fee of one meter, updated reading by reading.
+
+    Keeps a min-heap of the ``samples_per_month`` highest weighted loads per
+    (month, composition), so adding a reading costs O(log N) per composition
+    it applies to and the fee is read from running sums. Readings every
+    ``resolution_minutes`` are resampled to the tariff's time unit; readings of
+    a unit still being filled are held back until it's complete or a later
+    unit starts. Readings of a unit already counted, and re-sent held-back
+    readings, are ignored, so feeds delivering readings more than once don't
+    inflate the peaks.
+    """
+
+    __slots__ = (
+        "tariff_uid",
+        "last_updated",
+        "fuse",
+        "resolution_minutes",
+        "last_reading",
+        "_plan",
+        "_compositions",
+        "_samples",
+        "_unit",
+        "_pending_utc",
+        "_pending_kw",
+        "_committed_unit",
+        "_latest_month",
+        "_heaps",
+        "_sums",
+    )
+
+    def __init__(
+        self,
+        tariff: PowerTariffSpec,
+        fuse: str | None = None,
+        resolution_minutes: int = 60,
+    ):
+        self._plan, self._compositions = engine.compile_for(tariff, fuse)
+        self._samples = tariff.samples_per_month
+        self._unit = engine.TIME_UNITS[tariff.time_unit]
+        self.tariff_uid = tariff.uid
+        self.last_updated = tariff.last_updated
+        self.fuse = fuse
+        self.resolution_minutes = resolution_minutes
+        # Readings of the unit still being filled
+        self._pending_utc = np.empty(0, dtype=np.int64)
+        self._pending_kw = np.empty(0)
+        # Latest unit (seconds since epoch // unit) counted in the peaks
+        self._committed_unit: int | None = None
+        self.last_reading: datetime | None = None
+        self._latest_month: int | None = None
+        # Month index (months since 1970-01) -> heap and sum per composition
+        self._heaps: dict[int, list[list[float]]] = {}
+        self._sums: dict[int, list[float]] = {}
+
+    def add(self, timestamps: np.ndarray, kw: np.ndarray) -> int:
+        """Adds readings (UTC timestamps, kW); NaN readings are skipped.
+
+        Returns the number of readings ignored as already added.
+        """
+        utc = np.asarray(timestamps, dtype="datetime64[s]")
+        kw = np.asarray(kw, dtype=np.float64)
+        if utc.shape != kw.shape or utc.ndim != 1:
+            raise IllegalArgumentError("Timestamps and kW readings must match")
+        new = ~np.isin(utc.astype(np.int64), self._pending_utc)
+        if self._committed_unit is not None:
+            new &= utc.astype(np.int64) // self._unit > self._committed_unit
+        ignored = int(utc.size - np.count_nonzero(new))
+        utc, kw = utc[new], kw[new]
+        if utc.size == 0:
+            return ignored
+        seconds = np.concatenate([self._pending_utc, utc.astype(np.int64)])
+        kw = np.concatenate([self._pending_kw, kw])
+        # Validates before any state changes
+        unit_utc, unit_kw = engine.resample(
+            seconds, kw[None, :], self._unit, self.resolution_minutes * 60
+        )
+        order = np.argsort(seconds, kind="stable")
+        seconds, kw = seconds[order], kw[order]
+        units = seconds // self._unit
+        held = seconds.size
+        per_unit = self._unit // (self.resolution_minutes * 60)
+        if per_unit > 1:
+            # The latest unit is held back until all of its readings arrived
+            held = int(np.searchsorted(units, units[-1]))
+            if seconds.size - held == per_unit:
+                held = seconds.size
+        if held < seconds.size:
+            unit_utc, unit_kw = engine.resample(
+                seconds[:held],
+                kw[None, :held],
+                self._unit,
+                self.resolution_minutes * 60,
+            )
+        self._pending_utc, self._pending_kw = seconds[held:], kw[held:]
+        if held:
+            self._committed_unit = int(units[held - 1])
+            month_index, weights = engine.reading_weights(
+                self._plan, self._compositions, unit_utc
+            )
+            weighted = weights * unit_kw
+            for c, reading in zip(*np.nonzero(~np.isnan(weighted))):
+                self._push(
+                    int(month_index[reading]), int(c), float(weighted[c, reading])
+                )
+        latest = utc.max().astype(datetime).replace(tzinfo=timezone.utc)
+        if self.last_reading is None or latest > self.last_reading:
+            self.last_reading = latest
+            self._latest_month = int(engine.reading_cells(seconds[-1:])[0][0])
+        self._prune()
+        return ignored
+
+    def month_to_date(self) -> PowerFeeResult:
+        """Fee of the month of the latest reading, as a one-month result."""
+        if self._latest_month is None:
+            raise IllegalArgumentError("No readings added yet")
+        month = self._latest_month
+        empty = [[] for _ in self._compositions]
+        billed = np.array(
+            [
+                total / len(heap) if heap else 0.0
+                for heap, total in zip(
+                    self._heaps.get(month, empty),
+                    self._sums.get(month, [0.0] * len(empty)),
+                )
+            ]
+        )
+        return PowerFeeResult(
+            engine.month_labels(month, 1),
+            billed[:, None],
+            self._plan.price_exc_vat[self._compositions] @ billed[:, None],
+            self._plan.price_inc_vat[self._compositions] @ billed[:, None],
+        )
+
+    def to_state(self) -> dict:
+        """Compact, JSON-serializable state: the heaps per month and held readings."""
+        return {
+            "tariffUid": self.tariff_uid,
+            "lastUpdated": self.last_updated.isoformat(),
+            "fuse": self.fuse,
+            "resolutionMinutes": self.resolution_minutes,
+            "lastReading": self.last_reading.isoformat() if self.last_reading else None,
+            "committedUntil": (
+                str(np.datetime64(self._committed_unit * self._unit, "s")) + "Z"
+                if self._committed_unit is not None
+                else None
+            ),
+            "pending": [
+                [
+                    str(np.datetime64(int(t), "s")) + "Z",
+                    None if np.isnan(value) else float(value),
+                ]
+                for t, value in zip(self._pending_utc, self._pending_kw)
+            ],
+            "months": {
+                "%04d-%02d" % engine.month_labels(month, 1)[0]: heaps
+                for month, heaps in self._heaps.items()
+            },
+        }
+
+    @classmethod
+    def from_state(cls, tariff: PowerTariffSpec, state: dict) -> "PeakTracker":
+        """Restores a tracker; state saved under another tariff version is rejected."""
+        if state.get("tariffUid") != tariff.uid:
+            raise IllegalArgumentError(f"State isn't for tariff {tariff.uid}")
+        if datetime.fromisoformat(state["lastUpdated"]) != tariff.last_updated:
+            raise IllegalArgumentError(
+                f"State was saved for an older version of tariff {tariff.uid}"
+            )
+        tracker = cls(tariff, state.get("fuse"), state.get("resolutionMinutes", 60))
+        if state.get("lastReading"):
+            last_reading = datetime.fromisoformat(state["lastReading"])
+            if last_reading.tzinfo is None:
+                last_reading = last_reading.replace(tzinfo=timezone.utc)
+            month_index, _ = engine.reading_weights(
+                tracker._plan,
+                tracker._compositions,
+                np.array([int(last_reading.timestamp())], dtype=np.int64),
+            )
+            tracker.last_reading = last_reading
+            tracker._latest_month = int(month_index[0])
+        for label, heaps in state.get("months", {}).items():
+            year, month = (int(part) for part in label.split("-"))
+            if len(heaps) != len(tracker._compositions):
+                raise IllegalArgumentError(
+                    f"State for {label} doesn't match the tariff"
+                )
+            heaps = [
+                sorted(float(v) for v in heap)[-tracker._samples :] for heap in heaps
+            ]
+            month_index = (year - 1970) * 12 + month - 1
+            tracker._heaps[month_index] = heaps
+            tracker._sums[month_index] = [sum(heap) for heap in heaps]
+        try:
+            pending = state.get("pending", [])
+            tracker._pending_utc = np.array(
+                [t.removesuffix("Z") for t, _ in pending], dtype="datetime64[s]"
+            ).astype(np.int64)
+            tracker._pending_kw = np.array(
+                [np.nan if value is None else float(value) for _, value in pending]
+            )
+        except (TypeError, ValueError):
+            raise IllegalArgumentError("Invalid pending readings in state")
+        if state.get("committedUntil"):
+            committed = np.datetime64(state["committedUntil"].removesuffix("Z"), "s")
+            tracker._committed_unit = int(committed.astype(np.int64)) // tracker._unit
+        elif tracker.last_reading is not None:
+            # Older checkpoints: everything before the held-back unit was counted
+            if tracker._pending_utc.size:
+                latest = int(tracker._pending_utc.min()) // tracker._unit - 1
+            else:
+                latest = int(tracker.last_reading.timestamp()) // tracker._unit
+            tracker._committed_unit = latest
+        return tracker
+
+    def _push(self, month: int, composition: int, value: float) -> None:
+        heaps = self._heaps.get(month)
+        if heaps is None:
+            heaps = self._heaps[month] = [[] for _ in self._compositions]
+            self._sums[month] = [0.0] * len(self._compositions)
+        heap, sums = heaps[composition], self._sums[month]
+        if len(heap) < self._samples:
+            heapq.heappush(heap, value)
+            sums[composition] += value
+        elif value > heap[0]:
+            sums[composition] += value - heapq.heapreplace(heap, value)
+
+    def _prune(self) -> None:
+        oldest = self._latest_month - _KEPT_PAST_MONTHS
+        for month in [month for month in self._heaps if month < oldest]:
+            del self._heaps[month]
+            del self._sums[month]
+
+
+class PeakTrackerRegistry:
+    """Live trackers by meter id, evicting the least recently updated meters."""
+
+    def __init__(self, max_meters: int):
+        self._max_meters = max_meters
+        self._trackers: OrderedDict[str, PeakTracker] = OrderedDict()
+
+    def get(self, meter_id: str) -> PeakTracker:
+        tracker = self._trackers.get(meter_id)
+        if tracker is None:
+            raise MissingError("live meter", meter_id)
+        return tracker
+
+    def get_or_create(
+        self,
+        meter_id: str,
+        tariff: PowerTariffSpec,
+        fuse: str | None,
+        resolution_minutes: int = 60,
+    ) -> PeakTracker:
+        """The meter's tracker, restarted when its tariff, tariff version, fuse or
+        resolution changed.
+        """
+        tracker = self._trackers.get(meter_id)
+        if (
+            tracker is None
+            or tracker.tariff_uid != tariff.uid
+            or tracker.last_updated != tariff.last_updated
+            or tracker.fuse != fuse
+            or tracker.resolution_minutes != resolution_minutes
+        ):
+            tracker = PeakTracker(tariff, fuse, resolution_minutes)
+        self.put(meter_id, tracker)
+        return tracker
+
+    def put(self, meter_id: str, tracker: PeakTracker) -> None:
+        self._trackers[meter_id] = tracker
+        self._trackers.move_to_end(meter_id)
+        while len(self._trackers) > self._max_meters:
+            self._trackers.popitem(last=False)
+
+    def remove(self, meter_id: str) -> None:
+        if self._trackers.pop(meter_id, None) is None:
+            raise MissingError("live meter", meter_id)
+
+    def __len__(self) -> int:
+        return len(self._trackers)
+
+
+trackers = PeakTrackerRegistry(env.get_live_tracker_max_meters())
@@ -0,0 +1,136 @@
+import calendar
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.exceptions import IllegalArgumentError
+from src.fuse_index import FuseIndex, parse_fuse
+from src.model import PowerTariffSpec, TariffCompositionSpec
+
+# Month and day names of compositions, January and Monday first
+MONTHS = [calendar.month_abbr[month].lower() for month in range(1, 13)]
+DAYS = [calendar.day_abbr[day].lower() for day in range(7)]
+# Interval multipliers are resolved per quarter hour of the local day
+SLOTS_PER_DAY = 96
+SLOT_SECONDS = 86400 // SLOTS_PER_DAY
+
+
+class TariffPlan:
+    """A tariff compiled into dense lookup arrays.
+
+    ``multipliers[c, month, weekday, slot]`` is the interval multiplier of
+    composition ``c`` for a quarter-hour slot of the local day, NaN where the
+    composition doesn't apply. A FuseIndex maps a fuse size to the
+    compositions that price it.
+    """
+
+    __slots__ = (
+        "uid",
+        "last_updated",
+        "samples_per_month",
+        "multipliers",
+        "price_exc_vat",
+        "price_inc_vat",
+        "_fuses",
+    )
+
+    def __init__(self, tariff: PowerTariffSpec):
+        if not tariff.compositions:
+            raise IllegalArgumentError(f"Tariff {tariff.uid} has no compositions")
+        self.uid = tariff.uid
+        self.last_updated = tariff.last_updated
+        self.samples_per_month = tariff.samples_per_month
+        self.multipliers = np.stack([_compile(c) for c in tariff.compositions])
+        self.price_exc_vat = np.array([c.price_exc_vat for c in tariff.compositions])
+        self.price_inc_vat = np.array([c.price_inc_vat for c in tariff.compositions])
+        self._fuses = FuseIndex(tariff.compositions)
+        for array in (self.multipliers, self.price_exc_vat, self.price_inc_vat):
+            array.flags.writeable = False
+
+    def compositions_for(self, fuse: str | None) -> np.ndarray:
+        """Indices of the compositions that apply to a fuse size.
+
+        A fuse is only required when the tariff prices several fuse ranges.
+        """
+        if fuse is None:
+            if self._fuses.band_count > 1:
+                raise IllegalArgumentError(
+                    f"Tariff {self.uid} is priced per fuse size, a fuse is required"
+                )
+            return np.array(self._fuses.all())
+        selected = self._fuses.lookup(parse_fuse(fuse))
+        if not selected:
+            raise IllegalArgumentError(
+                f"Tariff {self.uid} has no price for fuse {fuse}"
+            )
+        return np.array(selected)
+
+
+class TariffPlanCache:
+    """Compiled plans by tariff uid, recompiled when the tariff's ``last_updated`` changes.
+
+    Used from calculation worker threads, hence the lock.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self._max_entries = max_entries
+        self._plans: OrderedDict[str, TariffPlan] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, tariff: PowerTariffSpec) -> TariffPlan:
+        if tariff.uid is None:
+            return TariffPlan(tariff)
+        with self._lock:
+            plan = self._plans.get(tariff.uid)
+            if plan is not None and plan.last_updated == tariff.last_updated:
+                self._plans.move_to_end(tariff.uid)
+                return plan
+        plan = TariffPlan(tariff)
+        with self._lock:
+            self._plans[tariff.uid] = plan
+            self._plans.move_to_end(tariff.uid)
+            while len(self._plans) > self._max_entries:
+                self._plans.popitem(last=False)
+        return plan
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+
+def slot_multipliers(composition: TariffCompositionSpec) -> np.ndarray:
+    """Multiplier per quarter hour of the local day, NaN outside every interval.
+
+    Intervals are [from, to) and wrap past midnight when ``to`` <= ``from``.
+    """
+    slot_minutes = np.arange(SLOTS_PER_DAY) * (SLOT_SECONDS // 60)
+    multipliers = np.full(SLOTS_PER_DAY, np.nan)
+    for interval in composition.intervals:
+        start = minutes(interval.from_time)
+        end = minutes(interval.to_time)
+        if end > start:
+            inside = (slot_minutes >= start) & (slot_minutes < end)
+        else:
+            inside = (slot_minutes >= start) | (slot_minutes < end)
+        multipliers[inside] = np.fmax(multipliers[inside], interval.multiplier)
+    return multipliers
+
+
+def _compile(composition: TariffCompositionSpec) -> np.ndarray:
+    months = np.isin(MONTHS, [m.lower() for m in composition.months])
+    days = np.isin(DAYS, [d.lower() for d in composition.days])
+    applies = months[:, None, None] & days[None, :, None]
+    return np.where(applies, slot_multipliers(composition)[None, None, :], np.nan)
+
+
+def minutes(time: str) -> int:
+    """Minutes since midnight of an ``HH:MM`` time."""
+    hour, minute = time.strip().split(":")
+    return int(hour) * 60 + int(minute)
+
+
+plans = TariffPlanCache()
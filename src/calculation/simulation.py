@@ -0,0 +1,169 @@
+import numpy as np
+
+from src.calculation import batch, calendar_grid, engine
+from src.exceptions import IllegalArgumentError
+from src.model import LoadPerturbationSpec, PowerTariffSpec
+
+# Scenarios priced per worker task. Fixed, so a seed gives the same scenarios
+# whatever the number of workers
+_SCENARIOS_PER_CHUNK = 128
+
+
+class SimulatedPowerFees:
+    """Monthly fees of simulated load scenarios, one row per scenario."""
+
+    __slots__ = ("months", "fee_exc_vat", "fee_inc_vat")
+
+    def __init__(
+        self,
+        months: list[tuple[int, int]],
+        fee_exc_vat: np.ndarray,
+        fee_inc_vat: np.ndarray,
+    ):
+        self.months = months
+        self.fee_exc_vat = fee_exc_vat
+        self.fee_inc_vat = fee_inc_vat
+
+    def __len__(self) -> int:
+        return len(self.fee_exc_vat)
+
+    def monthly_percentiles(
+        self, percentiles: list[float]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Fees exc and inc VAT as (percentiles x months) arrays."""
+        return (
+            np.percentile(self.fee_exc_vat, percentiles, axis=0),
+            np.percentile(self.fee_inc_vat, percentiles, axis=0),
+        )
+
+    def total_percentiles(
+        self, percentiles: list[float]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Percentiles of the fees summed over all months."""
+        return (
+            np.percentile(self.fee_exc_vat.sum(axis=1), percentiles),
+            np.percentile(self.fee_inc_vat.sum(axis=1), percentiles),
+        )
+
+
+def simulate_power_fees(
+    tariff: PowerTariffSpec,
+    timestamps: np.ndarray,
+    kw: np.ndarray,
+    perturbation: LoadPerturbationSpec,
+    scenarios: int,
+    seed: int,
+    fuse: str | None = None,
+) -> SimulatedPowerFees:
+    """Prices randomly perturbed copies of a base load series.
+
+    Scenarios are generated and priced in chunks across the calculation worker
+    processes; chunk ``i`` draws from a generator seeded with (seed, i), so the
+    result only depends on the seed. Blocks until every chunk is priced.
+    """
+    kw = np.asarray(kw, dtype=np.float64)
+    timestamps = np.asarray(timestamps, dtype="datetime64[s]")
+    if kw.ndim != 1 or timestamps.shape != kw.shape:
+        raise IllegalArgumentError("Timestamps and kW readings must match")
+    if kw.size == 0:
+        raise IllegalArgumentError("No readings provided")
+    if scenarios < 1:
+        raise IllegalArgumentError("At least one scenario is required")
+    # Fails fast on unpriceable tariffs instead of in every worker
+    engine.compile_for(tariff, fuse)
+    pool = batch.get_pool()
+    futures = [
+        pool.submit(
+            _simulate_chunk,
+            tariff,
+            timestamps,
+            kw,
+            perturbation,
+            seed,
+            chunk,
+            min(_SCENARIOS_PER_CHUNK, scenarios - start),
+            fuse,
+        )
+        for chunk, start in enumerate(range(0, scenarios, _SCENARIOS_PER_CHUNK))
+    ]
+    try:
+        chunks = [future.result() for future in futures]
+    finally:
+        for future in futures:
+            future.cancel()
+    return SimulatedPowerFees(
+        chunks[0].months,
+        np.concatenate([chunk.fee_exc_vat for chunk in chunks]),
+        np.concatenate([chunk.fee_inc_vat for chunk in chunks]),
+    )
+
+
+def perturb(
+    timestamps: np.ndarray,
+    kw: np.ndarray,
+    perturbation: LoadPerturbationSpec,
+    scenarios: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """Scenarios x readings loads drawn from a base series, see LoadPerturbationSpec."""
+    local = calendar_grid.local_seconds(timestamps.astype(np.int64))
+    days = local // 86400
+    hour = (local % 86400) / 3600
+
+    sigma = perturbation.scale_std
+    # Mean-preserving lognormal factor
+    scale = perturbation.scale * rng.lognormal(-(sigma**2) / 2, sigma, scenarios)
+    loads = kw[None, :] * scale[:, None]
+    if perturbation.heat_pump_kw:
+        day_of_year = (
+            days.astype("datetime64[D]")
+            - days.astype("datetime64[D]").astype("datetime64[Y]")
+        ).astype(np.int64)
+        # Peaks mid-January, off from spring to autumn
+        season = np.maximum(0.0, np.cos(2 * np.pi * (day_of_year - 15) / 365.25))
+        loads += perturbation.heat_pump_kw * season[None, :]
+    if perturbation.noise_std:
+        loads *= np.maximum(
+            0.0, 1 + rng.normal(0.0, perturbation.noise_std, loads.shape)
+        )
+    if perturbation.ev_kw:
+        day = days - days.min()
+        n_days = int(day.max()) + 1
+        charging_days = (
+            rng.random((scenarios, n_days)) < perturbation.ev_daily_probability
+        )
+        starts = rng.integers(
+            perturbation.ev_earliest_start_hour,
+            perturbation.ev_latest_start_hour + 1,
+            (scenarios, n_days),
+        )
+        charging = np.zeros(loads.shape, dtype=bool)
+        # Sessions may run past midnight into the next day
+        for days_ago in (0, 1):
+            session_day = np.maximum(day - days_ago, 0)
+            since_start = hour[None, :] + 24 * days_ago - starts[:, session_day]
+            charging |= (
+                charging_days[:, session_day]
+                & (day >= days_ago)[None, :]
+                & (since_start >= 0)
+                & (since_start < perturbation.ev_hours)
+            )
+        loads += perturbation.ev_kw * charging
+    return loads
+
+
+def _simulate_chunk(
+    tariff: PowerTariffSpec,
+    timestamps: np.ndarray,
+    kw: np.ndarray,
+    perturbation: LoadPerturbationSpec,
+    seed: int,
+    chunk: int,
+    scenarios: int,
+    fuse: str | None,
+) -> SimulatedPowerFees:
+    """Runs in a worker process: draws and prices one chunk of scenarios."""
+    rng = np.random.default_rng([seed, chunk])
+    loads = perturb(timestamps, kw, perturbation, scenarios, rng)
+    result = engine.calculate_power_fees(tariff, timestamps, loads, fuse)
+    return SimulatedPowerFees(result.months, result.fee_exc_vat, result.fee_inc_vat)
@@ -0,0 +1,281 @@
+import asyncio
+import importlib.util
+from collections.abc import AsyncIterator, Iterable, Iterator
+from pathlib import Path
+
+import numpy as np
+
+from src.calculation import engine
+from src.calculation.engine import PowerFeeResult
+from src.exceptions import IllegalArgumentError, IllegalStateError
+from src.model import PowerTariffSpec
+
+CSV_HEADER = ("MeterId", "Timestamp", "Kw")
+
+
+class ReadingChunk:
+    """Consecutive long-format readings: meter id, UTC timestamp and kW per row."""
+
+    __slots__ = ("meter_ids", "timestamps", "kw")
+
+    def __init__(self, meter_ids: np.ndarray, timestamps: np.ndarray, kw: np.ndarray):
+        self.meter_ids = meter_ids
+        self.timestamps = timestamps
+        self.kw = kw
+
+    def __len__(self) -> int:
+        return len(self.kw)
+
+    def __getitem__(self, rows: slice) -> "ReadingChunk":
+        return ReadingChunk(self.meter_ids[rows], self.timestamps[rows], self.kw[rows])
+
+    @staticmethod
+    def concat(first: "ReadingChunk", second: "ReadingChunk") -> "ReadingChunk":
+        return ReadingChunk(
+            np.concatenate([first.meter_ids, second.meter_ids]),
+            np.concatenate([first.timestamps, second.timestamps]),
+            np.concatenate([first.kw, second.kw]),
+        )
+
+
+class PowerFeeAccumulator:
+    """Prices meters from chunks of readings, keeping only the current meter's state.
+
+    Readings must be grouped by meter and ordered by time within a meter. The
+    state of a meter is the ``samples_per_month`` highest weighted loads per
+    (month, composition), so memory doesn't grow with the input. Readings are
+    resampled to the tariff's time unit per meter; the readings of the last
+    unit of a chunk are carried over to the next one, so no unit is split. A
+    meter is finished, and its result returned, when the next meter's
+    readings start.
+    """
+
+    def __init__(self, tariff: PowerTariffSpec, fuse: str | None = None):
+        self._plan, self._compositions = engine.compile_for(tariff, fuse)
+        self._samples = tariff.samples_per_month
+        self._unit = engine.TIME_UNITS[tariff.time_unit]
+        self._meter_id: str | None = None
+        self._carry: ReadingChunk | None = None
+        self._reset()
+
+    def add(self, chunk: ReadingChunk) -> list[tuple[str, PowerFeeResult]]:
+        """Feeds a chunk, returning the meters it finished."""
+        if self._carry is not None:
+            chunk, self._carry = ReadingChunk.concat(self._carry, chunk), None
+        if len(chunk) == 0:
+            return []
+        utc = np.asarray(chunk.timestamps, dtype="datetime64[s]").astype(np.int64)
+        meter_ids = chunk.meter_ids
+        run_starts = np.flatnonzero(meter_ids[1:] != meter_ids[:-1]) + 1
+        last_run = int(run_starts[-1]) if run_starts.size else 0
+        units = utc[last_run:] // self._unit
+        held = last_run + int(np.searchsorted(units, units[-1]))
+        self._carry = chunk[held:]
+        return self._add_runs(chunk[:held], utc[:held])
+
+    def finish(self) -> list[tuple[str, PowerFeeResult]]:
+        """Returns the last meter once the input is exhausted."""
+        finished = []
+        if self._carry is not None:
+            carry, self._carry = self._carry, None
+            finished = self._add_runs(
+                carry,
+                np.asarray(carry.timestamps, dtype="datetime64[s]").astype(np.int64),
+            )
+        if self._meter_id is None:
+            return finished
+        finished.append((self._meter_id, self._result()))
+        self._meter_id = None
+        self._reset()
+        return finished
+
+    def _add_runs(
+        self, chunk: ReadingChunk, utc: np.ndarray
+    ) -> list[tuple[str, PowerFeeResult]]:
+        if len(chunk) == 0:
+            return []
+        meter_ids = chunk.meter_ids
+        run_starts = np.flatnonzero(meter_ids[1:] != meter_ids[:-1]) + 1
+        bounds = [0, *run_starts.tolist(), len(chunk)]
+        finished = []
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            meter_id = str(meter_ids[lo])
+            if meter_id != self._meter_id:
+                if self._meter_id is not None:
+                    finished.append((self._meter_id, self._result()))
+                self._meter_id = meter_id
+                self._reset()
+            unit_utc, kw = engine.resample(
+                utc[lo:hi], chunk.kw[None, lo:hi], self._unit
+            )
+            month_index, weights = engine.reading_weights(
+                self._plan, self._compositions, unit_utc
+            )
+            self._update(month_index, kw * weights)
+        return finished
+
+    def _reset(self) -> None:
+        self._keys = np.empty(0, dtype=np.int64)
+        self._values = np.empty(0)
+        self._first_month: int | None = None
+        self._last_month: int | None = None
+
+    def _update(self, month_index: np.ndarray, weighted: np.ndarray) -> None:
+        n_compositions = len(self._compositions)
+        first, last = int(month_index.min()), int(month_index.max())
+        if self._first_month is None:
+            self._first_month, self._last_month = first, last
+        else:
+            self._first_month = min(self._first_month, first)
+            self._last_month = max(self._last_month, last)
+        valid = ~np.isnan(weighted)
+        composition_idx, reading_idx = np.nonzero(valid)
+        keys = np.concatenate(
+            [self._keys, month_index[reading_idx] * n_compositions + composition_idx]
+        )
+        values = np.concatenate([self._values, weighted[valid]])
+        order = np.lexsort((-values, keys))
+        sorted_keys = keys[order]
+        rank = np.arange(sorted_keys.size) - np.searchsorted(sorted_keys, sorted_keys)
+        top = order[rank < self._samples]
+        self._keys, self._values = keys[top], values[top]
+
+    def _result(self) -> PowerFeeResult:
+        n_compositions = len(self._compositions)
+        n_months = self._last_month - self._first_month + 1
+        month_pos = self._keys // n_compositions - self._first_month
+        flat = (self._keys % n_compositions) * n_months + month_pos
+        billed = engine.top_n_mean(
+            flat, self._values, self._samples, n_compositions * n_months
+        ).reshape(n_compositions, n_months)
+        return PowerFeeResult(
+            engine.month_labels(self._first_month, n_months),
+            billed,
+            self._plan.price_exc_vat[self._compositions] @ billed,
+            self._plan.price_inc_vat[self._compositions] @ billed,
+        )
+
+
+async def stream_power_fees(
+    tariff: PowerTariffSpec,
+    chunks: AsyncIterator[ReadingChunk],
+    fuse: str | None = None,
+) -> AsyncIterator[tuple[str, PowerFeeResult]]:
+    """Yields (meter id, result) as soon as each meter's readings end.
+
+    Chunks are priced in a worker thread to keep the event loop free.
+    """
+    accumulator = PowerFeeAccumulator(tariff, fuse)
+    async for chunk in chunks:
+        for finished in await asyncio.to_thread(accumulator.add, chunk):
+            yield finished
+    for finished in accumulator.finish():
+        yield finished
+
+
+class CsvChunker:
+    """Buffers ``MeterId;Timestamp;Kw`` lines into chunks of at most ``chunk_rows``.
+
+    Timestamps are ISO 8601 in UTC, with or without a trailing ``Z``; an empty
+    kW value is a missing reading.
+    """
+
+    def __init__(self, chunk_rows: int):
+        self._chunk_rows = chunk_rows
+        self._header_seen = False
+        self._line_no = 0
+        self._rows: list[list[str]] = []
+
+    def push(self, line: str) -> ReadingChunk | None:
+        self._line_no += 1
+        line = line.strip()
+        if not line:
+            return None
+        fields = [field.strip() for field in line.split(";")]
+        if not self._header_seen:
+            self._header_seen = True
+            if tuple(fields[:3]) == CSV_HEADER:
+                return None
+        if len(fields) < 3:
+            raise IllegalArgumentError(f"Line {self._line_no}: expected {CSV_HEADER}")
+        self._rows.append(fields)
+        if len(self._rows) >= self._chunk_rows:
+            return self.flush()
+        return None
+
+    def flush(self) -> ReadingChunk | None:
+        if not self._rows:
+            return None
+        rows, self._rows = self._rows, []
+        try:
+            return ReadingChunk(
+                np.array([row[0] for row in rows]),
+                np.array(
+                    [row[1].removesuffix("Z") for row in rows], dtype="datetime64[s]"
+                ),
+                np.array([float(row[2]) if row[2] else np.nan for row in rows]),
+            )
+        except ValueError as e:
+            raise IllegalArgumentError(
+                f"Lines up to {self._line_no}: invalid reading, {e}"
+            )
+
+
+def read_csv_chunks(lines: Iterable[str], chunk_rows: int) -> Iterator[ReadingChunk]:
+    chunker = CsvChunker(chunk_rows)
+    for line in lines:
+        if (chunk := chunker.push(line)) is not None:
+            yield chunk
+    if (chunk := chunker.flush()) is not None:
+        yield chunk
+
+
+def parquet_available() -> bool:
+    """Whether pyarrow, from the ``parquet`` extra, is installed."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def read_parquet_chunks(path: str | Path, chunk_rows: int) -> Iterator[ReadingChunk]:
+    """Chunks a Parquet file with ``meter_id``, ``timestamp`` and ``kw`` columns.
+
+    Needs pyarrow, available through the ``parquet`` extra.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise IllegalStateError("reading Parquet requires the 'parquet' extra")
+    file = pq.ParquetFile(path)
+    for batch in file.iter_batches(
+        batch_size=chunk_rows, columns=["meter_id", "timestamp", "kw"]
+    ):
+        meter_ids, timestamps, kw = batch.columns
+        yield ReadingChunk(
+            np.array(meter_ids.cast("string").to_pylist()),
+            timestamps.cast(pa.timestamp("s", tz="UTC"))
+            .to_numpy(zero_copy_only=False)
+            .astype("datetime64[s]"),
+            # Nulls become NaN, i.e. missing readings
+            kw.cast("double").to_numpy(zero_copy_only=False),
+        )
+
+
+def read_file_chunks(path: str | Path, chunk_rows: int) -> Iterator[ReadingChunk]:
+    """Chunks a ``.csv`` or ``.parquet`` meter-data file."""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        yield from read_parquet_chunks(path, chunk_rows)
+    elif path.suffix == ".csv":
+        with open(path, encoding="utf-8-sig") as lines:
+            yield from read_csv_chunks(lines, chunk_rows)
+    else:
+        raise IllegalArgumentError(f"Unsupported meter data file {path}")
+
+
+async def iter_file_chunks(
+    path: str | Path, chunk_rows: int
+) -> AsyncIterator[ReadingChunk]:
+    """Reads a meter-data file chunk by chunk in a worker thread."""
+    chunks = read_file_chunks(path, chunk_rows)
+    while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+        yield chunk
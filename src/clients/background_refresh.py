@@ -0,0 +1,68 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from engrate_sdk.utils import log
+from prometheus_client import Counter
+
+logger = log.get_logger(__name__)
+
+BACKGROUND_REFRESHES = Counter(
+    "background_refreshes_total",
+    "Background refreshes of stale entries by refresher and outcome",
+    ["refresher", "result"],
+)
+
+
+class BackgroundRefresher:
+    """Runs refreshes of stale entries in background tasks, at most one per key.
+
+    At most ``concurrency`` refreshes run at once. A refresh asked for while the
+    key is already refreshing, or while all slots are taken, is skipped: the
+    entry stays stale and the next read asks again.
+    """
+
+    def __init__(self, name: str, concurrency: int):
+        self.name = name
+        self.concurrency = concurrency
+        self._running: dict[Hashable, asyncio.Task] = {}
+
+    def schedule(
+        self,
+        key: Hashable,
+        refresh: Callable[[], Awaitable[Any]],
+        on_success: Callable[[Any], Any] | None = None,
+    ) -> bool:
+        """Starts refreshing the key unless it's already refreshing or no slot is free.
+
+        ``on_success`` gets the refreshed value; it may be a coroutine function.
+        Failures are logged and leave the stale entry in place.
+        """
+        if key in self._running:
+            return False
+        if len(self._running) >= self.concurrency:
+            BACKGROUND_REFRESHES.labels(refresher=self.name, result="skipped").inc()
+            return False
+        task = asyncio.ensure_future(self._run(key, refresh, on_success))
+        self._running[key] = task
+        task.add_done_callback(lambda _: self._running.pop(key, None))
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "running": len(self._running),
+            "concurrency": self.concurrency,
+        }
+
+    async def _run(self, key, refresh, on_success) -> None:
+        try:
+            value = await refresh()
+            if on_success is not None:
+                result = on_success(value)
+                if asyncio.iscoroutine(result):
+                    await result
+        except Exception as e:
+            logger.warning(f"Background refresh of {key} in {self.name} failed: {e}")
+            BACKGROUND_REFRESHES.labels(refresher=self.name, result="failed").inc()
+            return
+        BACKGROUND_REFRESHES.labels(refresher=self.name, result="refreshed").inc()
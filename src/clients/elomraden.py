@@ -1,9 +1,16 @@
+import time
 from enum import Enum
+from typing import Any, Awaitable, Callable, Hashable
 
+import httpx
 from engrate_sdk.utils import log
-from engrate_sdk.http.client import AsyncClient
 from src import env
+from .background_refresh import BackgroundRefresher
 from .elomraden_model import GridCompany, AdditionalDetails, GridArea
+from .lookup_cache import LookupCache
+from .rate_limit import Priority, TokenBucket
+from .resilience import CircuitBreaker, Deadline, LatencyTracker, hedge, within
+from .single_flight import SingleFlight
 from src.exceptions import (
     NotEnabledError,
     IllegalArgumentError,
@@ -16,6 +23,112 @@ __AUTH_SUFFIX = f"user/{env.get_elomraden_user()}/key/{env.get_elomraden_apikey(
 
 logger = log.get_logger(__name__)
 
+refresher = BackgroundRefresher(
+    "elomraden_areas", concurrency=env.get_elomraden_refresh_concurrency()
+)
+area_cache = LookupCache(
+    "elomraden_areas",
+    max_entries=env.get_elomraden_cache_max_entries(),
+    ttl=env.get_elomraden_cache_ttl(),
+    negative_ttl=env.get_elomraden_cache_negative_ttl(),
+    soft_ttl=env.get_elomraden_cache_soft_ttl(),
+    refresher=refresher,
+)
+in_flight = SingleFlight("elomraden_areas")
+breaker = CircuitBreaker(
+    "elomraden",
+    failure_threshold=env.get_elomraden_breaker_failure_threshold(),
+    reset_timeout=env.get_elomraden_breaker_reset(),
+)
+_latency = LatencyTracker()
+_rate_limit_conf = env.get_elomraden_rate_limit_conf()
+rate_limiter = TokenBucket(
+    "elomraden",
+    rate=_rate_limit_conf.rate,
+    burst=_rate_limit_conf.burst,
+    max_wait=_rate_limit_conf.max_wait,
+    max_queue=_rate_limit_conf.max_queue,
+)
+_HEDGE_PERCENTILE = env.get_elomraden_hedge_percentile()
+
+
+_client: httpx.AsyncClient | None = None
+
+
+async def start() -> None:
+    """Opens the shared, connection-pooled HTTP client. Called from the app lifespan."""
+    global _client
+    if _client is None:
+        conf = env.get_elomraden_pool_conf()
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=conf.max_connections,
+                max_keepalive_connections=conf.max_keepalive_connections,
+                keepalive_expiry=conf.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(conf.timeout, connect=conf.connect_timeout),
+        )
+
+
+async def stop() -> None:
+    """Closes the shared HTTP client and its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def _get_json(url: str, priority: Priority = Priority.INTERACTIVE) -> dict:
+    """GETs a lookup URL through the circuit breaker, hedging slow requests if enabled."""
+    breaker.before_call()
+    delay = _latency.percentile(_HEDGE_PERCENTILE) if _HEDGE_PERCENTILE else None
+    try:
+        data = await hedge("elomraden", lambda: _send(url, priority), delay)
+    except (httpx.HTTPStatusError, httpx.TransportError):
+        breaker.record_failure()
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+    breaker.record_success()
+    return data
+
+
+async def _send(url: str, priority: Priority) -> dict:
+    if _client is None:
+        # Outside the app lifespan (scripts, shells) open the pool lazily
+        await start()
+    # Every request counts against the quota, hedged ones included
+    await rate_limiter.acquire(priority)
+    started = time.monotonic()
+    resp = await _client.get(url)
+    resp.raise_for_status()
+    _latency.record(time.monotonic() - started)
+    return resp.json()
+
+
+async def _lookup(
+    key: Hashable,
+    fetch: Callable[[Priority], Awaitable[Any]],
+    deadline: Deadline | None,
+    priority: Priority,
+):
+    """Serves a lookup from the cache, or from one coalesced upstream call.
+
+    Stale cache entries are served as is and refreshed in the background at
+    background priority. The deadline only bounds how long this caller waits:
+    the shared upstream call keeps running for the other callers and still fills
+    the cache.
+    """
+    found, area = area_cache.lookup(key, refresh=lambda: fetch(Priority.BACKGROUND))
+    if found:
+        return area
+    return await within(
+        deadline,
+        "elomraden",
+        in_flight.do(key, lambda: area_cache.load(key, lambda: fetch(priority))),
+    )
+
 
 ## Types ##
 class ResponseFormat(Enum):
@@ -23,152 +136,210 @@ class ResponseFormat(Enum):
     XML = "xml"
 
 
-async def get_area_by_address(address: str, ort: str) -> GridArea:
+async def get_area_by_address(
+    address: str,
+    ort: str,
+    deadline: Deadline | None = None,
+    priority: Priority = Priority.INTERACTIVE,
+) -> GridArea:
     """Gets an electricity area by address."""
-    async with AsyncClient() as client:
-        resp = await client.get(__address_lookup_path(address, ort))
-        resp.raise_for_status()
-        data = resp.json()
-        print(data)
-        # Check biz errors
-        area_data = data.get("elomradeAdress", {})
-        if area_data.get("success") != 1:
-            error = area_data.get("error", {})
-            __handle_error_response(error, "latitude:{lat}, longitude:{lon}")
-
-        elnat = area_data.get("elnat", {})
-        geo = area_data.get("geografi", {})
-        # Map the fields from the API response to our model
-        grid_area = GridArea(
-            area_name=elnat.get("natomradeNamn", ""),
-            area_code=elnat.get("natomradeBeteckning", 0),
-            zone=elnat.get("elomrade", 0),
-            company=GridCompany(
-                name=elnat.get("natagare", ""),
-                ediel=elnat.get("EdielID", ""),
-                email=elnat.get("epost", ""),
-                phone=elnat.get("telefon", ""),
-            ),
-            additional_details=AdditionalDetails(
-                municipality=geo.get("kommun", ""),
-                energy_tax=geo.get("elskatt", False),
-                energy_tax_name=geo.get("elskattNamn", ""),
-                locality=geo.get("ort", ""),
-            ),
-        )
+    key = ("address", __normalize_text(address), __normalize_text(ort))
+    return await _lookup(
+        key, lambda p: _fetch_area_by_address(address, ort, p), deadline, priority
+    )
 
-        return grid_area
 
-
-async def get_area_by_postnumber(postnumber: int) -> GridArea:
+async def get_area_by_postnumber(
+    postnumber: int,
+    deadline: Deadline | None = None,
+    priority: Priority = Priority.INTERACTIVE,
+) -> GridArea:
     """Gets an electricity area by postnumber."""
+    return await _lookup(
+        __postnumber_key(postnumber),
+        lambda p: _fetch_area_by_postnumber(postnumber, p),
+        deadline,
+        priority,
+    )
 
-    async with AsyncClient() as client:
-        resp = await client.get(__postcode_lookup_path(postnumber))
-        resp.raise_for_status()
-        data = resp.json()
-        # Check biz errors
-        pnr_data = data.get("natomradePostnummer", {})
-        if pnr_data.get("success") != 1:
-            error = pnr_data.get("error", {})
-            __handle_error_response(error, postnumber)
-        items = pnr_data.get("item", [])  # TODO treat this as an array
-        if not items:
-            ##Not sure if this is possible though
-            logger.warning(
-                f"No grid area information found in the response for postnumber {postnumber}"
-            )
-            return None
-        item = items[0]
-        elnat = item.get("elnat", {})
-        geo = item.get("geografi", {})
-        # Map the fields from the API response to our model
-        grid_area = GridArea(
-            area_name=elnat.get("natomradeNamn", ""),
-            area_code=elnat.get("natomradeBeteckning", 0),
-            zone=elnat.get("elomrade", 0),
-            company=GridCompany(
-                name=elnat.get("natagare", ""),
-                ediel=elnat.get("EdielID", ""),
-                email=elnat.get("epost", ""),
-                phone=elnat.get("telefon", ""),
-            ),
-            additional_details=AdditionalDetails(
-                municipality=geo.get("kommun", ""),
-                energy_tax=geo.get("elskatt", False),
-                energy_tax_name=geo.get("elskattNamn", ""),
-                locality=geo.get("ort", ""),
-            ),
-        )
 
-        return grid_area
+def cached_area_by_postnumber(postnumber: int) -> tuple[bool, GridArea | None]:
+    """Looks a postnumber up in the area cache only: (True, area) on a hit and
+    (False, None) on a miss. Raises MissingError for a cached unknown postnumber.
+    """
+    return area_cache.lookup(
+        __postnumber_key(postnumber),
+        refresh=lambda: _fetch_area_by_postnumber(postnumber, Priority.BACKGROUND),
+    )
+
+
+def cache_area_by_postnumber(postnumber: int, area: GridArea) -> None:
+    """Caches an area resolved elsewhere, e.g. read from Postgres."""
+    area_cache.put(__postnumber_key(postnumber), area)
+
 
+async def refresh_area_by_postnumber(
+    postnumber: int, priority: Priority = Priority.BACKGROUND
+) -> GridArea:
+    """Fetches a postnumber's area from the API even if cached, updating the cache."""
+    key = __postnumber_key(postnumber)
+    return await in_flight.do(
+        key,
+        lambda: area_cache.load(
+            key, lambda: _fetch_area_by_postnumber(postnumber, priority)
+        ),
+    )
 
-async def get_area_by_coordinates(lat: str, lon: str) -> GridArea:
+
+async def get_area_by_coordinates(
+    lat: str,
+    lon: str,
+    deadline: Deadline | None = None,
+    priority: Priority = Priority.INTERACTIVE,
+) -> GridArea:
     """Gets an electricity area by coordinates."""
-    async with AsyncClient() as client:
-        resp = await client.get(__coordinates_lookup_path(lat, lon))
-        resp.raise_for_status()
-        data = resp.json()
-        # Check biz errors
-        area_data = data.get(
-            "elomradeAdress", {}
-        )  ## Unfortunately the json atts have different names for the same value depending on the endpoint
-        if area_data.get("success") != 1:
-            error = area_data.get("error", {})
-            __handle_error_response(error, "latitude:{lat}, longitude:{lon}")
-
-        elnat = area_data.get("elnat", {})
-        geo = area_data.get("geografi", {})
-        # Map the fields from the API response to our model
-        grid_area = GridArea(
-            area_name=elnat.get("natomradeNamn", ""),
-            area_code=elnat.get("natomradeBeteckning", 0),
-            zone=elnat.get("elomrade", 0),
-            company=GridCompany(
-                name=elnat.get("natagare", ""),
-                ediel=elnat.get("EdielID", ""),
-                email=elnat.get("epost", ""),
-                phone=elnat.get("telefon", ""),
-            ),
-            additional_details=AdditionalDetails(
-                municipality=geo.get("kommun", ""),
-                energy_tax=geo.get("elskatt", False),
-                energy_tax_name=geo.get("elskattNamn", ""),
-                locality=geo.get("ort", ""),
-            ),
+    # ~1m precision, enough to tell grid areas apart
+    key = ("coordinates", round(float(lat), 5), round(float(lon), 5))
+    return await _lookup(
+        key, lambda p: _fetch_area_by_coordinates(lat, lon, p), deadline, priority
+    )
+
+
+async def _fetch_area_by_address(
+    address: str, ort: str, priority: Priority
+) -> GridArea:
+    data = await _get_json(__address_lookup_path(address, ort), priority)
+    # Check biz errors
+    area_data = data.get("elomradeAdress", {})
+    if area_data.get("success") != 1:
+        error = area_data.get("error", {})
+        __handle_error_response(error, "latitude:{lat}, longitude:{lon}")
+
+    elnat = area_data.get("elnat", {})
+    geo = area_data.get("geografi", {})
+    # Map the fields from the API response to our model
+    grid_area = GridArea(
+        area_name=elnat.get("natomradeNamn", ""),
+        area_code=elnat.get("natomradeBeteckning", 0),
+        zone=elnat.get("elomrade", 0),
+        company=GridCompany(
+            name=elnat.get("natagare", ""),
+            ediel=elnat.get("EdielID", ""),
+            email=elnat.get("epost", ""),
+            phone=elnat.get("telefon", ""),
+        ),
+        additional_details=AdditionalDetails(
+            municipality=geo.get("kommun", ""),
+            energy_tax=geo.get("elskatt", False),
+            energy_tax_name=geo.get("elskattNamn", ""),
+            locality=geo.get("ort", ""),
+        ),
+    )
+
+    return grid_area
+
+
+async def _fetch_area_by_postnumber(postnumber: int, priority: Priority) -> GridArea:
+    data = await _get_json(__postcode_lookup_path(postnumber), priority)
+    # Check biz errors
+    pnr_data = data.get("natomradePostnummer", {})
+    if pnr_data.get("success") != 1:
+        error = pnr_data.get("error", {})
+        __handle_error_response(error, postnumber)
+    items = pnr_data.get("item", [])  # TODO treat this as an array
+    if not items:
+        ##Not sure if this is possible though
+        logger.warning(
+            f"No grid area information found in the response for postnumber {postnumber}"
         )
+        return None
+    item = items[0]
+    elnat = item.get("elnat", {})
+    geo = item.get("geografi", {})
+    # Map the fields from the API response to our model
+    grid_area = GridArea(
+        area_name=elnat.get("natomradeNamn", ""),
+        area_code=elnat.get("natomradeBeteckning", 0),
+        zone=elnat.get("elomrade", 0),
+        company=GridCompany(
+            name=elnat.get("natagare", ""),
+            ediel=elnat.get("EdielID", ""),
+            email=elnat.get("epost", ""),
+            phone=elnat.get("telefon", ""),
+        ),
+        additional_details=AdditionalDetails(
+            municipality=geo.get("kommun", ""),
+            energy_tax=geo.get("elskatt", False),
+            energy_tax_name=geo.get("elskattNamn", ""),
+            locality=geo.get("ort", ""),
+        ),
+    )
 
-        return grid_area
+    return grid_area
 
 
-async def get_area_information(area: str) -> GridCompany:
+async def _fetch_area_by_coordinates(
+    lat: str, lon: str, priority: Priority
+) -> GridArea:
+    data = await _get_json(__coordinates_lookup_path(lat, lon), priority)
+    # Check biz errors
+    area_data = data.get(
+        "elomradeAdress", {}
+    )  ## Unfortunately the json atts have different names for the same value depending on the endpoint
+    if area_data.get("success") != 1:
+        error = area_data.get("error", {})
+        __handle_error_response(error, "latitude:{lat}, longitude:{lon}")
+
+    elnat = area_data.get("elnat", {})
+    geo = area_data.get("geografi", {})
+    # Map the fields from the API response to our model
+    grid_area = GridArea(
+        area_name=elnat.get("natomradeNamn", ""),
+        area_code=elnat.get("natomradeBeteckning", 0),
+        zone=elnat.get("elomrade", 0),
+        company=GridCompany(
+            name=elnat.get("natagare", ""),
+            ediel=elnat.get("EdielID", ""),
+            email=elnat.get("epost", ""),
+            phone=elnat.get("telefon", ""),
+        ),
+        additional_details=AdditionalDetails(
+            municipality=geo.get("kommun", ""),
+            energy_tax=geo.get("elskatt", False),
+            energy_tax_name=geo.get("elskattNamn", ""),
+            locality=geo.get("ort", ""),
+        ),
+    )
+
+    return grid_area
+
+
+async def get_area_information(
+    area: str, priority: Priority = Priority.INTERACTIVE
+) -> GridCompany:
     """Gets information about an electricity area."""
-    async with AsyncClient() as client:
-        resp = await client.get(__area_lookup_path(area))
-        resp.raise_for_status()
-        data = resp.json()
-        # Check biz errors
-        if data.get("success") != 1:
-            error = data.get("error", {})
-            __handle_error_response(error, area)
-
-        _input = data.get("input", {})
-        omrade = data.get("omrade", {})
-
-        # Map the fields from the API response to our model
-        grid_area = GridArea(
-            area_name=omrade.get("namn", ""),
-            area_code=_input.get("omrade", ""),
-            zone=int(omrade.get("snitt", 0)),
-            company=GridCompany(
-                name=omrade.get("bolag", ""),
-                ediel=omrade.get("bolagkod", 0),
-                email=omrade.get("epost", ""),
-                phone=omrade.get("telefon", ""),
-            ),
-        )
-        return grid_area
+    data = await _get_json(__area_lookup_path(area), priority)
+    # Check biz errors
+    if data.get("success") != 1:
+        error = data.get("error", {})
+        __handle_error_response(error, area)
+
+    _input = data.get("input", {})
+    omrade = data.get("omrade", {})
+
+    # Map the fields from the API response to our model
+    grid_area = GridArea(
+        area_name=omrade.get("namn", ""),
+        area_code=_input.get("omrade", ""),
+        zone=int(omrade.get("snitt", 0)),
+        company=GridCompany(
+            name=omrade.get("bolag", ""),
+            ediel=omrade.get("bolagkod", 0),
+            email=omrade.get("epost", ""),
+            phone=omrade.get("telefon", ""),
+        ),
+    )
+    return grid_area
 
 
 def __postcode_lookup_path(
@@ -193,6 +364,14 @@ def __area_lookup_path(area: str, output: ResponseFormat = ResponseFormat.JSON)
     return f"{__BASE_LOOKUP_URL}/natomrade/omrade/{area}/output/{output.value}/{__AUTH_SUFFIX}"
 
 
+def __postnumber_key(postnumber: int) -> tuple[str, int]:
+    return ("postnumber", int(postnumber))
+
+
+def __normalize_text(value: str) -> str:
+    return " ".join(value.split()).lower()
+
+
 def __handle_error_response(error, arg):
     """Handles error responses from the API."""
     err_code = error.get("errorCode", 0)
@@ -0,0 +1,152 @@
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+from prometheus_client import Counter
+
+from src.exceptions import MissingError
+
+from .background_refresh import BackgroundRefresher
+
+LOOKUP_CACHE_REQUESTS = Counter(
+    "lookup_cache_requests_total",
+    "Lookup cache requests by cache and outcome",
+    ["cache", "result"],
+)
+
+
+class _Entry:
+    __slots__ = ("value", "missing", "expires_at", "stale_at")
+
+    def __init__(
+        self,
+        value: Any,
+        missing: MissingError | None,
+        expires_at: float,
+        stale_at: float | None = None,
+    ):
+        self.value = value
+        self.missing = missing
+        self.expires_at = expires_at
+        self.stale_at = expires_at if stale_at is None else stale_at
+
+
+class LookupCache:
+    """Bounded async TTL + LRU cache in front of an upstream lookup.
+
+    Results are kept for ``ttl`` seconds. ``MissingError`` results are cached as
+    well, for ``negative_ttl`` seconds, so repeated bad input does not reach the
+    upstream API. Any other error is never cached.
+
+    With a ``soft_ttl`` shorter than ``ttl``, results older than ``soft_ttl``
+    are still served but refreshed in the background by ``refresher`` when the
+    caller passes a ``refresh`` function, so callers don't wait on the upstream
+    when entries age out. A failed refresh leaves the stale result in place.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        ttl: float,
+        negative_ttl: float,
+        soft_ttl: float | None = None,
+        refresher: BackgroundRefresher | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.soft_ttl = ttl if soft_ttl is None else min(soft_ttl, ttl)
+        self.refresher = refresher
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+
+    async def get_or_load(self, key: Hashable, load: Callable[[], Awaitable[Any]]):
+        """Returns the cached result for the key, calling ``load`` on a miss."""
+        found, value = self.lookup(key)
+        if found:
+            return value
+        return await self.load(key, load)
+
+    def lookup(
+        self, key: Hashable, refresh: Callable[[], Awaitable[Any]] | None = None
+    ) -> tuple[bool, Any]:
+        """Returns (True, value) on a hit and (False, None) on a miss.
+
+        A stale hit schedules ``refresh`` in the background, if given.
+        Raises MissingError for a cached "not found" result.
+        """
+        entry = self._entries.get(key)
+        now = self._clock()
+        if entry is None or entry.expires_at <= now:
+            self._record("miss")
+            return False, None
+        self._entries.move_to_end(key)
+        if entry.missing is not None:
+            self._record("hit")
+            # Raise a fresh exception so tracebacks don't pile up on the cached one
+            raise MissingError(entry.missing.kind, entry.missing.id)
+        if entry.stale_at <= now:
+            self._record("stale")
+            if refresh is not None and self.refresher is not None:
+                self.refresher.schedule(
+                    key, refresh, lambda value: self._store_value(key, value)
+                )
+        else:
+            self._record("hit")
+        return True, entry.value
+
+    async def load(self, key: Hashable, load: Callable[[], Awaitable[Any]]):
+        """Calls ``load`` and caches its result, or its MissingError."""
+        try:
+            value = await load()
+        except MissingError as e:
+            self._store(key, _Entry(None, e, self._clock() + self.negative_ttl))
+            raise
+        self._store_value(key, value)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Caches a result obtained elsewhere, e.g. from a persistent store."""
+        self._store_value(key, value)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+    def _store_value(self, key: Hashable, value: Any) -> None:
+        now = self._clock()
+        self._store(key, _Entry(value, None, now + self.ttl, now + self.soft_ttl))
+
+    def _store(self, key: Hashable, entry: _Entry) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _record(self, result: str) -> None:
+        if result == "miss":
+            self.misses += 1
+        else:
+            self.hits += 1
+            if result == "stale":
+                self.stale_hits += 1
+        LOOKUP_CACHE_REQUESTS.labels(cache=self.name, result=result).inc()
@@ -0,0 +1,149 @@
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+from typing import Callable
+
+from prometheus_client import Counter, Gauge
+
+from src.exceptions import RateLimitedError
+
+RATE_LIMIT_REQUESTS = Counter(
+    "rate_limit_requests_total",
+    "Rate limited requests by limiter, priority and outcome",
+    ["limiter", "priority", "result"],
+)
+RATE_LIMIT_QUEUED = Gauge(
+    "rate_limit_queued",
+    "Requests waiting for a rate limit token",
+    ["limiter"],
+)
+
+
+class Priority(IntEnum):
+    """Order in which queued requests get tokens, lowest value first."""
+
+    INTERACTIVE = 0
+    BATCH = 1
+    BACKGROUND = 2
+
+
+class TokenBucket:
+    """Async token bucket that queues callers instead of failing right away.
+
+    Tokens refill at ``rate`` per second up to ``burst``. When none are left,
+    callers queue by priority (FIFO within a priority) and are served as tokens
+    come in. A full queue makes room for a caller by evicting the newest
+    lower-priority one. A caller is rejected with RateLimitedError when the
+    queue is full otherwise, when the tokens owed to the callers ahead of it
+    can't be refilled within ``max_wait``, or when it has waited ``max_wait``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: int,
+        max_wait: float,
+        max_queue: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated_at = clock()
+        self._seq = itertools.count()
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._dispatcher: asyncio.Task | None = None
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE) -> None:
+        """Waits for a token, raising RateLimitedError if it can't get one in time."""
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            self._record(priority, "immediate")
+            return
+
+        if len(self._waiters) >= self.max_queue and not self._evict_below(priority):
+            self._record(priority, "rejected")
+            raise RateLimitedError(
+                self.name, "queue full", self._wait_estimate(priority)
+            )
+        wait = self._wait_estimate(priority)
+        if wait > self.max_wait:
+            self._record(priority, "rejected")
+            raise RateLimitedError(self.name, "over wait budget", wait)
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), waiter))
+        RATE_LIMIT_QUEUED.labels(limiter=self.name).set(len(self._waiters))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+        try:
+            async with asyncio.timeout(self.max_wait):
+                await waiter
+        except TimeoutError:
+            self._record(priority, "timeout")
+            raise RateLimitedError(self.name, "waited too long", 1 / self.rate)
+        self._record(priority, "queued")
+
+    def stats(self) -> dict:
+        self._refill()
+        return {
+            "name": self.name,
+            "tokens": round(self._tokens, 2),
+            "queued": len(self._waiters),
+            "rate": self.rate,
+            "burst": self.burst,
+        }
+
+    async def _dispatch(self) -> None:
+        """Hands out tokens to the queued callers as they refill."""
+        while self._waiters:
+            self._refill()
+            while self._waiters and self._tokens >= 1:
+                _, _, waiter = heapq.heappop(self._waiters)
+                if waiter.done():
+                    # Caller timed out or went away, keep the token
+                    continue
+                self._tokens -= 1
+                waiter.set_result(None)
+            RATE_LIMIT_QUEUED.labels(limiter=self.name).set(len(self._waiters))
+            if self._waiters:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def _evict_below(self, priority: Priority) -> bool:
+        """Rejects the newest queued caller with a lower priority to make room."""
+        queued = [entry for entry in self._waiters if not entry[2].done()]
+        if queued:
+            lowest = max(queued, key=lambda entry: (entry[0], entry[1]))
+            if lowest[0] > priority:
+                self._record(Priority(lowest[0]), "evicted")
+                lowest[2].set_exception(
+                    RateLimitedError(self.name, "evicted by higher priority")
+                )
+        self._waiters = [entry for entry in self._waiters if not entry[2].done()]
+        heapq.heapify(self._waiters)
+        return len(self._waiters) < self.max_queue
+
+    def _wait_estimate(self, priority: Priority) -> float:
+        """Seconds until a new caller with the given priority would get a token."""
+        ahead = sum(1 for p, _, w in self._waiters if p <= priority and not w.done())
+        return max(0.0, ahead + 1 - self._tokens) / self.rate
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(
+            float(self.burst), self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    def _record(self, priority: Priority, result: str) -> None:
+        RATE_LIMIT_REQUESTS.labels(
+            limiter=self.name, priority=priority.name.lower(), result=result
+        ).inc()
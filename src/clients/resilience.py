@@ -0,0 +1,178 @@
+import asyncio
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Awaitable, Callable
+
+from engrate_sdk.utils import log
+from prometheus_client import Counter, Gauge
+
+from src.exceptions import DeadlineExceededError, UpstreamUnavailableError
+
+logger = log.get_logger(__name__)
+
+CIRCUIT_BREAKER_STATE = Gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state (0 closed, 1 half-open, 2 open)",
+    ["name"],
+)
+HEDGED_REQUESTS = Counter(
+    "hedged_requests_total",
+    "Hedged second requests by upstream and winner",
+    ["name", "winner"],
+)
+
+
+class Deadline:
+    """Absolute point in time by which a request must be answered."""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+
+async def within(deadline: Deadline | None, service: str, awaitable: Awaitable):
+    """Awaits within the deadline's remaining budget, raising DeadlineExceededError."""
+    if deadline is None:
+        return await awaitable
+    try:
+        async with asyncio.timeout(deadline.remaining()):
+            return await awaitable
+    except TimeoutError:
+        raise DeadlineExceededError(service)
+
+
+class CircuitState(Enum):
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+
+class CircuitBreaker:
+    """Fails fast after ``failure_threshold`` consecutive upstream failures.
+
+    Once open, calls are rejected for ``reset_timeout`` seconds; then a single
+    probe is let through (half-open) and its outcome closes or re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._clock = clock
+        self._opened_at = 0.0
+        self._probing = False
+        self._set_state(CircuitState.CLOSED)
+
+    def before_call(self) -> None:
+        """Raises UpstreamUnavailableError if the call must not reach the upstream."""
+        if self.state is CircuitState.OPEN:
+            retry_after = self._opened_at + self.reset_timeout - self._clock()
+            if retry_after > 0:
+                raise UpstreamUnavailableError(self.name, "circuit open", retry_after)
+            self._set_state(CircuitState.HALF_OPEN)
+        if self.state is CircuitState.HALF_OPEN:
+            if self._probing:
+                raise UpstreamUnavailableError(
+                    self.name, "circuit half-open", self.reset_timeout
+                )
+            self._probing = True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._probing = False
+        if self.state is not CircuitState.CLOSED:
+            logger.info(f"Circuit {self.name} closed")
+            self._set_state(CircuitState.CLOSED)
+
+    def release(self) -> None:
+        """Ends a call that neither proved nor disproved the upstream's health."""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if (
+            self.state is CircuitState.HALF_OPEN
+            or self.failures >= self.failure_threshold
+        ):
+            if self.state is not CircuitState.OPEN:
+                logger.warning(
+                    f"Circuit {self.name} opened after {self.failures} failures"
+                )
+            self._opened_at = self._clock()
+            self._set_state(CircuitState.OPEN)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "state": self.state.name.lower(),
+            "consecutive_failures": self.failures,
+        }
+
+    def _set_state(self, state: CircuitState) -> None:
+        self.state = state
+        CIRCUIT_BREAKER_STATE.labels(name=self.name).set(state.value)
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies, in seconds."""
+
+    def __init__(self, window: int = 256):
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, percentile: float, min_samples: int = 50) -> float | None:
+        """Returns the latency percentile, or None until enough samples are in."""
+        if len(self._samples) < min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))]
+
+
+async def hedge(
+    name: str, send: Callable[[], Awaitable[Any]], delay: float | None
+) -> Any:
+    """Runs ``send``, starting a second attempt if the first takes longer than ``delay``.
+
+    The first successful attempt wins and the other one is cancelled.
+    """
+    if delay is None:
+        return await send()
+    attempts = [asyncio.ensure_future(send())]
+    try:
+        done, _ = await asyncio.wait(attempts, timeout=delay)
+        if done:
+            return attempts[0].result()
+        attempts.append(asyncio.ensure_future(send()))
+        pending = set(attempts)
+        while True:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            succeeded = [attempt for attempt in done if attempt.exception() is None]
+            if succeeded or not pending:
+                attempt = (succeeded or list(done))[0]
+                winner = "hedge" if attempt is attempts[1] else "primary"
+                HEDGED_REQUESTS.labels(name=name, winner=winner).inc()
+                return attempt.result()
+    finally:
+        for attempt in attempts:
+            attempt.cancel()
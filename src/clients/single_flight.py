@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from prometheus_client import Counter
+
+SINGLE_FLIGHT_CALLS = Counter(
+    "single_flight_calls_total",
+    "Coalesced calls by group and role (leader calls upstream, follower shares it)",
+    ["group", "role"],
+)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one in-flight call.
+
+    The first caller for a key starts the call; callers arriving while it runs
+    await the same result, errors included. The call runs in its own task, so a
+    cancelled caller doesn't cancel it for the others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.executions = 0
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]):
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executions += 1
+            SINGLE_FLIGHT_CALLS.labels(group=self.name, role="leader").inc()
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            SINGLE_FLIGHT_CALLS.labels(group=self.name, role="follower").inc()
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "in_flight": len(self._in_flight),
+            "calls": self.calls,
+            "upstream_calls": self.executions,
+            "coalesce_ratio": 1 - self.executions / self.calls if self.calls else 0.0,
+        }
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark the error as retrieved in case every caller went away
+            task.exception()
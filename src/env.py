@@ -1,4 +1,5 @@
 import json
+import os
 from typing import cast
 
 from engrate_sdk.http import server as http_server
@@ -30,6 +31,21 @@ class PostgresConnectionConf(BaseModel):
     tls_ca_pem_path: str | None = None
 
 
+class HttpPoolConf(BaseModel):
+    max_connections: int
+    max_keepalive_connections: int
+    keepalive_expiry: float
+    timeout: float
+    connect_timeout: float
+
+
+class RateLimitConf(BaseModel):
+    rate: float
+    burst: int
+    max_wait: float
+    max_queue: int
+
+
 #### Env Vars ####
 
 ## Alerting ##
@@ -124,6 +140,22 @@ ADMIN_MODE = env.EnvVarSpec(
     default="false",
     type=(bool, ...),
 )
+## Read path ##
+
+TARIFF_SNAPSHOT_ENABLED = env.EnvVarSpec(
+    id="TARIFF_SNAPSHOT_ENABLED",
+    parse=lambda x: x.lower() == "true",
+    default="false",
+    type=(bool, ...),
+)
+
+RENDERED_CACHE_MAX_ENTRIES = env.EnvVarSpec(
+    id="RENDERED_CACHE_MAX_ENTRIES",
+    parse=int,
+    default="2048",
+    type=(int, ...),
+)
+
 ## Postgres ##
 
 POSTGRES_DATABASE = env.EnvVarSpec(id="POSTGRES_DATABASE")
@@ -166,6 +198,201 @@ ELOMRADEN_APIKEY = env.EnvVarSpec(
 
 ELOMRADEN_USER = env.EnvVarSpec(id="ELOMRADEN_USER", type=(str, ...), is_secret=True)
 
+ELOMRADEN_MAX_CONNECTIONS = env.EnvVarSpec(
+    id="ELOMRADEN_MAX_CONNECTIONS",
+    parse=int,
+    default="50",
+    type=(int, ...),
+)
+
+ELOMRADEN_MAX_KEEPALIVE_CONNECTIONS = env.EnvVarSpec(
+    id="ELOMRADEN_MAX_KEEPALIVE_CONNECTIONS",
+    parse=int,
+    default="20",
+    type=(int, ...),
+)
+
+ELOMRADEN_KEEPALIVE_EXPIRY_SECONDS = env.EnvVarSpec(
+    id="ELOMRADEN_KEEPALIVE_EXPIRY_SECONDS",
+    parse=float,
+    default="60",
+    type=(float, ...),
+)
+
+ELOMRADEN_TIMEOUT_SECONDS = env.EnvVarSpec(
+    id="ELOMRADEN_TIMEOUT_SECONDS",
+    parse=float,
+    default="10",
+    type=(float, ...),
+)
+
+ELOMRADEN_CONNECT_TIMEOUT_SECONDS = env.EnvVarSpec(
+    id="ELOMRADEN_CONNECT_TIMEOUT_SECONDS",
+    parse=float,
+    default="3",
+    type=(float, ...),
+)
+
+ELOMRADEN_DEADLINE_SECONDS = env.EnvVarSpec(
+    id="ELOMRADEN_DEADLINE_SECONDS",
+    parse=float,
+    default="5",
+    type=(float, ...),
+)
+
+ELOMRADEN_BREAKER_FAILURE_THRESHOLD = env.EnvVarSpec(
+    id="ELOMRADEN_BREAKER_FAILURE_THRESHOLD",
+    parse=int,
+    default="5",
+    type=(int, ...),
+)
+
+ELOMRADEN_BREAKER_RESET_SECONDS = env.EnvVarSpec(
+    id="ELOMRADEN_BREAKER_RESET_SECONDS",
+    parse=float,
+    default="30",
+    type=(float, ...),
+)
+
+ELOMRADEN_HEDGE_PERCENTILE = env.EnvVarSpec(
+    id="ELOMRADEN_HEDGE_PERCENTILE",
+    parse=lambda x: float(x) if x else None,
+    default="",
+    type=(float | None, ...),
+)
+
+ELOMRADEN_RATE_LIMIT_PER_SECOND = env.EnvVarSpec(
+    id="ELOMRADEN_RATE_LIMIT_PER_SECOND",
+    parse=float,
+    default="10",
+    type=(float, ...),
+)
+
+ELOMRADEN_RATE_LIMIT_BURST = env.EnvVarSpec(
+    id="ELOMRADEN_RATE_LIMIT_BURST",
+    parse=int,
+    default="10",
+    type=(int, ...),
+)
+
+ELOMRADEN_RATE_LIMIT_MAX_WAIT_SECONDS = env.EnvVarSpec(
+    id="ELOMRADEN_RATE_LIMIT_MAX_WAIT_SECONDS",
+    parse=float,
+    default="2",
+    type=(float, ...),
+)
+
+ELOMRADEN_RATE_LIMIT_MAX_QUEUE = env.EnvVarSpec(
+    id="ELOMRADEN_RATE_LIMIT_MAX_QUEUE",
+    parse=int,
+    default="100",
+    type=(int, ...),
+)
+
+ELOMRADEN_CACHE_MAX_ENTRIES = env.EnvVarSpec(
+    id="ELOMRADEN_CACHE_MAX_ENTRIES",
+    parse=int,
+    default="10000",
+    type=(int, ...),
+)
+
+ELOMRADEN_CACHE_TTL_SECONDS = env.EnvVarSpec(
+    id="ELOMRADEN_CACHE_TTL_SECONDS",
+    parse=float,
+    default="86400",
+    type=(float, ...),
+)
+
+ELOMRADEN_CACHE_SOFT_TTL_SECONDS = env.EnvVarSpec(
+    id="ELOMRADEN_CACHE_SOFT_TTL_SECONDS",
+    parse=float,
+    default="43200",
+    type=(float, ...),
+)
+
+ELOMRADEN_REFRESH_CONCURRENCY = env.EnvVarSpec(
+    id="ELOMRADEN_REFRESH_CONCURRENCY",
+    parse=int,
+    default="4",
+    type=(int, ...),
+)
+
+ELOMRADEN_CACHE_NEGATIVE_TTL_SECONDS = env.EnvVarSpec(
+    id="ELOMRADEN_CACHE_NEGATIVE_TTL_SECONDS",
+    parse=float,
+    default="900",
+    type=(float, ...),
+)
+
+POSTAL_CODE_AREA_MAX_AGE_DAYS = env.EnvVarSpec(
+    id="POSTAL_CODE_AREA_MAX_AGE_DAYS",
+    parse=float,
+    default="30",
+    type=(float, ...),
+)
+
+## Local MGA resolution ##
+
+MGA_BOUNDARIES_PATH = env.EnvVarSpec(
+    id="MGA_BOUNDARIES_PATH",
+    default="data/metering_grid_areas/boundaries.geojson",
+    parse=lambda x: x or None,
+    type=(str | None, ...),
+)
+
+MGA_BOUNDARIES_BORDER_MARGIN_METERS = env.EnvVarSpec(
+    id="MGA_BOUNDARIES_BORDER_MARGIN_METERS",
+    parse=float,
+    default="200",
+    type=(float, ...),
+)
+
+## Warmup ##
+
+WARMUP_PATH = env.EnvVarSpec(
+    id="WARMUP_PATH",
+    default="",
+    parse=lambda x: x or None,
+    type=(str | None, ...),
+)
+
+WARMUP_CONCURRENCY = env.EnvVarSpec(
+    id="WARMUP_CONCURRENCY",
+    parse=int,
+    default="4",
+    type=(int, ...),
+)
+
+WARMUP_READY_THRESHOLD = env.EnvVarSpec(
+    id="WARMUP_READY_THRESHOLD",
+    parse=float,
+    default="0.9",
+    type=(float, ...),
+)
+
+## Calculation ##
+
+CALCULATION_WORKERS = env.EnvVarSpec(
+    id="CALCULATION_WORKERS",
+    parse=lambda x: int(x) if x else None,
+    default="",
+    type=(int | None, ...),
+)
+
+CALCULATION_STREAM_CHUNK_ROWS = env.EnvVarSpec(
+    id="CALCULATION_STREAM_CHUNK_ROWS",
+    parse=int,
+    default="100000",
+    type=(int, ...),
+)
+
+LIVE_TRACKER_MAX_METERS = env.EnvVarSpec(
+    id="LIVE_TRACKER_MAX_METERS",
+    parse=int,
+    default="100000",
+    type=(int, ...),
+)
+
 #### API ####
 
 
@@ -206,9 +433,31 @@ def dump():
         "ELOMRADEN_APIKEY": get_elomraden_apikey(),
         "ELOMRADEN_USER": get_elomraden_user(),
         "ELOMRADEN_BASE_URL": get_elomraden_base_url(),
+        "ELOMRADEN_POOL": get_elomraden_pool_conf().model_dump(),
+        "ELOMRADEN_DEADLINE_SECONDS": get_elomraden_deadline(),
+        "ELOMRADEN_BREAKER_FAILURE_THRESHOLD": get_elomraden_breaker_failure_threshold(),
+        "ELOMRADEN_BREAKER_RESET_SECONDS": get_elomraden_breaker_reset(),
+        "ELOMRADEN_HEDGE_PERCENTILE": get_elomraden_hedge_percentile(),
+        "ELOMRADEN_RATE_LIMIT": get_elomraden_rate_limit_conf().model_dump(),
+        "ELOMRADEN_CACHE_MAX_ENTRIES": get_elomraden_cache_max_entries(),
+        "ELOMRADEN_CACHE_TTL_SECONDS": get_elomraden_cache_ttl(),
+        "ELOMRADEN_CACHE_SOFT_TTL_SECONDS": get_elomraden_cache_soft_ttl(),
+        "ELOMRADEN_REFRESH_CONCURRENCY": get_elomraden_refresh_concurrency(),
+        "ELOMRADEN_CACHE_NEGATIVE_TTL_SECONDS": get_elomraden_cache_negative_ttl(),
+        "POSTAL_CODE_AREA_MAX_AGE_DAYS": get_postal_code_area_max_age_days(),
+        "MGA_BOUNDARIES_PATH": get_mga_boundaries_path(),
+        "MGA_BOUNDARIES_BORDER_MARGIN_METERS": get_mga_boundaries_border_margin(),
+        "WARMUP_PATH": get_warmup_path(),
+        "WARMUP_CONCURRENCY": get_warmup_concurrency(),
+        "WARMUP_READY_THRESHOLD": get_warmup_ready_threshold(),
+        "CALCULATION_WORKERS": get_calculation_workers(),
+        "CALCULATION_STREAM_CHUNK_ROWS": get_calculation_stream_chunk_rows(),
+        "LIVE_TRACKER_MAX_METERS": get_live_tracker_max_meters(),
         "POSTGRES_CONF": get_postgres_conf().model_dump(),
         "REGISTRAR_URL": get_registrar_url(),
         "AUTO_REGISTER": get_auto_register(),
+        "TARIFF_SNAPSHOT_ENABLED": is_tariff_snapshot_enabled(),
+        "RENDERED_CACHE_MAX_ENTRIES": get_rendered_cache_max_entries(),
     }
     print(env_vars)
 
@@ -258,6 +507,107 @@ def get_elomraden_base_url() -> str:
     return cast(str, env.parse(ELOMRADEN_BASE_URL))
 
 
+def get_elomraden_pool_conf() -> HttpPoolConf:
+    return HttpPoolConf(
+        max_connections=cast(int, env.parse(ELOMRADEN_MAX_CONNECTIONS)),
+        max_keepalive_connections=cast(
+            int, env.parse(ELOMRADEN_MAX_KEEPALIVE_CONNECTIONS)
+        ),
+        keepalive_expiry=cast(float, env.parse(ELOMRADEN_KEEPALIVE_EXPIRY_SECONDS)),
+        timeout=cast(float, env.parse(ELOMRADEN_TIMEOUT_SECONDS)),
+        connect_timeout=cast(float, env.parse(ELOMRADEN_CONNECT_TIMEOUT_SECONDS)),
+    )
+
+
+def get_elomraden_deadline() -> float:
+    return cast(float, env.parse(ELOMRADEN_DEADLINE_SECONDS))
+
+
+def get_elomraden_breaker_failure_threshold() -> int:
+    return cast(int, env.parse(ELOMRADEN_BREAKER_FAILURE_THRESHOLD))
+
+
+def get_elomraden_breaker_reset() -> float:
+    return cast(float, env.parse(ELOMRADEN_BREAKER_RESET_SECONDS))
+
+
+def get_elomraden_hedge_percentile() -> float | None:
+    return env.parse(ELOMRADEN_HEDGE_PERCENTILE)
+
+
+def get_elomraden_rate_limit_conf() -> RateLimitConf:
+    return RateLimitConf(
+        rate=cast(float, env.parse(ELOMRADEN_RATE_LIMIT_PER_SECOND)),
+        burst=cast(int, env.parse(ELOMRADEN_RATE_LIMIT_BURST)),
+        max_wait=cast(float, env.parse(ELOMRADEN_RATE_LIMIT_MAX_WAIT_SECONDS)),
+        max_queue=cast(int, env.parse(ELOMRADEN_RATE_LIMIT_MAX_QUEUE)),
+    )
+
+
+def get_elomraden_cache_max_entries() -> int:
+    return cast(int, env.parse(ELOMRADEN_CACHE_MAX_ENTRIES))
+
+
+def get_elomraden_cache_ttl() -> float:
+    return cast(float, env.parse(ELOMRADEN_CACHE_TTL_SECONDS))
+
+
+def get_elomraden_cache_soft_ttl() -> float:
+    return cast(float, env.parse(ELOMRADEN_CACHE_SOFT_TTL_SECONDS))
+
+
+def get_elomraden_refresh_concurrency() -> int:
+    return cast(int, env.parse(ELOMRADEN_REFRESH_CONCURRENCY))
+
+
+def get_elomraden_cache_negative_ttl() -> float:
+    return cast(float, env.parse(ELOMRADEN_CACHE_NEGATIVE_TTL_SECONDS))
+
+
+def get_postal_code_area_max_age_days() -> float:
+    return cast(float, env.parse(POSTAL_CODE_AREA_MAX_AGE_DAYS))
+
+
+def get_mga_boundaries_path() -> str | None:
+    return env.parse(MGA_BOUNDARIES_PATH)
+
+
+def get_mga_boundaries_border_margin() -> float:
+    return cast(float, env.parse(MGA_BOUNDARIES_BORDER_MARGIN_METERS))
+
+
+def get_warmup_path() -> str | None:
+    return env.parse(WARMUP_PATH)
+
+
+def get_warmup_concurrency() -> int:
+    return cast(int, env.parse(WARMUP_CONCURRENCY))
+
+
+def get_warmup_ready_threshold() -> float:
+    return cast(float, env.parse(WARMUP_READY_THRESHOLD))
+
+
+def get_calculation_workers() -> int:
+    """Batch calculation processes, one per available core unless configured."""
+    workers = env.parse(CALCULATION_WORKERS)
+    if workers is None:
+        workers = (
+            len(os.sched_getaffinity(0))
+            if hasattr(os, "sched_getaffinity")
+            else os.cpu_count()
+        )
+    return max(1, workers or 1)
+
+
+def get_calculation_stream_chunk_rows() -> int:
+    return cast(int, env.parse(CALCULATION_STREAM_CHUNK_ROWS))
+
+
+def get_live_tracker_max_meters() -> int:
+    return cast(int, env.parse(LIVE_TRACKER_MAX_METERS))
+
+
 def get_postgres_conf() -> PostgresConnectionConf:
     return PostgresConnectionConf(
         host=cast(str, env.parse(POSTGRES_HOST)),
@@ -307,3 +657,11 @@ def is_dev_mode() -> bool:
 
 def is_admin_mode() -> bool:
     return cast(bool, env.parse(ADMIN_MODE))
+
+
+def is_tariff_snapshot_enabled() -> bool:
+    return cast(bool, env.parse(TARIFF_SNAPSHOT_ENABLED))
+
+
+def get_rendered_cache_max_entries() -> int:
+    return cast(int, env.parse(RENDERED_CACHE_MAX_ENTRIES))
@@ -30,6 +30,7 @@ class IllegalArgumentError(ControlledException):
     """Illegal argument provided"""
 
     def __init__(self, msg: str = None):
+        self.msg = msg
         super().__init__(f"Illegal argument provided: {msg}")
 
 
@@ -48,6 +49,31 @@ class UnexpectedValue(ControlledException):
         super().__init__(f"Unexpected value provided: {details}")
 
 
+class UpstreamUnavailableError(ControlledException):
+    """An upstream service can't be used right now; the caller may retry later."""
+
+    def __init__(self, service: str, reason: str, retry_after: float | None = None):
+        self.service = service
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"Upstream {service} unavailable: {reason}")
+
+
+class RateLimitedError(UpstreamUnavailableError):
+    """The client-side rate limit for an upstream service can't take the request."""
+
+    def __init__(self, service: str, reason: str, retry_after: float | None = None):
+        super().__init__(service, f"rate limited, {reason}", retry_after)
+
+
+class DeadlineExceededError(ControlledException):
+    """The request ran out of time waiting on an upstream service."""
+
+    def __init__(self, service: str):
+        self.service = service
+        super().__init__(f"Deadline exceeded waiting for {service}")
+
+
 class UncontrolledException(Exception):
     """Base class for unknown, uncontrolled exceptions.
     Generally meaning we can't recover and need to be alerted in all instances.
@@ -0,0 +1,94 @@
+from bisect import bisect_right
+from collections.abc import Mapping
+
+from src.exceptions import IllegalArgumentError
+from src.importers.power_tariffs.utils import parse_fuse_amperes
+from src.model import PowerTariffSpec, TariffCompositionSpec
+
+
+class FuseIndex:
+    """Fuse ranges of a tariff's compositions, sorted for O(log n) lookups.
+
+    Compositions sharing a range form one band. Ranges are inclusive on both
+    ends; an empty lower bound is 0A and an empty upper bound is unbounded.
+    """
+
+    __slots__ = ("_los", "_his", "_max_his", "_compositions")
+
+    def __init__(self, compositions: list[TariffCompositionSpec]):
+        bands: dict[tuple[float, float], list[int]] = {}
+        for i, composition in enumerate(compositions):
+            bands.setdefault(composition_amperes(composition), []).append(i)
+        ordered = sorted(bands.items())
+        self._los = [lo for (lo, _), _ in ordered]
+        self._his = [hi for (_, hi), _ in ordered]
+        self._compositions = [indices for _, indices in ordered]
+        # Running max of the upper bounds, to stop scanning overlapping bands early
+        self._max_his = []
+        for hi in self._his:
+            self._max_his.append(max(hi, self._max_his[-1]) if self._max_his else hi)
+
+    @property
+    def band_count(self) -> int:
+        return len(self._los)
+
+    def all(self) -> list[int]:
+        return sorted(i for indices in self._compositions for i in indices)
+
+    def lookup(self, amperes: float) -> list[int]:
+        """Indices of the compositions whose range contains the fuse size."""
+        selected = []
+        band = bisect_right(self._los, amperes) - 1
+        while band >= 0 and self._max_his[band] >= amperes:
+            if self._his[band] >= amperes:
+                selected.extend(self._compositions[band])
+            band -= 1
+        return sorted(selected)
+
+
+def composition_amperes(composition: TariffCompositionSpec) -> tuple[float, float]:
+    """Numeric fuse range of a composition.
+
+    Compositions stored before the amperes were parsed at import are parsed here.
+    """
+    lo, hi = composition.fuse_from_amperes, composition.fuse_to_amperes
+    if lo is None and composition.fuse_from:
+        lo = parse_fuse_amperes(composition.fuse_from)
+    if hi is None and composition.fuse_to:
+        hi = parse_fuse_amperes(composition.fuse_to)
+    return (lo or 0.0, float("inf") if hi is None else hi)
+
+
+def parse_fuse(fuse: str) -> float:
+    """Parses a requested fuse size like ``20A`` or ``20`` into amperes."""
+    try:
+        amperes = parse_fuse_amperes(fuse)
+    except ValueError:
+        amperes = None
+    if amperes is None:
+        raise IllegalArgumentError(f"Invalid fuse {fuse}")
+    return amperes
+
+
+def filter_by_fuse(
+    tariffs: list[PowerTariffSpec],
+    amperes: float,
+    indexes: Mapping[str, FuseIndex] | None = None,
+) -> list[PowerTariffSpec]:
+    """Tariffs pricing the fuse size, narrowed to the compositions that apply to it.
+
+    Uses the prebuilt index of a tariff from ``indexes`` by uid when there is one.
+    """
+    filtered = []
+    for tariff in tariffs:
+        index = indexes.get(tariff.uid) if indexes is not None else None
+        if index is None:
+            index = FuseIndex(tariff.compositions)
+        selected = index.lookup(amperes)
+        if selected:
+            filtered.append(
+                tariff.model_copy(
+                    update={"compositions": [tariff.compositions[i] for i in selected]}
+                )
+            )
+    return filtered
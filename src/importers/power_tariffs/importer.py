@@ -12,6 +12,7 @@ from src.importers.power_tariffs.utils import (
     parse_months,
     parse_days,
     parse_fuse,
+    parse_fuse_amperes,
     parse_price,
     parse_intervals,
     parse_mgas,
@@ -73,6 +74,8 @@ def _parse_tariffs_compositions_file() -> dict[str, list[PowerTariffComposition]
                     days=parse_days(row["Days"]),
                     fuse_from=parse_fuse(row["Fuse From"]),
                     fuse_to=parse_fuse(row["Fuse To"]),
+                    fuse_from_amperes=parse_fuse_amperes(row["Fuse From"]),
+                    fuse_to_amperes=parse_fuse_amperes(row["Fuse To"]),
                     unit=row["Unit"],
                     price_exc_vat=parse_price(row["Price Ex Vat"]),
                     price_inc_vat=parse_price(row["Price Inc Vat"]),
@@ -156,6 +159,8 @@ async def _save_operator_tariffs(
                     days=composition.days,
                     fuse_from=composition.fuse_from,
                     fuse_to=composition.fuse_to,
+                    fuse_from_amperes=composition.fuse_from_amperes,
+                    fuse_to_amperes=composition.fuse_to_amperes,
                     unit=composition.unit,
                     price_exc_vat=composition.price_exc_vat,
                     price_inc_vat=composition.price_inc_vat,
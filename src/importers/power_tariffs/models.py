@@ -15,6 +15,8 @@ class PowerTariffComposition(BaseModel):
     days: List[str]
     fuse_from: str
     fuse_to: str
+    fuse_from_amperes: float | None = None
+    fuse_to_amperes: float | None = None
     unit: str
     price_exc_vat: float
     price_inc_vat: float
@@ -52,6 +52,16 @@ def parse_fuse(string):
     return string
 
 
+def parse_fuse_amperes(string) -> float | None:
+    """Parses fuse sizes like ``16A`` or ``3x25 A`` into amperes, None if empty."""
+    if not string or not string.strip():
+        return None
+    match = re.search(r"(\d+(?:[.,]\d+)?)\s*a?\s*$", string.strip(), re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"Invalid fuse format {string}")
+    return float(match.group(1).replace(",", "."))
+
+
 def parse_price(string):
     try:
         return float(string)
@@ -0,0 +1,198 @@
+import json
+import math
+from pathlib import Path
+
+from engrate_sdk.utils import log
+from prometheus_client import Counter
+
+from src import env
+
+logger = log.get_logger(__name__)
+
+MGA_RESOLVER_LOOKUPS = Counter(
+    "mga_resolver_lookups_total",
+    "Local coordinate to MGA lookups by outcome",
+    ["result"],
+)
+
+_METERS_PER_DEGREE_LAT = 110_574.0
+_METERS_PER_DEGREE_LON = 111_320.0
+
+# Edge registered in a grid cell: (mga code, x1, y1, x2, y2) in lon/lat degrees
+Edge = tuple[str, float, float, float, float]
+
+
+class _Polygon:
+    """Polygon with optional holes, coordinates as (lon, lat) as in GeoJSON."""
+
+    __slots__ = ("code", "rings", "bbox")
+
+    def __init__(self, code: str, rings: list[list[tuple[float, float]]]):
+        self.code = code
+        self.rings = rings
+        xs = [x for x, _ in rings[0]]
+        ys = [y for _, y in rings[0]]
+        self.bbox = (min(xs), min(ys), max(xs), max(ys))
+
+    def contains(self, x: float, y: float) -> bool:
+        min_x, min_y, max_x, max_y = self.bbox
+        if not (min_x <= x <= max_x and min_y <= y <= max_y):
+            return False
+        # Even-odd ray casting over all rings, so holes are excluded
+        inside = False
+        for ring in self.rings:
+            x1, y1 = ring[-1]
+            for x2, y2 in ring:
+                if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+                    inside = not inside
+                x1, y1 = x2, y2
+        return inside
+
+    def edges(self):
+        for ring in self.rings:
+            x1, y1 = ring[-1]
+            for x2, y2 in ring:
+                yield x1, y1, x2, y2
+                x1, y1 = x2, y2
+
+
+class MgaResolver:
+    """Resolves coordinates to metering grid area codes from boundary polygons.
+
+    Polygon edges are bucketed into a regular lat/lon grid. A point in a cell
+    without edges belongs to one polygon (or none) for the whole cell, which is
+    resolved once and memoized. Cells crossed by a border get an exact
+    point-in-polygon test. Points closer to a border than ``border_margin_m``,
+    found through the edges of the surrounding cells, are left unresolved so
+    callers can fall back to an authoritative lookup.
+    """
+
+    def __init__(
+        self,
+        polygons: list[_Polygon],
+        cell_size: float = 0.05,
+        border_margin_m: float = 200.0,
+    ):
+        self.cell_size = cell_size
+        self.border_margin_m = border_margin_m
+        self._polygons = polygons
+        self._edges: dict[tuple[int, int], list[Edge]] = {}
+        self._polygon_cells: dict[tuple[int, int], list[_Polygon]] = {}
+        self._interior: dict[tuple[int, int], str | None] = {}
+        for polygon in polygons:
+            min_x, min_y, max_x, max_y = polygon.bbox
+            for cell in self._cells_in(min_x, min_y, max_x, max_y):
+                self._polygon_cells.setdefault(cell, []).append(polygon)
+            for x1, y1, x2, y2 in polygon.edges():
+                edge = (polygon.code, x1, y1, x2, y2)
+                for cell in self._cells_in(
+                    min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
+                ):
+                    self._edges.setdefault(cell, []).append(edge)
+
+    @classmethod
+    def from_geojson(cls, path: Path, **kwargs) -> "MgaResolver":
+        """Loads a FeatureCollection of (Multi)Polygons with the MGA code in ``properties.code``."""
+        with open(path, "r", encoding="utf-8") as file:
+            collection = json.load(file)
+
+        polygons = []
+        for feature in collection.get("features", []):
+            code = (feature.get("properties") or {}).get("code")
+            geometry = feature.get("geometry") or {}
+            if not code:
+                logger.warning("Skipping MGA boundary feature without code")
+                continue
+            if geometry.get("type") == "Polygon":
+                parts = [geometry["coordinates"]]
+            elif geometry.get("type") == "MultiPolygon":
+                parts = geometry["coordinates"]
+            else:
+                logger.warning(f"Skipping MGA {code}: unsupported geometry type")
+                continue
+            for rings in parts:
+                polygons.append(
+                    _Polygon(
+                        code, [[(float(x), float(y)) for x, y, *_ in r] for r in rings]
+                    )
+                )
+        return cls(polygons, **kwargs)
+
+    def resolve(self, lat: float, lon: float) -> str | None:
+        """Returns the MGA code of the point, or None if it can't be told reliably."""
+        cell = self._cell(lon, lat)
+        if cell in self._edges:
+            code = self._locate(lon, lat, cell)
+        else:
+            if cell not in self._interior:
+                self._interior[cell] = self._locate(lon, lat, cell)
+            code = self._interior[cell]
+        if code is not None and self._near_border(lon, lat, cell):
+            code = None
+        MGA_RESOLVER_LOOKUPS.labels(result="local" if code else "unresolved").inc()
+        return code
+
+    def __len__(self) -> int:
+        return len(self._polygons)
+
+    def _locate(self, x: float, y: float, cell: tuple[int, int]) -> str | None:
+        codes = {p.code for p in self._polygon_cells.get(cell, ()) if p.contains(x, y)}
+        # Overlapping areas are ambiguous, leave them to the fallback
+        return codes.pop() if len(codes) == 1 else None
+
+    def _near_border(self, x: float, y: float, cell: tuple[int, int]) -> bool:
+        scale_x = _METERS_PER_DEGREE_LON * math.cos(math.radians(y))
+        margin_deg = self.border_margin_m / min(scale_x, _METERS_PER_DEGREE_LAT)
+        reach = math.ceil(margin_deg / self.cell_size)
+        col, row = cell
+        for dc in range(-reach, reach + 1):
+            for dr in range(-reach, reach + 1):
+                for _, x1, y1, x2, y2 in self._edges.get((col + dc, row + dr), ()):
+                    if (
+                        _segment_distance(x, y, x1, y1, x2, y2, scale_x)
+                        < self.border_margin_m
+                    ):
+                        return True
+        return False
+
+    def _cell(self, x: float, y: float) -> tuple[int, int]:
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def _cells_in(self, min_x: float, min_y: float, max_x: float, max_y: float):
+        min_col, min_row = self._cell(min_x, min_y)
+        max_col, max_row = self._cell(max_x, max_y)
+        for col in range(min_col, max_col + 1):
+            for row in range(min_row, max_row + 1):
+                yield col, row
+
+
+def _segment_distance(x, y, x1, y1, x2, y2, scale_x) -> float:
+    """Approximate distance in meters from a point to a segment (equirectangular)."""
+    px, py = (x - x1) * scale_x, (y - y1) * _METERS_PER_DEGREE_LAT
+    dx, dy = (x2 - x1) * scale_x, (y2 - y1) * _METERS_PER_DEGREE_LAT
+    length = dx * dx + dy * dy
+    t = 0.0 if length == 0 else max(0.0, min(1.0, (px * dx + py * dy) / length))
+    return math.hypot(px - t * dx, py - t * dy)
+
+
+_resolver: MgaResolver | None = None
+
+
+def current() -> MgaResolver | None:
+    """Returns the loaded resolver, or None when local resolution is not configured."""
+    return _resolver
+
+
+def load(path: str) -> MgaResolver | None:
+    """Loads MGA boundaries from a GeoJSON file, keeping local resolution off if it's missing."""
+    global _resolver
+    if not Path(path).exists():
+        logger.info(
+            f"MGA boundaries file {path} not found, coordinates are resolved by Elomraden"
+        )
+        return None
+    _resolver = MgaResolver.from_geojson(
+        Path(path), border_margin_m=env.get_mga_boundaries_border_margin()
+    )
+    logger.info(f"Local MGA resolver loaded with {len(_resolver)} polygons")
+    return _resolver
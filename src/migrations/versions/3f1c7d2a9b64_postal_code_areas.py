@@ -0,0 +1,38 @@
+"""Postal code to grid area resolutions
+
+Revision ID: 3f1c7d2a9b64
+Revises: 9824b55b6d3b
+Create Date: 2026-10-18 09:40:12.514370+00:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy import JSON
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c7d2a9b64'
+down_revision: Union[str, None] = '9824b55b6d3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        'postal_code_areas',
+        sa.Column('postal_code', sa.Integer(), primary_key=True),
+        sa.Column('mga_code', sa.String(length=50), nullable=False),
+        sa.Column('grid_area', JSON, nullable=False),
+        sa.Column('fetched_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+    op.create_index(
+        'ix_postal_code_areas_mga_code',
+        'postal_code_areas', ['mga_code'],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_postal_code_areas_mga_code')
+    op.drop_table('postal_code_areas')
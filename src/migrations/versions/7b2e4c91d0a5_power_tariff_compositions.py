@@ -0,0 +1,162 @@
+"""Power tariff compositions and intervals as indexed rows
+
+Revision ID: 7b2e4c91d0a5
+Revises: 3f1c7d2a9b64
+Create Date: 2026-10-18 14:05:31.402118+00:00
+
+"""
+import logging
+import uuid
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy import UUID
+
+from src.calculation.plan import DAYS, MONTHS, minutes
+from src.importers.power_tariffs.utils import parse_fuse_amperes
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2e4c91d0a5'
+down_revision: Union[str, None] = '3f1c7d2a9b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+
+def upgrade():
+    compositions = op.create_table(
+        'power_tariff_compositions',
+        sa.Column('uid', UUID, primary_key=True),
+        sa.Column('tariff_uid', UUID, nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('months', sa.Integer(), nullable=False),
+        sa.Column('days', sa.Integer(), nullable=False),
+        sa.Column('fuse_from', sa.String(length=50), nullable=False),
+        sa.Column('fuse_to', sa.String(length=50), nullable=False),
+        sa.Column('fuse_from_amperes', sa.Float(), nullable=False),
+        sa.Column('fuse_to_amperes', sa.Float(), nullable=True),
+        sa.Column('unit', sa.String(length=20), nullable=False),
+        sa.Column('price_exc_vat', sa.Float(), nullable=False),
+        sa.Column('price_inc_vat', sa.Float(), nullable=False),
+    )
+
+    intervals = op.create_table(
+        'power_tariff_intervals',
+        sa.Column('uid', UUID, primary_key=True),
+        sa.Column('composition_uid', UUID, nullable=False),
+        sa.Column('from_time', sa.String(length=10), nullable=False),
+        sa.Column('to_time', sa.String(length=10), nullable=False),
+        sa.Column('from_minute', sa.Integer(), nullable=False),
+        sa.Column('to_minute', sa.Integer(), nullable=False),
+        sa.Column('multiplier', sa.Float(), nullable=False),
+    )
+
+    op.create_foreign_key(
+        'fk_power_tariff_compositions_tariff_uid',
+        'power_tariff_compositions',
+        'power_tariffs',
+        ['tariff_uid'], ['uid'],
+        ondelete='CASCADE',
+    )
+
+    op.create_foreign_key(
+        'fk_power_tariff_intervals_composition_uid',
+        'power_tariff_intervals',
+        'power_tariff_compositions',
+        ['composition_uid'], ['uid'],
+        ondelete='CASCADE',
+    )
+
+    op.create_index(
+        'ix_power_tariff_compositions_tariff_uid',
+        'power_tariff_compositions', ['tariff_uid'],
+    )
+
+    op.create_index(
+        'ix_power_tariff_compositions_fuse',
+        'power_tariff_compositions', ['fuse_from_amperes', 'fuse_to_amperes'],
+    )
+
+    op.create_index(
+        'ix_power_tariff_compositions_unit_price',
+        'power_tariff_compositions', ['unit', 'price_exc_vat'],
+    )
+
+    op.create_index(
+        'ix_power_tariff_intervals_composition_uid',
+        'power_tariff_intervals', ['composition_uid'],
+    )
+
+    # Backfill from the JSON column, which stays the source tariffs are read from
+    composition_rows, interval_rows = [], []
+    tariffs = op.get_bind().execute(sa.text('SELECT uid, compositions FROM power_tariffs'))
+    for tariff_uid, tariff_compositions in tariffs:
+        for position, composition in enumerate(tariff_compositions or []):
+            composition_uid = uuid.uuid4()
+            fuse_from = _amperes(
+                composition.get('fuse_from_amperes'), composition['fuse_from'], tariff_uid, position
+            )
+            fuse_to = _amperes(
+                composition.get('fuse_to_amperes'), composition['fuse_to'], tariff_uid, position
+            )
+            composition_rows.append({
+                'uid': composition_uid,
+                'tariff_uid': tariff_uid,
+                'position': position,
+                'months': _mask(composition['months'], MONTHS),
+                'days': _mask(composition['days'], DAYS),
+                'fuse_from': composition['fuse_from'],
+                'fuse_to': composition['fuse_to'],
+                'fuse_from_amperes': fuse_from or 0.0,
+                'fuse_to_amperes': fuse_to,
+                'unit': composition['unit'],
+                'price_exc_vat': composition['price_exc_vat'],
+                'price_inc_vat': composition['price_inc_vat'],
+            })
+            for interval in composition['intervals']:
+                from_time = interval.get('from_time', interval.get('from'))
+                to_time = interval.get('to_time', interval.get('to'))
+                interval_rows.append({
+                    'uid': uuid.uuid4(),
+                    'composition_uid': composition_uid,
+                    'from_time': from_time,
+                    'to_time': to_time,
+                    'from_minute': minutes(from_time),
+                    'to_minute': minutes(to_time),
+                    'multiplier': interval['multiplier'],
+                })
+    if composition_rows:
+        op.bulk_insert(compositions, composition_rows)
+    if interval_rows:
+        op.bulk_insert(intervals, interval_rows)
+
+
+def downgrade():
+    op.drop_index('ix_power_tariff_intervals_composition_uid')
+    op.drop_index('ix_power_tariff_compositions_unit_price')
+    op.drop_index('ix_power_tariff_compositions_fuse')
+    op.drop_index('ix_power_tariff_compositions_tariff_uid')
+    op.drop_constraint('fk_power_tariff_intervals_composition_uid', 'power_tariff_intervals')
+    op.drop_constraint('fk_power_tariff_compositions_tariff_uid', 'power_tariff_compositions')
+    op.drop_table('power_tariff_intervals')
+    op.drop_table('power_tariff_compositions')
+
+
+def _amperes(amperes, fuse, tariff_uid, position):
+    """The fuse bound in amperes, None (i.e. open) when it can't be parsed."""
+    if amperes is not None:
+        return amperes
+    try:
+        return parse_fuse_amperes(fuse)
+    except ValueError:
+        logger.warning(
+            f'Unparseable fuse {fuse!r} in composition {position} of tariff {tariff_uid}, '
+            'backfilled as an open bound'
+        )
+        return None
+
+
+def _mask(names, all_names):
+    return sum(1 << all_names.index(name.lower()) for name in set(names))
@@ -1,8 +1,8 @@
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Literal, Optional
 
-from pydantic import Field, BaseModel
+from pydantic import Field, BaseModel, model_validator
 
 
 def to_camel(string: str) -> str:
@@ -40,6 +40,9 @@ class TariffCompositionSpec(Spec):
     days: list[str]
     fuse_from: str = Field(...)
     fuse_to: str = Field(...)
+    # Parsed fuse range for indexing, internal and never serialized
+    fuse_from_amperes: Optional[float] = Field(default=None, exclude=True)
+    fuse_to_amperes: Optional[float] = Field(default=None, exclude=True)
     unit: str
     price_exc_vat: float = Field(...)
     price_inc_vat: float = Field(...)
@@ -94,3 +97,296 @@ class MeteringGridAreaSpec(Spec):
 
     class Config:
         populate_by_name = True
+
+
+class MeteringGridAreaBatchSpec(Spec):
+    """Batch lookup of power tariffs for many metering grid areas"""
+
+    mga_codes: list[str] = Field(..., min_length=1, max_length=1000)
+
+
+class PowerFeeRequestSpec(Spec):
+    """Load series (kW) to price under a power tariff.
+
+    Readings are either consecutive ``resolution_minutes`` periods from ``start``
+    or paired with ``timestamps``, which may mix quarter-hourly and hourly
+    readings; naive timestamps are taken as UTC and null readings as missing.
+    """
+
+    fuse: Optional[str] = None
+    start: Optional[datetime] = None
+    resolution_minutes: Literal[15, 60] = 60
+    timestamps: Optional[list[datetime]] = None
+    kw: list[Optional[float]] = Field(..., min_length=1)
+
+    @model_validator(mode="after")
+    def check_timestamps(self) -> "PowerFeeRequestSpec":
+        if (self.start is None) == (self.timestamps is None):
+            raise ValueError("Exactly one of start or timestamps is required")
+        if self.timestamps is not None and len(self.timestamps) != len(self.kw):
+            raise ValueError("Timestamps and kW readings must have the same length")
+        return self
+
+
+class MonthlyPowerFeeSpec(Spec):
+    """Billed power and fee of one month, billed kW listed per tariff composition"""
+
+    year: int
+    month: int
+    billed_kw: list[float]
+    fee_exc_vat: float
+    fee_inc_vat: float
+
+
+class PowerFeeSpec(Spec):
+    """Power fee of a load series under a power tariff"""
+
+    tariff_uid: str
+    fuse: Optional[str] = None
+    months: list[MonthlyPowerFeeSpec]
+    total_exc_vat: float
+    total_inc_vat: float
+
+
+class MeterLoadSpec(Spec):
+    """Hourly load series (kW) of one meter"""
+
+    meter_id: str
+    kw: list[Optional[float]] = Field(..., min_length=1)
+
+
+class PowerFeeBatchRequestSpec(Spec):
+    """Load series of many meters sharing the same timestamps, priced under one tariff"""
+
+    fuse: Optional[str] = None
+    start: Optional[datetime] = None
+    resolution_minutes: Literal[15, 60] = 60
+    timestamps: Optional[list[datetime]] = None
+    meters: list[MeterLoadSpec] = Field(..., min_length=1)
+
+    @model_validator(mode="after")
+    def check_timestamps(self) -> "PowerFeeBatchRequestSpec":
+        if (self.start is None) == (self.timestamps is None):
+            raise ValueError("Exactly one of start or timestamps is required")
+        length = len(self.meters[0].kw)
+        if any(len(meter.kw) != length for meter in self.meters):
+            raise ValueError("All meters must have the same number of kW readings")
+        if self.timestamps is not None and len(self.timestamps) != length:
+            raise ValueError("Timestamps and kW readings must have the same length")
+        return self
+
+
+class MeterPowerFeeSpec(Spec):
+    """Power fee of one meter's load series"""
+
+    meter_id: str
+    months: list[MonthlyPowerFeeSpec]
+    total_exc_vat: float
+    total_inc_vat: float
+
+
+class PowerFeeBatchSpec(Spec):
+    """Power fees of many meters under a power tariff"""
+
+    tariff_uid: str
+    fuse: Optional[str] = None
+    meters: list[MeterPowerFeeSpec]
+
+
+class LiveReadingSpec(Spec):
+    """One kW reading; a naive timestamp is taken as UTC"""
+
+    timestamp: datetime
+    kw: Optional[float] = None
+
+
+class LiveReadingsRequestSpec(Spec):
+    """New readings of a live meter, priced under a power tariff"""
+
+    tariff_uid: str
+    fuse: Optional[str] = None
+    resolution_minutes: Literal[15, 60] = 60
+    readings: list[LiveReadingSpec] = Field(..., min_length=1, max_length=10000)
+
+
+class LivePowerFeeSpec(Spec):
+    """Month-to-date power fee of a live meter"""
+
+    meter_id: str
+    tariff_uid: str
+    fuse: Optional[str] = None
+    last_reading: Optional[datetime] = None
+    month_to_date: MonthlyPowerFeeSpec
+    # Readings of the request ignored as already added, e.g. redelivered ones
+    ignored_readings: Optional[int] = None
+
+
+class RankedPowerFeeSpec(Spec):
+    """Power fee of a load series under one of the compared tariffs"""
+
+    rank: int
+    tariff_uid: str
+    name: str
+    model: str
+    building_type: BuildingType
+    months: list[MonthlyPowerFeeSpec]
+    total_exc_vat: float
+    total_inc_vat: float
+
+
+class SkippedTariffSpec(Spec):
+    """A compared tariff that can't price the load series"""
+
+    tariff_uid: str
+    name: str
+    reason: str
+
+
+class PowerTariffComparisonSpec(Spec):
+    """Tariffs of a metering grid area ranked by the power fee of a load series, cheapest first"""
+
+    mga_code: str
+    fuse: Optional[str] = None
+    tariffs: list[RankedPowerFeeSpec]
+    skipped: list[SkippedTariffSpec]
+
+
+class BatteryOptimizationRequestSpec(PowerFeeRequestSpec):
+    """Load series (kW) and a battery to shave its power fee with.
+
+    The battery starts full unless ``initial_charge_kwh`` is given; charging
+    loses ``1 - round_trip_efficiency`` of the energy.
+    """
+
+    capacity_kwh: float = Field(..., gt=0)
+    power_kw: float = Field(..., gt=0)
+    round_trip_efficiency: float = Field(0.9, gt=0, le=1)
+    initial_charge_kwh: Optional[float] = Field(None, ge=0)
+
+
+class BatteryMonthSpec(Spec):
+    """Power fee of one month with the battery, and what it saves.
+
+    ``peak_cap_kw`` is the weighted peak the battery holds the load under.
+    """
+
+    year: int
+    month: int
+    peak_cap_kw: Optional[float] = None
+    billed_kw: list[float]
+    fee_exc_vat: float
+    fee_inc_vat: float
+    saving_exc_vat: float
+    saving_inc_vat: float
+
+
+class BatteryDispatchSpec(Spec):
+    """Battery dispatch minimizing the power fee of a load series under a tariff.
+
+    Series are per reading of the tariff's time unit; ``battery_kw`` is positive
+    when discharging and negative when charging.
+    """
+
+    tariff_uid: str
+    fuse: Optional[str] = None
+    months: list[BatteryMonthSpec]
+    total_saving_exc_vat: float
+    total_saving_inc_vat: float
+    timestamps: list[datetime]
+    grid_kw: list[Optional[float]]
+    battery_kw: list[float]
+    charge_kwh: list[float]
+
+
+class LoadPerturbationSpec(Spec):
+    """Random changes applied to a base load profile per simulated scenario.
+
+    Every scenario scales the base load by a lognormal factor with mean
+    ``scale`` and log-deviation ``scale_std``, adds a heat pump drawing up to
+    ``heat_pump_kw`` in mid-winter and nothing in summer, then multiplies each
+    reading by 1 + normal noise of deviation ``noise_std``. An EV charges at
+    ``ev_kw`` for ``ev_hours`` on a day with probability ``ev_daily_probability``,
+    starting at a random local hour between the earliest and latest start hour.
+    """
+
+    scale: float = Field(1.0, gt=0)
+    scale_std: float = Field(0.0, ge=0)
+    noise_std: float = Field(0.0, ge=0)
+    heat_pump_kw: float = Field(0.0, ge=0)
+    ev_kw: float = Field(0.0, ge=0)
+    ev_hours: int = Field(4, ge=1, le=24)
+    ev_daily_probability: float = Field(1.0, ge=0, le=1)
+    ev_earliest_start_hour: int = Field(17, ge=0, le=23)
+    ev_latest_start_hour: int = Field(22, ge=0, le=23)
+
+    @model_validator(mode="after")
+    def check_ev_start(self) -> "LoadPerturbationSpec":
+        if self.ev_latest_start_hour < self.ev_earliest_start_hour:
+            raise ValueError("The latest EV start hour precedes the earliest")
+        return self
+
+
+class PowerFeeSimulationRequestSpec(PowerFeeRequestSpec):
+    """Base load series (kW) and perturbations to simulate power fees for.
+
+    Giving a ``seed`` makes the simulation reproducible.
+    """
+
+    scenarios: int = Field(1000, ge=1, le=20000)
+    seed: Optional[int] = Field(None, ge=0)
+    percentiles: list[float] = Field([5, 25, 50, 75, 95], min_length=1, max_length=99)
+    perturbation: LoadPerturbationSpec = LoadPerturbationSpec()
+
+    @model_validator(mode="after")
+    def check_percentiles(self) -> "PowerFeeSimulationRequestSpec":
+        if any(not 0 <= p <= 100 for p in self.percentiles):
+            raise ValueError("Percentiles must be between 0 and 100")
+        return self
+
+
+class FeePercentileSpec(Spec):
+    """A percentile of the simulated fee"""
+
+    percentile: float
+    fee_exc_vat: float
+    fee_inc_vat: float
+
+
+class SimulatedMonthSpec(Spec):
+    """Distribution of one month's simulated power fee"""
+
+    year: int
+    month: int
+    percentiles: list[FeePercentileSpec]
+
+
+class PowerFeeSimulationSpec(Spec):
+    """Distribution of the power fee over simulated load scenarios.
+
+    ``total`` holds the percentiles of the fee summed over all months.
+    """
+
+    tariff_uid: str
+    fuse: Optional[str] = None
+    scenarios: int
+    seed: int
+    months: list[SimulatedMonthSpec]
+    total: list[FeePercentileSpec]
+
+
+class TimeOfUseCurveSpec(Spec):
+    """Effective power price of a tariff per period of a date range.
+
+    Period ``i`` starts ``i * resolution_minutes`` after ``start`` (UTC).
+    ``multiplier`` is the highest interval multiplier applying to the period,
+    0 where none does; prices are per kW of monthly peak, summed over the
+    applicable compositions each times its multiplier.
+    """
+
+    tariff_uid: str
+    fuse: Optional[str] = None
+    start: datetime
+    resolution_minutes: int
+    price_exc_vat: list[float]
+    price_inc_vat: list[float]
+    multiplier: list[float]
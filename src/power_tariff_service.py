@@ -1,6 +1,79 @@
-from src.model import GridOperatorSpec, PowerTariffSpec
+import asyncio
+import json
+import os
+import tempfile
+from collections.abc import AsyncIterator, Callable
+from contextlib import suppress
+from datetime import date, datetime, timedelta, timezone
+from functools import partial
+
+import numpy as np
+from engrate_sdk.utils import log
+
+from src import env, fuse_index, mga_resolver
+from src.calculation import (
+    batch,
+    battery,
+    curves,
+    engine,
+    live,
+    simulation,
+    streaming,
+)
+from src.model import (
+    BatteryDispatchSpec,
+    BatteryMonthSpec,
+    BatteryOptimizationRequestSpec,
+    BuildingType,
+    FeePercentileSpec,
+    GridOperatorSpec,
+    LivePowerFeeSpec,
+    LiveReadingsRequestSpec,
+    MeterPowerFeeSpec,
+    MonthlyPowerFeeSpec,
+    PowerFeeBatchRequestSpec,
+    PowerFeeBatchSpec,
+    PowerFeeRequestSpec,
+    PowerFeeSimulationRequestSpec,
+    PowerFeeSimulationSpec,
+    PowerFeeSpec,
+    PowerTariffComparisonSpec,
+    PowerTariffSpec,
+    RankedPowerFeeSpec,
+    SimulatedMonthSpec,
+    SkippedTariffSpec,
+    TimeOfUseCurveSpec,
+)
 from src.clients import elomraden
-from src.repositories.power_tariffs_repository import PowerTariffRepository
+from src.clients.elomraden_model import GridArea
+from src.clients.background_refresh import BackgroundRefresher
+from src.clients.rate_limit import Priority
+from src.clients.resilience import Deadline
+from src.exceptions import IllegalArgumentError, NotEnabledError
+from src.repositories import tariff_snapshot
+from src.repositories.power_tariffs_repository import (
+    DAYS,
+    MONTHS,
+    PowerTariffRepository,
+)
+from src.response_cache import (
+    RenderedResponse,
+    render_power_tariffs,
+    rendered_responses,
+)
+
+logger = log.get_logger(__name__)
+
+postal_code_refresher = BackgroundRefresher(
+    "postal_code_areas", concurrency=env.get_elomraden_refresh_concurrency()
+)
+
+
+async def reload_tariff_data():
+    """Publishes a (re-)imported tariff dataset to the read path."""
+    if env.is_tariff_snapshot_enabled():
+        await tariff_snapshot.load()
+    rendered_responses.invalidate()
 
 
 class PowerTariffService:
@@ -16,11 +89,412 @@ class PowerTariffService:
     ) -> list[PowerTariffSpec]:
         """
         Get a specific power tariff by its metering grid area (MGA) code.
+        Served from the in-memory tariff snapshot when snapshot mode is enabled.
         """
+        if (snapshot := tariff_snapshot.current()) is not None:
+            return snapshot.get_power_tariffs_by_mga(country_code, mga_code)
         return await self.repository.get_power_tariff_by_mga(
             country_code=country_code, mga_code=mga_code
         )
 
+    async def get_power_tariffs_by_mgas(
+        self, country_code: str, mga_codes: list[str]
+    ) -> dict[str, list[PowerTariffSpec]]:
+        """
+        Get the power tariffs of many metering grid areas (MGA) in one go.
+        Duplicated codes are resolved once.
+        """
+        mga_codes = list(dict.fromkeys(mga_codes))
+        if (snapshot := tariff_snapshot.current()) is not None:
+            return {
+                code: snapshot.get_power_tariffs_by_mga(country_code, code)
+                for code in mga_codes
+            }
+        return await self.repository.get_power_tariffs_by_mgas(
+            country_code=country_code, mga_codes=mga_codes
+        )
+
+    async def render_power_tariffs_by_mga(
+        self, country_code: str, mga_code: str, fuse: str | None = None
+    ) -> RenderedResponse:
+        """
+        Get the encoded JSON response for the power tariffs of a metering grid area.
+        Cached per dataset version, so repeated lookups skip the repository and pydantic.
+        A fuse keeps the tariffs pricing it, narrowed to the compositions for it.
+        """
+        amperes = fuse_index.parse_fuse(fuse) if fuse is not None else None
+        key = (country_code, mga_code, amperes)
+        if (rendered := rendered_responses.get(key)) is not None:
+            return rendered
+        version = rendered_responses.version
+        # One snapshot for both the tariffs and their prebuilt fuse indexes
+        if (snapshot := tariff_snapshot.current()) is not None:
+            tariffs = snapshot.get_power_tariffs_by_mga(country_code, mga_code)
+            indexes = snapshot.fuse_indexes
+        else:
+            tariffs = await self.get_power_tariffs_by_mga(country_code, mga_code)
+            indexes = None
+        if amperes is not None:
+            tariffs = fuse_index.filter_by_fuse(tariffs, amperes, indexes)
+        return rendered_responses.put(key, render_power_tariffs(tariffs), version)
+
+    async def get_power_tariff(self, uid: str) -> PowerTariffSpec:
+        """
+        Get a power tariff by its uid.
+        """
+        if (snapshot := tariff_snapshot.current()) is not None:
+            return snapshot.get_power_tariff_by_uid(uid)
+        return await self.repository.get_power_tariff_by_uid(uid)
+
+    async def search_power_tariffs(
+        self,
+        country_code: str,
+        metering_business_area: str | None = None,
+        mga_code: str | None = None,
+        fuse: str | None = None,
+        month: str | None = None,
+        day: str | None = None,
+        unit: str | None = None,
+        max_price_exc_vat: float | None = None,
+    ) -> list[PowerTariffSpec]:
+        """
+        Search power tariffs by the compositions they have, e.g. the tariffs of SE3
+        pricing a 25A fuse in January. Always answered by the database, whose
+        indexed composition rows do the filtering.
+        """
+        if month is not None and month.lower() not in MONTHS:
+            raise IllegalArgumentError(
+                f"Invalid month {month}, expected one of {MONTHS}"
+            )
+        if day is not None and day.lower() not in DAYS:
+            raise IllegalArgumentError(f"Invalid day {day}, expected one of {DAYS}")
+        return await self.repository.search_power_tariffs(
+            country_code=country_code,
+            metering_business_area=metering_business_area,
+            mga_code=mga_code,
+            fuse_amperes=fuse_index.parse_fuse(fuse) if fuse is not None else None,
+            month=month,
+            day=day,
+            unit=unit,
+            max_price_exc_vat=max_price_exc_vat,
+        )
+
+    async def calculate_power_fee(
+        self, uid: str, request: PowerFeeRequestSpec
+    ) -> PowerFeeSpec:
+        """
+        Price an hourly load series under a power tariff, month by month.
+        The calculation runs in a worker thread to keep the event loop free.
+        """
+        tariff = await self.get_power_tariff(uid)
+        timestamps = _request_timestamps(request, len(request.kw))
+        kw = np.array(request.kw, dtype=np.float64)  # None becomes NaN
+        result = await asyncio.to_thread(
+            engine.calculate_power_fee, tariff, timestamps, kw, request.fuse
+        )
+        return PowerFeeSpec(
+            tariff_uid=uid,
+            fuse=request.fuse,
+            months=_monthly_fees(result),
+            total_exc_vat=round(float(result.fee_exc_vat.sum()), 2),
+            total_inc_vat=round(float(result.fee_inc_vat.sum()), 2),
+        )
+
+    async def calculate_power_fees(
+        self, uid: str, request: PowerFeeBatchRequestSpec
+    ) -> PowerFeeBatchSpec:
+        """
+        Price many meters' hourly load series under a power tariff.
+        Meters are sharded across the calculation worker processes.
+        """
+        tariff = await self.get_power_tariff(uid)
+        n_readings = len(request.meters[0].kw)
+        timestamps = _request_timestamps(request, n_readings)
+        kw = np.array([meter.kw for meter in request.meters], dtype=np.float64)
+        result = await asyncio.to_thread(
+            batch.calculate_power_fees, tariff, timestamps, kw, request.fuse
+        )
+        return PowerFeeBatchSpec(
+            tariff_uid=uid,
+            fuse=request.fuse,
+            meters=[
+                _meter_power_fee(meter.meter_id, result.meter(i))
+                for i, meter in enumerate(request.meters)
+            ],
+        )
+
+    async def stream_power_fees(
+        self,
+        uid: str,
+        body: AsyncIterator[bytes],
+        fuse: str | None = None,
+        file_format: str = "csv",
+    ) -> tuple[AsyncIterator[bytes], Callable[[], None]]:
+        """
+        Price meters from an uploaded ``MeterId;Timestamp;Kw`` CSV or a Parquet file
+        with ``meter_id``, ``timestamp`` and ``kw`` columns, grouped by meter,
+        returning NDJSON lines that are produced as each meter's readings end.
+        The tariff is validated and the body spooled to disk before anything is
+        streamed, so memory stays bounded whatever the upload size. The lines
+        remove the spooled body once they end, however they end; the returned
+        cleanup removes it when they are never iterated.
+        """
+        if file_format not in ("csv", "parquet"):
+            raise IllegalArgumentError(f"Unsupported meter data format {file_format}")
+        if file_format == "parquet" and not streaming.parquet_available():
+            logger.warning("Parquet upload rejected, the 'parquet' extra is missing")
+            raise NotEnabledError()
+        tariff = await self.get_power_tariff(uid)
+        engine.compile_for(tariff, fuse)
+        path = await _spool(body, suffix=f".{file_format}")
+        chunks = streaming.iter_file_chunks(
+            path, env.get_calculation_stream_chunk_rows()
+        )
+
+        async def lines() -> AsyncIterator[bytes]:
+            try:
+                async for meter_id, result in streaming.stream_power_fees(
+                    tariff, chunks, fuse
+                ):
+                    yield (
+                        _meter_power_fee(meter_id, result)
+                        .model_dump_json(by_alias=True)
+                        .encode()
+                        + b"\n"
+                    )
+            except IllegalArgumentError as e:
+                # The response has started, so the error ends the stream instead
+                logger.warning(f"Power fee stream for tariff {uid} stopped: {e}")
+                yield json.dumps({"detail": str(e)}).encode() + b"\n"
+            finally:
+                _discard(path)
+
+        return lines(), partial(_discard, path)
+
+    async def compare_power_fees(
+        self,
+        country_code: str,
+        mga_code: str,
+        request: PowerFeeRequestSpec,
+        building_type: BuildingType | None = None,
+    ) -> PowerTariffComparisonSpec:
+        """
+        Price a load series under every tariff of a metering grid area in one pass,
+        ranked by total fee including VAT. A building type keeps the tariffs for that
+        type and for all buildings.
+        """
+        tariffs = _for_building_type(
+            await self.get_power_tariffs_by_mga(country_code, mga_code), building_type
+        )
+        timestamps = _request_timestamps(request, len(request.kw))
+        kw = np.array(request.kw, dtype=np.float64)
+        comparison = await asyncio.to_thread(
+            engine.compare_power_fees, tariffs, timestamps, kw, request.fuse
+        )
+        priced = sorted(
+            comparison.priced, key=lambda priced: float(priced[1].fee_inc_vat.sum())
+        )
+        return PowerTariffComparisonSpec(
+            mga_code=mga_code,
+            fuse=request.fuse,
+            tariffs=[
+                RankedPowerFeeSpec(
+                    rank=rank,
+                    tariff_uid=tariff.uid,
+                    name=tariff.name,
+                    model=tariff.model,
+                    building_type=tariff.building_type,
+                    months=_monthly_fees(result),
+                    total_exc_vat=round(float(result.fee_exc_vat.sum()), 2),
+                    total_inc_vat=round(float(result.fee_inc_vat.sum()), 2),
+                )
+                for rank, (tariff, result) in enumerate(priced, start=1)
+            ],
+            skipped=[
+                SkippedTariffSpec(
+                    tariff_uid=tariff.uid, name=tariff.name, reason=reason
+                )
+                for tariff, reason in comparison.skipped
+            ],
+        )
+
+    async def get_time_of_use_curve(
+        self,
+        uid: str,
+        start: date,
+        end: date,
+        fuse: str | None = None,
+        resolution_minutes: int = 60,
+    ) -> TimeOfUseCurveSpec:
+        """
+        Get the effective power price and multiplier of a tariff per hour or quarter
+        hour between local midnights of two dates.
+        """
+        curve = await self._time_of_use_curve(uid, start, end, fuse, resolution_minutes)
+        return TimeOfUseCurveSpec(
+            tariff_uid=uid,
+            fuse=fuse,
+            start=datetime.fromtimestamp(
+                int(curve.timestamps[0].astype(np.int64)), timezone.utc
+            ),
+            resolution_minutes=resolution_minutes,
+            price_exc_vat=curve.price_exc_vat.round(4).tolist(),
+            price_inc_vat=curve.price_inc_vat.round(4).tolist(),
+            multiplier=curve.multiplier.round(4).tolist(),
+        )
+
+    async def export_time_of_use_curve(
+        self,
+        uid: str,
+        start: date,
+        end: date,
+        fuse: str | None = None,
+        resolution_minutes: int = 60,
+    ) -> bytes:
+        """
+        Get a tariff's time-of-use curve as a structured .npy array.
+        """
+        curve = await self._time_of_use_curve(uid, start, end, fuse, resolution_minutes)
+        return curve.to_npy()
+
+    async def _time_of_use_curve(
+        self,
+        uid: str,
+        start: date,
+        end: date,
+        fuse: str | None,
+        resolution_minutes: int,
+    ) -> curves.TimeOfUseCurve:
+        tariff = await self.get_power_tariff(uid)
+        return await asyncio.to_thread(
+            curves.time_of_use_curve, tariff, start, end, fuse, resolution_minutes
+        )
+
+    async def simulate_power_fees(
+        self, uid: str, request: PowerFeeSimulationRequestSpec
+    ) -> PowerFeeSimulationSpec:
+        """
+        Simulate the power fee of perturbed copies of a load series, returning the
+        percentiles of the monthly and total fee. Scenarios are priced across the
+        calculation worker processes; a random seed is drawn unless one is given.
+        """
+        tariff = await self.get_power_tariff(uid)
+        seed = (
+            request.seed
+            if request.seed is not None
+            else int(np.random.default_rng().integers(2**31))
+        )
+        fees = await asyncio.to_thread(
+            simulation.simulate_power_fees,
+            tariff,
+            _request_timestamps(request, len(request.kw)),
+            np.array(request.kw, dtype=np.float64),
+            request.perturbation,
+            request.scenarios,
+            seed,
+            request.fuse,
+        )
+        monthly_exc, monthly_inc = fees.monthly_percentiles(request.percentiles)
+        total_exc, total_inc = fees.total_percentiles(request.percentiles)
+        return PowerFeeSimulationSpec(
+            tariff_uid=uid,
+            fuse=request.fuse,
+            scenarios=len(fees),
+            seed=seed,
+            months=[
+                SimulatedMonthSpec(
+                    year=year,
+                    month=month,
+                    percentiles=_fee_percentiles(
+                        request.percentiles, monthly_exc[:, i], monthly_inc[:, i]
+                    ),
+                )
+                for i, (year, month) in enumerate(fees.months)
+            ],
+            total=_fee_percentiles(request.percentiles, total_exc, total_inc),
+        )
+
+    async def optimize_battery(
+        self, uid: str, request: BatteryOptimizationRequestSpec
+    ) -> BatteryDispatchSpec:
+        """
+        Find the battery dispatch that minimizes a load series' power fee under a tariff.
+        The optimization runs in a worker thread to keep the event loop free.
+        """
+        return await _optimize_battery(await self.get_power_tariff(uid), request)
+
+    async def optimize_battery_by_mga(
+        self,
+        country_code: str,
+        mga_code: str,
+        request: BatteryOptimizationRequestSpec,
+        building_type: BuildingType | None = None,
+    ) -> BatteryDispatchSpec:
+        """
+        Optimize a battery under the tariff of a metering grid area that prices the
+        load's fuse and building type; several such tariffs must be told apart by uid.
+        """
+        tariffs = []
+        for tariff in _for_building_type(
+            await self.get_power_tariffs_by_mga(country_code, mga_code), building_type
+        ):
+            try:
+                engine.compile_for(tariff, request.fuse)
+            except IllegalArgumentError:
+                continue
+            tariffs.append(tariff)
+        if len(tariffs) != 1:
+            raise IllegalArgumentError(
+                f"{len(tariffs)} tariffs of mga {mga_code} price the load, "
+                f"pick one by uid: {', '.join(t.uid for t in tariffs)}"
+                if tariffs
+                else f"No tariff of mga {mga_code} prices the load"
+            )
+        return await _optimize_battery(tariffs[0], request)
+
+    async def add_live_readings(
+        self, meter_id: str, request: LiveReadingsRequestSpec
+    ) -> LivePowerFeeSpec:
+        """
+        Add readings to a live meter and return its month-to-date fee, with the
+        number of readings ignored as already added. The meter's peaks restart
+        when its tariff, tariff version, fuse or resolution changes.
+        """
+        tariff = await self.get_power_tariff(request.tariff_uid)
+        tracker = live.trackers.get_or_create(
+            meter_id, tariff, request.fuse, request.resolution_minutes
+        )
+        ignored = tracker.add(
+            np.array(
+                [_epoch_seconds(r.timestamp) for r in request.readings],
+                dtype="datetime64[s]",
+            ),
+            np.array([r.kw for r in request.readings], dtype=np.float64),
+        )
+        if ignored:
+            logger.info(f"Ignored {ignored} already added readings of meter {meter_id}")
+        return _live_power_fee(meter_id, tracker).model_copy(
+            update={"ignored_readings": ignored}
+        )
+
+    async def get_live_power_fee(self, meter_id: str) -> LivePowerFeeSpec:
+        return _live_power_fee(meter_id, live.trackers.get(meter_id))
+
+    async def get_live_state(self, meter_id: str) -> dict:
+        return live.trackers.get(meter_id).to_state()
+
+    async def restore_live_state(self, meter_id: str, state: dict) -> LivePowerFeeSpec:
+        """Restore a live meter from a checkpoint taken with get_live_state."""
+        uid = state.get("tariffUid")
+        if not isinstance(uid, str) or "lastUpdated" not in state:
+            raise IllegalArgumentError("State requires tariffUid and lastUpdated")
+        tracker = live.PeakTracker.from_state(await self.get_power_tariff(uid), state)
+        live.trackers.put(meter_id, tracker)
+        return _live_power_fee(meter_id, tracker)
+
+    async def remove_live_meter(self, meter_id: str) -> None:
+        live.trackers.remove(meter_id)
+
     async def get_grid_operators(self) -> list[GridOperatorSpec]:
         """
         Get all grid operators.
@@ -54,32 +528,239 @@ class PowerTariffService:
         return await self.repository.fetch_power_tariff_by_provider_name(name)
 
     async def get_power_tariffs_by_address(
-        self, country_code: str, address, city
+        self, country_code: str, address, city, deadline: Deadline | None = None
     ) -> list[PowerTariffSpec]:
         """
         Get a specific power tariff by its postal address.
         """
-        area = await elomraden.get_area_by_address(address, city)
+        area = await elomraden.get_area_by_address(address, city, deadline)
         return await self.get_power_tariffs_by_mga(
             country_code=country_code, mga_code=area.area_code
         )
 
     async def get_power_tariffs_by_coordinates(
-        self, country_code: str, lat: float, long: float
+        self,
+        country_code: str,
+        lat: float,
+        long: float,
+        deadline: Deadline | None = None,
     ) -> list[PowerTariffSpec]:
         """
-        Get a specific power tariff by its postal code.
+        Get a specific power tariff by its coordinates.
+        Resolved from local MGA boundaries when loaded, falling back to Elomraden
+        for points near borders or outside coverage.
         """
-        area = await elomraden.get_area_by_coordinates(lat=str(lat), lon=str(long))
+        resolver = mga_resolver.current()
+        mga_code = resolver.resolve(lat, long) if resolver else None
+        if mga_code is None:
+            area = await elomraden.get_area_by_coordinates(
+                lat=str(lat), lon=str(long), deadline=deadline
+            )
+            mga_code = area.area_code
         return await self.get_power_tariffs_by_mga(
-            country_code=country_code, mga_code=area.area_code
+            country_code=country_code, mga_code=mga_code
         )
 
     async def get_tariff_by_postal_code(
-        self, country_code, postal_code
+        self, country_code, postal_code, deadline: Deadline | None = None
     ) -> list[PowerTariffSpec]:
         """
         Get a specific power tariff by its postal code.
         """
-        area = await elomraden.get_area_by_postnumber(postal_code)
+        area = await self.resolve_postal_code(postal_code, deadline)
         return await self.get_power_tariffs_by_mga(country_code, area.area_code)
+
+    async def render_power_tariffs_by_postal_code(
+        self,
+        country_code,
+        postal_code,
+        deadline: Deadline | None = None,
+        fuse: str | None = None,
+    ) -> RenderedResponse:
+        """
+        Get the encoded JSON response for the power tariffs of a postal code.
+        Shares the rendered responses of its metering grid area.
+        """
+        area = await self.resolve_postal_code(postal_code, deadline)
+        return await self.render_power_tariffs_by_mga(
+            country_code, area.area_code, fuse
+        )
+
+    async def resolve_postal_code(
+        self,
+        postal_code: int,
+        deadline: Deadline | None = None,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> GridArea:
+        """
+        Resolve the grid area of a postal code from the in-memory area cache, then
+        from stored resolutions, and only call Elomraden when neither has it. Stored
+        resolutions are written back to the area cache. One older than the max age
+        is still served, and refreshed from Elomraden in the background.
+        """
+        found, area = elomraden.cached_area_by_postnumber(postal_code)
+        if found:
+            return area
+
+        stored = await self.repository.get_postal_code_area(postal_code)
+        if stored is not None:
+            area, fetched_at = stored
+            elomraden.cache_area_by_postnumber(postal_code, area)
+            max_age = timedelta(days=env.get_postal_code_area_max_age_days())
+            if datetime.now(timezone.utc) - fetched_at >= max_age:
+                postal_code_refresher.schedule(
+                    postal_code,
+                    lambda: elomraden.refresh_area_by_postnumber(postal_code),
+                    lambda fresh: self._save_postal_code_area(postal_code, fresh),
+                )
+            return area
+
+        area = await elomraden.get_area_by_postnumber(postal_code, deadline, priority)
+        await self._save_postal_code_area(postal_code, area)
+        return area
+
+    async def _save_postal_code_area(self, postal_code: int, area: GridArea | None):
+        if area is not None:
+            await self.repository.save_postal_code_area(postal_code, area)
+
+
+def _epoch_seconds(timestamp: datetime) -> int:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return int(timestamp.timestamp())
+
+
+def _request_timestamps(
+    request: PowerFeeRequestSpec | PowerFeeBatchRequestSpec, n_readings: int
+) -> np.ndarray:
+    """UTC timestamps of a request's readings, given as ``timestamps`` or periods from ``start``."""
+    if request.timestamps is not None:
+        return np.array(
+            [_epoch_seconds(t) for t in request.timestamps], dtype="datetime64[s]"
+        )
+    return np.datetime64(_epoch_seconds(request.start), "s") + np.arange(
+        n_readings
+    ) * np.timedelta64(request.resolution_minutes, "m")
+
+
+def _for_building_type(
+    tariffs: list[PowerTariffSpec], building_type: BuildingType | None
+) -> list[PowerTariffSpec]:
+    """The tariffs for a building type and for all buildings."""
+    if building_type is None or building_type == BuildingType.ALL:
+        return tariffs
+    return [t for t in tariffs if t.building_type in (building_type, BuildingType.ALL)]
+
+
+async def _optimize_battery(
+    tariff: PowerTariffSpec, request: BatteryOptimizationRequestSpec
+) -> BatteryDispatchSpec:
+    dispatch = await asyncio.to_thread(
+        battery.optimize_battery,
+        tariff,
+        _request_timestamps(request, len(request.kw)),
+        np.array(request.kw, dtype=np.float64),
+        request.capacity_kwh,
+        request.power_kw,
+        request.round_trip_efficiency,
+        request.fuse,
+        request.initial_charge_kwh,
+    )
+    without, with_battery = dispatch.without, dispatch.with_battery
+    saving_exc = without.fee_exc_vat - with_battery.fee_exc_vat
+    saving_inc = without.fee_inc_vat - with_battery.fee_inc_vat
+    return BatteryDispatchSpec(
+        tariff_uid=tariff.uid,
+        fuse=request.fuse,
+        months=[
+            BatteryMonthSpec(
+                year=year,
+                month=month,
+                peak_cap_kw=None
+                if np.isnan(dispatch.peak_caps[i])
+                else round(float(dispatch.peak_caps[i]), 3),
+                billed_kw=with_battery.billed_kw[:, i].round(3).tolist(),
+                fee_exc_vat=round(float(with_battery.fee_exc_vat[i]), 2),
+                fee_inc_vat=round(float(with_battery.fee_inc_vat[i]), 2),
+                saving_exc_vat=round(float(saving_exc[i]), 2),
+                saving_inc_vat=round(float(saving_inc[i]), 2),
+            )
+            for i, (year, month) in enumerate(with_battery.months)
+        ],
+        total_saving_exc_vat=round(float(saving_exc.sum()), 2),
+        total_saving_inc_vat=round(float(saving_inc.sum()), 2),
+        timestamps=[
+            datetime.fromtimestamp(int(t), timezone.utc)
+            for t in dispatch.timestamps.astype(np.int64)
+        ],
+        grid_kw=[
+            None if np.isnan(kw) else kw for kw in dispatch.grid_kw.round(3).tolist()
+        ],
+        battery_kw=dispatch.battery_kw.round(3).tolist(),
+        charge_kwh=dispatch.charge_kwh.round(3).tolist(),
+    )
+
+
+def _fee_percentiles(
+    percentiles: list[float], fee_exc_vat: np.ndarray, fee_inc_vat: np.ndarray
+) -> list[FeePercentileSpec]:
+    return [
+        FeePercentileSpec(
+            percentile=percentile,
+            fee_exc_vat=round(float(exc), 2),
+            fee_inc_vat=round(float(inc), 2),
+        )
+        for percentile, exc, inc in zip(percentiles, fee_exc_vat, fee_inc_vat)
+    ]
+
+
+def _monthly_fees(result: engine.PowerFeeResult) -> list[MonthlyPowerFeeSpec]:
+    return [
+        MonthlyPowerFeeSpec(
+            year=year,
+            month=month,
+            billed_kw=result.billed_kw[:, i].round(3).tolist(),
+            fee_exc_vat=round(float(result.fee_exc_vat[i]), 2),
+            fee_inc_vat=round(float(result.fee_inc_vat[i]), 2),
+        )
+        for i, (year, month) in enumerate(result.months)
+    ]
+
+
+def _meter_power_fee(meter_id: str, result: engine.PowerFeeResult) -> MeterPowerFeeSpec:
+    return MeterPowerFeeSpec(
+        meter_id=meter_id,
+        months=_monthly_fees(result),
+        total_exc_vat=round(float(result.fee_exc_vat.sum()), 2),
+        total_inc_vat=round(float(result.fee_inc_vat.sum()), 2),
+    )
+
+
+async def _spool(body: AsyncIterator[bytes], suffix: str) -> str:
+    """Writes a streamed body to a temporary file, returning its path."""
+    file = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+    try:
+        async for data in body:
+            await asyncio.to_thread(file.write, data)
+    except BaseException:
+        file.close()
+        os.unlink(file.name)
+        raise
+    file.close()
+    return file.name
+
+
+def _discard(path: str) -> None:
+    """Removes a spooled file, if still there."""
+    with suppress(FileNotFoundError):
+        os.unlink(path)
+
+
+def _live_power_fee(meter_id: str, tracker: live.PeakTracker) -> LivePowerFeeSpec:
+    return LivePowerFeeSpec(
+        meter_id=meter_id,
+        tariff_uid=tracker.tariff_uid,
+        fuse=tracker.fuse,
+        last_reading=tracker.last_reading,
+        month_to_date=_monthly_fees(tracker.month_to_date())[0],
+    )
@@ -1,5 +1,7 @@
 from sqlalchemy import (
     Column,
+    Float,
+    Index,
     Integer,
     String,
     DateTime,
@@ -63,10 +65,90 @@ class PowerTariff(BaseSQLModel):
         cascade="all, delete-orphan",
     )
 
+    # Typed copy of ``compositions`` for filtering in SQL
+    composition_rows: Mapped[list["PowerTariffComposition"]] = relationship(
+        "PowerTariffComposition",
+        back_populates="power_tariff",
+        cascade="all, delete-orphan",
+        order_by="PowerTariffComposition.position",
+    )
+
     def __repr__(self):
         return f"<PowerTariff(id={self.uid}, name='{self.name}')>"
 
 
+class PowerTariffComposition(BaseSQLModel):
+    """One of a tariff's compositions as a typed row.
+
+    ``position`` is its index in ``PowerTariff.compositions``. Months and days
+    are bitmasks, bit 0 being January and Monday; an empty lower fuse bound is
+    0A and an empty upper bound is NULL, i.e. unbounded.
+    """
+
+    __tablename__ = "power_tariff_compositions"
+    __table_args__ = (
+        Index(
+            "ix_power_tariff_compositions_fuse",
+            "fuse_from_amperes",
+            "fuse_to_amperes",
+        ),
+        Index("ix_power_tariff_compositions_unit_price", "unit", "price_exc_vat"),
+    )
+
+    uid = Column(UUID, primary_key=True, default=uuid7)
+    tariff_uid = Column(
+        UUID,
+        ForeignKey("power_tariffs.uid", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    position = Column(Integer, nullable=False)
+    months = Column(Integer, nullable=False)
+    days = Column(Integer, nullable=False)
+    fuse_from = Column(String(50), nullable=False)
+    fuse_to = Column(String(50), nullable=False)
+    fuse_from_amperes = Column(Float, nullable=False)
+    fuse_to_amperes = Column(Float, nullable=True)
+    unit = Column(String(20), nullable=False)
+    price_exc_vat = Column(Float, nullable=False)
+    price_inc_vat = Column(Float, nullable=False)
+
+    power_tariff: Mapped["PowerTariff"] = relationship(
+        "PowerTariff", back_populates="composition_rows"
+    )
+    intervals: Mapped[list["PowerTariffInterval"]] = relationship(
+        "PowerTariffInterval",
+        back_populates="composition",
+        cascade="all, delete-orphan",
+    )
+
+    def __repr__(self):
+        return f"<PowerTariffComposition(uid={self.uid}, tariff_uid='{self.tariff_uid}', position={self.position})>"
+
+
+class PowerTariffInterval(BaseSQLModel):
+    """A time interval of a composition, with its bounds in minutes of the local day."""
+
+    __tablename__ = "power_tariff_intervals"
+
+    uid = Column(UUID, primary_key=True, default=uuid7)
+    composition_uid = Column(
+        UUID,
+        ForeignKey("power_tariff_compositions.uid", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    from_time = Column(String(10), nullable=False)
+    to_time = Column(String(10), nullable=False)
+    from_minute = Column(Integer, nullable=False)
+    to_minute = Column(Integer, nullable=False)
+    multiplier = Column(Float, nullable=False)
+
+    composition: Mapped["PowerTariffComposition"] = relationship(
+        "PowerTariffComposition", back_populates="intervals"
+    )
+
+
 class MeteringGridArea(BaseSQLModel):
     __tablename__ = "metering_grid_areas"
 
@@ -112,3 +194,17 @@ class MeteringGridAreaByPowerTariffs(BaseSQLModel):
 
     def __repr__(self):
         return f"<MeteringAreaByPowerTariffs(uid={self.uid}, mga_code='{self.mga_code}', tariff_uid='{self.tariff_uid}')>"
+
+
+class PostalCodeArea(BaseSQLModel):
+    __tablename__ = "postal_code_areas"
+
+    postal_code = Column(Integer, primary_key=True)
+    mga_code = Column(String(50), nullable=False)
+    grid_area = Column(JSON, nullable=False)
+    fetched_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    def __repr__(self):
+        return f"<PostalCodeArea(postal_code={self.postal_code}, mga_code='{self.mga_code}')>"
@@ -1,17 +1,30 @@
+from datetime import datetime, timezone
 from uuid import UUID
 
 from engrate_sdk.utils import uuid
-from sqlalchemy import select, Sequence
+from sqlalchemy import or_, select, Sequence
+from sqlalchemy.dialects.postgresql import array_agg, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from src.calculation.plan import DAYS, MONTHS, minutes
+from src.clients.elomraden_model import GridArea
 from src.repositories.orm_model import (
     MeteringGridArea,
     MeteringGridAreaByPowerTariffs,
+    PostalCodeArea,
+    PowerTariffComposition,
+    PowerTariffInterval,
 )
 from src.db import with_session
-from src.exceptions import UnexpectedValue
-from src.model import GridOperatorSpec, PowerTariffSpec, MeteringGridAreaSpec
+from src.exceptions import IllegalArgumentError, MissingError, UnexpectedValue
+from src.fuse_index import composition_amperes
+from src.model import (
+    GridOperatorSpec,
+    PowerTariffSpec,
+    MeteringGridAreaSpec,
+    TariffCompositionSpec,
+)
 from src.repositories.orm_model import GridOperator, PowerTariff
 
 
@@ -65,12 +78,25 @@ class PowerTariffRepository:
         self, country_code: str, mga_code: str, session: AsyncSession
     ) -> list[PowerTariffSpec]:
         """Get a specific power tariff by its metering grid area (MGA) code."""
+        by_mga = await self.get_power_tariffs_by_mgas(
+            country_code, [mga_code], session=session
+        )
+        return by_mga[mga_code]
+
+    @with_session
+    async def get_power_tariffs_by_mgas(
+        self, country_code: str, mga_codes: list[str], session: AsyncSession
+    ) -> dict[str, list[PowerTariffSpec]]:
+        """Get the power tariffs of many metering grid areas with a single query.
+
+        Codes without tariffs map to an empty list.
+        """
         query = (
             select(MeteringGridAreaByPowerTariffs)
             .join(MeteringGridArea)
             .join(PowerTariff)
             .where(country_code == MeteringGridArea.country_code)
-            .where(MeteringGridArea.code == mga_code)
+            .where(MeteringGridArea.code.in_(mga_codes))
             .options(
                 selectinload(
                     MeteringGridAreaByPowerTariffs.metering_grid_area
@@ -83,17 +109,139 @@ class PowerTariffRepository:
         mga_by_power_tariff: Sequence[MeteringGridAreaByPowerTariffs] = (
             result.scalars().all()
         )
+        grouped = PowerTariffRepository.group_power_tariffs_by_mga(mga_by_power_tariff)
+        return {code: grouped.get((country_code, code), []) for code in mga_codes}
+
+    @with_session
+    async def list_power_tariffs_by_mga(
+        self, session: AsyncSession
+    ) -> dict[tuple[str, str], list[PowerTariffSpec]]:
+        """Fetches every power tariff grouped by (country code, MGA code)."""
+        result = await session.execute(
+            select(MeteringGridAreaByPowerTariffs).options(
+                selectinload(
+                    MeteringGridAreaByPowerTariffs.metering_grid_area
+                ).selectinload(MeteringGridArea.grid_operator),
+                selectinload(MeteringGridAreaByPowerTariffs.power_tariff),
+            )
+        )
+        return PowerTariffRepository.group_power_tariffs_by_mga(result.scalars().all())
 
-        result = []
-        for mgbpt in mga_by_power_tariff:
-            power_tariff: PowerTariff = mgbpt.power_tariff
-            mga = mgbpt.metering_grid_area
-            result.append(
-                PowerTariffRepository.power_tariff_to_spec(
-                    power_tariff, [PowerTariffRepository.mga_to_spec(mga)]
+    @with_session
+    async def get_power_tariff_by_uid(
+        self, uid: str, session: AsyncSession
+    ) -> PowerTariffSpec:
+        """Get a power tariff by its uid, with all its metering grid areas."""
+        try:
+            tariff_uid = UUID(uid)
+        except ValueError:
+            raise MissingError("power tariff", uid)
+        result = await session.execute(
+            select(PowerTariff)
+            .where(PowerTariff.uid == tariff_uid)
+            .options(
+                selectinload(PowerTariff.metering_grid_areas).selectinload(
+                    MeteringGridArea.grid_operator
                 )
             )
-        return result
+        )
+        tariff = result.scalars().one_or_none()
+        if tariff is None:
+            raise MissingError("power tariff", uid)
+        return PowerTariffRepository.power_tariff_to_spec(
+            tariff,
+            [PowerTariffRepository.mga_to_spec(m) for m in tariff.metering_grid_areas],
+        )
+
+    @with_session
+    async def search_power_tariffs(
+        self,
+        country_code: str,
+        session: AsyncSession,
+        metering_business_area: str | None = None,
+        mga_code: str | None = None,
+        fuse_amperes: float | None = None,
+        month: str | None = None,
+        day: str | None = None,
+        unit: str | None = None,
+        max_price_exc_vat: float | None = None,
+    ) -> list[PowerTariffSpec]:
+        """Finds the tariffs with compositions matching every given filter, in SQL.
+
+        A single statement joins the MGA associations to the typed composition rows,
+        so the area and composition filters apply together, and aggregates the
+        matching composition positions per association. Each tariff is returned
+        once per metering grid area, narrowed to its matching compositions.
+        """
+        query = (
+            select(
+                MeteringGridAreaByPowerTariffs,
+                array_agg(PowerTariffComposition.position),
+            )
+            .join(MeteringGridArea)
+            .join(
+                PowerTariffComposition,
+                PowerTariffComposition.tariff_uid
+                == MeteringGridAreaByPowerTariffs.tariff_uid,
+            )
+            .where(country_code == MeteringGridArea.country_code)
+            .group_by(MeteringGridAreaByPowerTariffs.uid)
+            .options(
+                selectinload(
+                    MeteringGridAreaByPowerTariffs.metering_grid_area
+                ).selectinload(MeteringGridArea.grid_operator),
+                selectinload(MeteringGridAreaByPowerTariffs.power_tariff),
+            )
+        )
+        if metering_business_area is not None:
+            query = query.where(
+                MeteringGridArea.metering_business_area == metering_business_area
+            )
+        if mga_code is not None:
+            query = query.where(MeteringGridArea.code == mga_code)
+        if fuse_amperes is not None:
+            query = query.where(
+                PowerTariffComposition.fuse_from_amperes <= fuse_amperes
+            ).where(
+                or_(
+                    PowerTariffComposition.fuse_to_amperes.is_(None),
+                    PowerTariffComposition.fuse_to_amperes >= fuse_amperes,
+                )
+            )
+        if month is not None:
+            query = query.where(
+                PowerTariffComposition.months.op("&")(mask_of([month], MONTHS)) != 0
+            )
+        if day is not None:
+            query = query.where(
+                PowerTariffComposition.days.op("&")(mask_of([day], DAYS)) != 0
+            )
+        if unit is not None:
+            query = query.where(PowerTariffComposition.unit == unit)
+        if max_price_exc_vat is not None:
+            query = query.where(
+                PowerTariffComposition.price_exc_vat <= max_price_exc_vat
+            )
+        rows = (await session.execute(query)).all()
+        positions = {
+            association.tariff_uid: set(matching) for association, matching in rows
+        }
+        grouped = PowerTariffRepository.group_power_tariffs_by_mga(
+            [association for association, _ in rows]
+        )
+        return [
+            tariff.model_copy(
+                update={
+                    "compositions": [
+                        composition
+                        for i, composition in enumerate(tariff.compositions)
+                        if i in positions[UUID(tariff.uid)]
+                    ]
+                }
+            )
+            for _, tariffs in sorted(grouped.items())
+            for tariff in tariffs
+        ]
 
     @with_session
     async def fetch_power_tariff_by_provider_name(
@@ -148,6 +296,11 @@ class PowerTariffRepository:
         )
         session.add(tariff)
         await session.flush()
+        session.add_all(
+            PowerTariffRepository.composition_rows(
+                tariff.uid, power_tariff.compositions
+            )
+        )
 
         mga_associations = []
         for mga_spec in power_tariff.metering_grid_areas:
@@ -255,6 +408,38 @@ class PowerTariffRepository:
         await session.refresh(db_mga, ["grid_operator", "power_tariffs"])
         return PowerTariffRepository.mga_to_spec(db_mga)
 
+    @with_session
+    async def get_postal_code_area(
+        self, postal_code: int, session: AsyncSession
+    ) -> tuple[GridArea, datetime] | None:
+        """Get the stored grid area resolution of a postal code and when it was fetched."""
+        result = await session.execute(
+            select(PostalCodeArea).where(PostalCodeArea.postal_code == postal_code)
+        )
+        row = result.scalars().one_or_none()
+        if row is None:
+            return None
+        return GridArea.model_validate(row.grid_area), row.fetched_at
+
+    @with_session
+    async def save_postal_code_area(
+        self, postal_code: int, area: GridArea, session: AsyncSession
+    ) -> None:
+        """Stores (or refreshes) the grid area resolution of a postal code."""
+        values = {
+            "postal_code": postal_code,
+            "mga_code": area.area_code,
+            "grid_area": area.model_dump(mode="json"),
+            "fetched_at": datetime.now(timezone.utc),
+        }
+        statement = insert(PostalCodeArea).values(**values)
+        await session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[PostalCodeArea.postal_code],
+                set_={k: statement.excluded[k] for k in values if k != "postal_code"},
+            )
+        )
+
     @staticmethod
     def operator_as_spec(grid_operator: GridOperator) -> GridOperatorSpec:
         """Converts a GridOperator ORM object to a GridOperatorSpec."""
@@ -302,6 +487,74 @@ class PowerTariffRepository:
         )
         return tariff_spec
 
+    @staticmethod
+    def composition_rows(
+        tariff_uid: UUID, compositions: list[TariffCompositionSpec]
+    ) -> list[PowerTariffComposition]:
+        """Typed rows of a tariff's compositions, kept next to the JSON column."""
+        rows = []
+        for position, composition in enumerate(compositions):
+            fuse_from_amperes, fuse_to_amperes = composition_amperes(composition)
+            rows.append(
+                PowerTariffComposition(
+                    tariff_uid=tariff_uid,
+                    position=position,
+                    months=mask_of(composition.months, MONTHS),
+                    days=mask_of(composition.days, DAYS),
+                    fuse_from=composition.fuse_from,
+                    fuse_to=composition.fuse_to,
+                    fuse_from_amperes=fuse_from_amperes,
+                    fuse_to_amperes=None
+                    if fuse_to_amperes == float("inf")
+                    else fuse_to_amperes,
+                    unit=composition.unit,
+                    price_exc_vat=composition.price_exc_vat,
+                    price_inc_vat=composition.price_inc_vat,
+                    intervals=[
+                        PowerTariffInterval(
+                            from_time=interval.from_time,
+                            to_time=interval.to_time,
+                            from_minute=minutes(interval.from_time),
+                            to_minute=minutes(interval.to_time),
+                            multiplier=interval.multiplier,
+                        )
+                        for interval in composition.intervals
+                    ],
+                )
+            )
+        return rows
+
+    @staticmethod
+    def group_power_tariffs_by_mga(
+        associations: Sequence[MeteringGridAreaByPowerTariffs],
+    ) -> dict[tuple[str, str], list[PowerTariffSpec]]:
+        """Groups MGA/tariff associations by (country code, MGA code).
+
+        Every tariff and MGA is converted to a spec once; a tariff shared by many
+        MGAs is copied per MGA only to attach that MGA.
+        """
+        mgas: dict[tuple[str, str], MeteringGridAreaSpec] = {}
+        tariffs: dict[UUID, PowerTariffSpec] = {}
+        grouped: dict[tuple[str, str], list[PowerTariffSpec]] = {}
+        for association in associations:
+            mga = association.metering_grid_area
+            key = (mga.country_code, mga.code)
+            mga_spec = mgas.get(key)
+            if mga_spec is None:
+                mga_spec = mgas[key] = PowerTariffRepository.mga_to_spec(mga)
+
+            power_tariff = association.power_tariff
+            tariff_spec = tariffs.get(power_tariff.uid)
+            if tariff_spec is None:
+                tariff_spec = tariffs[power_tariff.uid] = (
+                    PowerTariffRepository.power_tariff_to_spec(power_tariff, [])
+                )
+
+            grouped.setdefault(key, []).append(
+                tariff_spec.model_copy(update={"metering_grid_areas": [mga_spec]})
+            )
+        return grouped
+
     @staticmethod
     def mga_to_spec(mga: MeteringGridArea) -> MeteringGridAreaSpec:
         operator_spec: GridOperatorSpec = (
@@ -318,4 +571,15 @@ class PowerTariffRepository:
         )
 
 
+def mask_of(names: list[str], all_names: list[str]) -> int:
+    """Bitmask of month or day names, bit i being ``all_names[i]``, e.g. MONTHS."""
+    mask = 0
+    for name in names:
+        try:
+            mask |= 1 << all_names.index(name.lower())
+        except ValueError:
+            raise IllegalArgumentError(f"Invalid month or day {name}")
+    return mask
+
+
 repository = PowerTariffRepository()
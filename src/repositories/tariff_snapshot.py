@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+from types import MappingProxyType
+
+from engrate_sdk.utils import log
+
+from src.exceptions import MissingError
+from src.fuse_index import FuseIndex
+from src.model import PowerTariffSpec
+from src.repositories.power_tariffs_repository import repository
+
+logger = log.get_logger(__name__)
+
+
+class TariffSnapshot:
+    """Immutable in-process index of every power tariff by (country code, MGA code) and uid.
+
+    A snapshot is never modified once built; new data is published by building a
+    new snapshot and swapping the module reference. The fuse index of every tariff
+    is built once here, keyed by uid.
+    """
+
+    __slots__ = ("_by_mga", "_by_uid", "fuse_indexes", "version", "loaded_at")
+
+    def __init__(
+        self, by_mga: dict[tuple[str, str], list[PowerTariffSpec]], version: int
+    ):
+        self._by_mga = MappingProxyType(
+            {key: tuple(tariffs) for key, tariffs in by_mga.items()}
+        )
+        # The per-MGA copies of a tariff only carry their own MGA, merge them back
+        by_uid: dict[str, PowerTariffSpec] = {}
+        for tariffs in by_mga.values():
+            for tariff in tariffs:
+                if (merged := by_uid.get(tariff.uid)) is None:
+                    by_uid[tariff.uid] = tariff.model_copy(
+                        update={"metering_grid_areas": list(tariff.metering_grid_areas)}
+                    )
+                else:
+                    merged.metering_grid_areas.extend(tariff.metering_grid_areas)
+        self._by_uid = MappingProxyType(by_uid)
+        self.fuse_indexes = MappingProxyType(
+            {uid: FuseIndex(tariff.compositions) for uid, tariff in by_uid.items()}
+        )
+        self.version = version
+        self.loaded_at = datetime.now(timezone.utc)
+
+    def get_power_tariffs_by_mga(
+        self, country_code: str, mga_code: str
+    ) -> list[PowerTariffSpec]:
+        """Returns the power tariffs of a metering grid area, empty if unknown."""
+        return list(self._by_mga.get((country_code, mga_code), ()))
+
+    def get_power_tariff_by_uid(self, uid: str) -> PowerTariffSpec:
+        """Returns a power tariff by its uid, raising MissingError if unknown."""
+        tariff = self._by_uid.get(uid)
+        if tariff is None:
+            raise MissingError("power tariff", uid)
+        return tariff
+
+    def __len__(self) -> int:
+        return len(self._by_mga)
+
+
+_current: TariffSnapshot | None = None
+
+
+def current() -> TariffSnapshot | None:
+    """Returns the published snapshot, or None when snapshot mode is not active."""
+    return _current
+
+
+async def load() -> TariffSnapshot:
+    """Loads the tariff dataset from the database and publishes it as the current snapshot."""
+    global _current
+    by_mga = await repository.list_power_tariffs_by_mga()
+    snapshot = TariffSnapshot(by_mga, version=_current.version + 1 if _current else 1)
+    # A single reference assignment: readers see either the old or the new snapshot.
+    _current = snapshot
+    logger.info(
+        f"Tariff snapshot v{snapshot.version} loaded with {len(snapshot)} metering grid areas"
+    )
+    return snapshot
@@ -0,0 +1,73 @@
+import hashlib
+from collections import OrderedDict
+from typing import Hashable
+
+from pydantic import TypeAdapter
+
+from src import env
+from src.model import PowerTariffSpec
+
+_power_tariffs_adapter = TypeAdapter(list[PowerTariffSpec])
+
+
+class RenderedResponse:
+    """Fully encoded JSON body together with its strong ETag."""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+class RenderedResponseCache:
+    """Bounded LRU cache of rendered responses, scoped to a dataset version.
+
+    Entries are keyed by the dataset version they were rendered from, and
+    invalidating the cache bumps the version. A response rendered from data
+    read before an invalidation is therefore never stored.
+    """
+
+    def __init__(self, max_entries: int):
+        self._entries: OrderedDict[tuple, RenderedResponse] = OrderedDict()
+        self._max_entries = max_entries
+        self.version = 0
+
+    def get(self, key: Hashable) -> RenderedResponse | None:
+        entry = self._entries.get((self.version, key))
+        if entry is not None:
+            self._entries.move_to_end((self.version, key))
+        return entry
+
+    def put(self, key: Hashable, body: bytes, version: int) -> RenderedResponse:
+        """Stores a body rendered from the given dataset version and returns it."""
+        entry = RenderedResponse(body)
+        if version != self.version or self._max_entries <= 0:
+            return entry
+        self._entries[(version, key)] = entry
+        self._entries.move_to_end((version, key))
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self) -> None:
+        """Drops every entry and moves on to a new dataset version."""
+        self.version += 1
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def render_power_tariffs(tariffs: list[PowerTariffSpec]) -> bytes:
+    """Encodes power tariffs exactly like the API's response model does."""
+    return _power_tariffs_adapter.dump_json(tariffs, by_alias=True, exclude_none=True)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Checks an If-None-Match header against an ETag using weak comparison."""
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag.removeprefix("W/") for tag in candidates)
+
+
+rendered_responses = RenderedResponseCache(env.get_rendered_cache_max_entries())
@@ -1,7 +1,12 @@
 from engrate_sdk.utils import log
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
 
 from src import env
+from src.clients import elomraden
+from src.power_tariff_service import reload_tariff_data
+from src.repositories import tariff_snapshot
+from src.response_cache import rendered_responses
 
 logger = log.get_logger(__name__)
 router = APIRouter(
@@ -15,6 +20,20 @@ async def health_check():
     return {"status": "ok"}
 
 
+@router.get("/ready", response_model=dict, summary="Readiness endpoint")
+async def readiness_check(request: Request):
+    """Readiness endpoint, answering 503 until the startup warmup reaches its threshold."""
+    warmup = getattr(request.app.state, "warmup", None)
+    if warmup is None:
+        return {"status": "ready"}
+    if not warmup.is_ready():
+        return JSONResponse(
+            status_code=503,
+            content={"status": "warming_up", "warmup": warmup.as_dict()},
+        )
+    return {"status": "ready", "warmup": warmup.as_dict()}
+
+
 @router.get("/version", response_model=dict, summary="Version endpoint")
 async def version_check():
     """Version endpoint that reads version from pyproject.toml."""
@@ -33,3 +52,29 @@ async def version_check():
         raise HTTPException(status_code=409, detail="Could not determine version")
 
     return {"version": version}
+
+
+@router.post(
+    "/tariffs/reload",
+    response_model=dict,
+    summary="Publishes re-imported tariffs to the read path",
+)
+async def reload_tariffs():
+    """Rebuilds the tariff snapshot (when enabled) and invalidates rendered responses."""
+    await reload_tariff_data()
+    snapshot = tariff_snapshot.current()
+    return {
+        "snapshot_version": snapshot.version if snapshot else None,
+        "rendered_cache_version": rendered_responses.version,
+    }
+
+
+@router.get("/upstreams", response_model=dict, summary="Upstream circuit breakers")
+async def upstreams():
+    """Circuit breaker and rate limiter state of the upstream APIs."""
+    return {
+        "elomraden": {
+            "breaker": elomraden.breaker.stats(),
+            "rate_limit": elomraden.rate_limiter.stats(),
+        }
+    }
@@ -0,0 +1,254 @@
+from datetime import date
+from typing import Literal
+
+from engrate_sdk.utils import log
+from fastapi import APIRouter, Body, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from src.model import (
+    BatteryDispatchSpec,
+    BatteryOptimizationRequestSpec,
+    BuildingType,
+    LivePowerFeeSpec,
+    LiveReadingsRequestSpec,
+    PowerFeeBatchRequestSpec,
+    PowerFeeBatchSpec,
+    PowerFeeRequestSpec,
+    PowerFeeSimulationRequestSpec,
+    PowerFeeSimulationSpec,
+    PowerFeeSpec,
+    PowerTariffComparisonSpec,
+    TimeOfUseCurveSpec,
+)
+from src.utils import CountryCode, PowerTariffSvc
+
+logger = log.get_logger(__name__)
+router = APIRouter(
+    tags=["Power Fee Calculation API"], include_in_schema=True, prefix="/power-tariffs"
+)
+
+_PARQUET_MEDIA_TYPES = ("application/vnd.apache.parquet", "application/x-parquet")
+
+
+@router.post(
+    "/tariffs/{tariff_uid}/power-fee",
+    response_model=PowerFeeSpec,
+    summary="Calculates the monthly power fee of an hourly load series",
+    response_model_exclude_none=True,
+)
+async def calculate_power_fee(
+    power_tariffs_service: PowerTariffSvc,
+    tariff_uid: str,
+    request: PowerFeeRequestSpec,
+):
+    """Prices hourly kW readings under a power tariff, month by month"""
+    return await power_tariffs_service.calculate_power_fee(tariff_uid, request)
+
+
+@router.post(
+    "/tariffs/{tariff_uid}/power-fee/batch",
+    response_model=PowerFeeBatchSpec,
+    summary="Calculates the monthly power fees of many meters' hourly load series",
+    response_model_exclude_none=True,
+)
+async def calculate_power_fees(
+    power_tariffs_service: PowerTariffSvc,
+    tariff_uid: str,
+    request: PowerFeeBatchRequestSpec,
+):
+    """Prices hourly kW readings of many meters under a power tariff, sharded across worker processes"""
+    return await power_tariffs_service.calculate_power_fees(tariff_uid, request)
+
+
+@router.post(
+    "/tariffs/{tariff_uid}/power-fee/stream",
+    summary="Streams the monthly power fees of meters read from a CSV or Parquet body",
+    response_class=StreamingResponse,
+)
+async def stream_power_fees(
+    power_tariffs_service: PowerTariffSvc,
+    tariff_uid: str,
+    request: Request,
+    fuse: str | None = None,
+    format: Literal["csv", "parquet"] | None = None,
+):
+    """Prices a ``MeterId;Timestamp;Kw`` CSV body, or a Parquet body with
+    ``meter_id``, ``timestamp`` and ``kw`` columns, grouped by meter, hourly
+    readings with UTC timestamps. The format is taken from the Content-Type unless
+    given. Responds with one NDJSON line per meter as soon as its readings end.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip()
+        format = "parquet" if content_type in _PARQUET_MEDIA_TYPES else "csv"
+    lines, cleanup = await power_tariffs_service.stream_power_fees(
+        tariff_uid, request.stream(), fuse, format
+    )
+    return StreamingResponse(
+        lines,
+        media_type="application/x-ndjson",
+        background=BackgroundTask(cleanup),
+    )
+
+
+@router.post(
+    "/live/meters/{meter_id}/readings",
+    response_model=LivePowerFeeSpec,
+    summary="Adds readings to a live meter and returns its month-to-date power fee",
+    response_model_exclude_none=True,
+)
+async def add_live_readings(
+    power_tariffs_service: PowerTariffSvc,
+    meter_id: str,
+    request: LiveReadingsRequestSpec,
+):
+    """Updates the meter's running peaks with new hourly readings"""
+    return await power_tariffs_service.add_live_readings(meter_id, request)
+
+
+@router.get(
+    "/live/meters/{meter_id}",
+    response_model=LivePowerFeeSpec,
+    summary="Returns the month-to-date power fee of a live meter",
+    response_model_exclude_none=True,
+)
+async def get_live_power_fee(power_tariffs_service: PowerTariffSvc, meter_id: str):
+    """Reads the fee from the meter's running peaks, without recalculating"""
+    return await power_tariffs_service.get_live_power_fee(meter_id)
+
+
+@router.get(
+    "/live/meters/{meter_id}/state",
+    summary="Returns the serialized state of a live meter, for checkpoints",
+)
+async def get_live_state(power_tariffs_service: PowerTariffSvc, meter_id: str):
+    """The meter's running peaks per month, restorable with PUT"""
+    return await power_tariffs_service.get_live_state(meter_id)
+
+
+@router.put(
+    "/live/meters/{meter_id}/state",
+    response_model=LivePowerFeeSpec,
+    summary="Restores a live meter from a checkpoint",
+    response_model_exclude_none=True,
+)
+async def restore_live_state(
+    power_tariffs_service: PowerTariffSvc,
+    meter_id: str,
+    state: dict = Body(...),
+):
+    """Replaces the meter's running peaks with a state returned by GET"""
+    return await power_tariffs_service.restore_live_state(meter_id, state)
+
+
+@router.delete(
+    "/live/meters/{meter_id}",
+    status_code=204,
+    summary="Stops tracking a live meter",
+)
+async def remove_live_meter(power_tariffs_service: PowerTariffSvc, meter_id: str):
+    await power_tariffs_service.remove_live_meter(meter_id)
+
+
+@router.post(
+    "/{country_code}/mga/{mga_code}/power-fee/compare",
+    response_model=PowerTariffComparisonSpec,
+    summary="Ranks the tariffs of a grid area by the power fee of an hourly load series",
+    response_model_exclude_none=True,
+)
+async def compare_power_fees(
+    power_tariffs_service: PowerTariffSvc,
+    country_code: CountryCode,
+    mga_code: str,
+    request: PowerFeeRequestSpec,
+    building_type: BuildingType | None = None,
+):
+    """Prices the load under every applicable tariff of the mga in one pass, cheapest first"""
+    return await power_tariffs_service.compare_power_fees(
+        country_code, mga_code, request, building_type
+    )
+
+
+@router.get(
+    "/tariffs/{tariff_uid}/time-of-use",
+    response_model=TimeOfUseCurveSpec,
+    summary="Gets the effective power price of a tariff per hour or quarter hour",
+    response_model_exclude_none=True,
+    responses={200: {"content": {"application/octet-stream": {}}}},
+)
+async def get_time_of_use_curve(
+    power_tariffs_service: PowerTariffSvc,
+    tariff_uid: str,
+    start: date,
+    end: date,
+    fuse: str | None = None,
+    resolution_minutes: int = 60,
+    format: Literal["json", "npy"] = "json",
+):
+    """Dense price and multiplier arrays from local midnight of start to that of end,
+    as JSON or as a structured .npy array (timestamp, price_exc_vat, price_inc_vat,
+    multiplier)
+    """
+    if format == "npy":
+        content = await power_tariffs_service.export_time_of_use_curve(
+            tariff_uid, start, end, fuse, resolution_minutes
+        )
+        return Response(
+            content=content,
+            media_type="application/octet-stream",
+            headers={
+                "Content-Disposition": f'attachment; filename="{tariff_uid}-{start}-{end}.npy"'
+            },
+        )
+    return await power_tariffs_service.get_time_of_use_curve(
+        tariff_uid, start, end, fuse, resolution_minutes
+    )
+
+
+@router.post(
+    "/tariffs/{tariff_uid}/power-fee/simulate",
+    response_model=PowerFeeSimulationSpec,
+    summary="Simulates the power fee distribution of a perturbed load series",
+    response_model_exclude_none=True,
+)
+async def simulate_power_fees(
+    power_tariffs_service: PowerTariffSvc,
+    tariff_uid: str,
+    request: PowerFeeSimulationRequestSpec,
+):
+    """Prices randomly perturbed scenarios of the load across worker processes, returning fee percentiles"""
+    return await power_tariffs_service.simulate_power_fees(tariff_uid, request)
+
+
+@router.post(
+    "/tariffs/{tariff_uid}/battery",
+    response_model=BatteryDispatchSpec,
+    summary="Optimizes a peak-shaving battery against a power tariff",
+    response_model_exclude_none=True,
+)
+async def optimize_battery(
+    power_tariffs_service: PowerTariffSvc,
+    tariff_uid: str,
+    request: BatteryOptimizationRequestSpec,
+):
+    """Finds the lowest monthly peak cap the battery can hold, its dispatch and the fees it saves"""
+    return await power_tariffs_service.optimize_battery(tariff_uid, request)
+
+
+@router.post(
+    "/{country_code}/mga/{mga_code}/battery",
+    response_model=BatteryDispatchSpec,
+    summary="Optimizes a peak-shaving battery against the power tariff of a grid area",
+    response_model_exclude_none=True,
+)
+async def optimize_battery_by_mga(
+    power_tariffs_service: PowerTariffSvc,
+    country_code: CountryCode,
+    mga_code: str,
+    request: BatteryOptimizationRequestSpec,
+    building_type: BuildingType | None = None,
+):
+    """Optimizes against the one tariff of the mga that prices the fuse and building type"""
+    return await power_tariffs_service.optimize_battery_by_mga(
+        country_code, mga_code, request, building_type
+    )
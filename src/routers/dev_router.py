@@ -45,6 +45,26 @@ async def fetch_area_by_coordinates(lat: str, lon: str):
     return area
 
 
+@router.get(
+    "/areas/cache",
+    response_model=dict,
+    summary="Returns grid area lookup cache statistics",
+)
+async def fetch_area_cache_stats():
+    """Hit/miss counters, size and background refreshes of the grid area lookup cache"""
+    return {**elomraden.area_cache.stats(), "refresh": elomraden.refresher.stats()}
+
+
+@router.get(
+    "/areas/coalescing",
+    response_model=dict,
+    summary="Returns grid area lookup coalescing statistics",
+)
+async def fetch_area_coalescing_stats():
+    """How many concurrent grid area lookups shared an upstream call"""
+    return elomraden.in_flight.stats()
+
+
 @router.get(
     "/grid-operators",
     response_model=list[GridOperatorSpec],
@@ -1,8 +1,12 @@
+from http import HTTPStatus
+from typing import Annotated
+
 from engrate_sdk.utils import log
-from fastapi import APIRouter
+from fastapi import APIRouter, Header, Response
 
-from src.model import PowerTariffSpec
-from src.utils import PowerTariffSvc, CountryCode
+from src.model import MeteringGridAreaBatchSpec, PowerTariffSpec
+from src.response_cache import RenderedResponse, etag_matches
+from src.utils import PowerTariffSvc, CountryCode, LookupDeadline
 
 logger = log.get_logger(__name__)
 router = APIRouter(
@@ -17,10 +21,66 @@ router = APIRouter(
     response_model_exclude_none=True,
 )
 async def power_tariff_by_mga(
-    power_tariffs_service: PowerTariffSvc, country_code: CountryCode, mga_code: str
+    power_tariffs_service: PowerTariffSvc,
+    country_code: CountryCode,
+    mga_code: str,
+    fuse: str | None = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+):
+    """Fetches power tariffs by mga code, answering conditional requests with 304.
+    A fuse size (e.g. 20A) keeps the tariffs and compositions that price it."""
+    rendered = await power_tariffs_service.render_power_tariffs_by_mga(
+        country_code, mga_code, fuse
+    )
+    return _conditional_response(rendered, if_none_match)
+
+
+@router.post(
+    "/{country_code}/mga",
+    response_model=dict[str, list[PowerTariffSpec]],
+    summary="Returns power tariffs for many mga codes",
+    response_model_exclude_none=True,
+)
+async def power_tariffs_by_mgas(
+    power_tariffs_service: PowerTariffSvc,
+    country_code: CountryCode,
+    batch: MeteringGridAreaBatchSpec,
+):
+    """Fetches power tariffs for a list of mga codes, keyed by mga code"""
+    return await power_tariffs_service.get_power_tariffs_by_mgas(
+        country_code, batch.mga_codes
+    )
+
+
+@router.get(
+    "/{country_code}/search",
+    response_model=list[PowerTariffSpec],
+    summary="Searches power tariffs by their compositions",
+    response_model_exclude_none=True,
+)
+async def search_power_tariffs(
+    power_tariffs_service: PowerTariffSvc,
+    country_code: CountryCode,
+    business_area: str | None = None,
+    mga_code: str | None = None,
+    fuse: str | None = None,
+    month: str | None = None,
+    day: str | None = None,
+    unit: str | None = None,
+    max_price_exc_vat: float | None = None,
 ):
-    """Fetches power tariffs by mga code"""
-    return await power_tariffs_service.get_power_tariffs_by_mga(country_code, mga_code)
+    """Fetches the tariffs with a composition matching every filter, narrowed to
+    those compositions: e.g. ``business_area=SE3&fuse=25A&month=jan``."""
+    return await power_tariffs_service.search_power_tariffs(
+        country_code,
+        metering_business_area=business_area,
+        mga_code=mga_code,
+        fuse=fuse,
+        month=month,
+        day=day,
+        unit=unit,
+        max_price_exc_vat=max_price_exc_vat,
+    )
 
 
 @router.get(
@@ -30,12 +90,19 @@ async def power_tariff_by_mga(
     response_model_exclude_none=True,
 )
 async def power_tariff_by_postal_code(
-    power_tariffs_service: PowerTariffSvc, countr_code: CountryCode, postal_code: int
+    power_tariffs_service: PowerTariffSvc,
+    countr_code: CountryCode,
+    postal_code: int,
+    deadline: LookupDeadline,
+    fuse: str | None = None,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
-    """Fetches power tariffs by mga code"""
-    return await power_tariffs_service.get_tariff_by_postal_code(
-        countr_code, postal_code
+    """Fetches power tariffs by postal code, answering conditional requests with 304.
+    A fuse size (e.g. 20A) keeps the tariffs and compositions that price it."""
+    rendered = await power_tariffs_service.render_power_tariffs_by_postal_code(
+        countr_code, postal_code, deadline, fuse
     )
+    return _conditional_response(rendered, if_none_match)
 
 
 @router.get(
@@ -49,10 +116,11 @@ async def power_tariff_by_coordinate(
     country_code: CountryCode,
     lat: float,
     lon: float,
+    deadline: LookupDeadline,
 ):
     """Fetches power tariffs by latitude and longitude"""
     return await power_tariffs_service.get_power_tariffs_by_coordinates(
-        country_code, lat, lon
+        country_code, lat, lon, deadline
     )
 
 
@@ -67,8 +135,20 @@ async def power_tariff_by_address(
     country_code: CountryCode,
     address: str,
     city: str,
+    deadline: LookupDeadline,
 ):
     """Fetches power tariffs by address"""
     return await power_tariffs_service.get_power_tariffs_by_address(
-        country_code, address, city
+        country_code, address, city, deadline
+    )
+
+
+def _conditional_response(
+    rendered: RenderedResponse, if_none_match: str | None
+) -> Response:
+    headers = {"ETag": rendered.etag}
+    if if_none_match and etag_matches(if_none_match, rendered.etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+    return Response(
+        content=rendered.body, media_type="application/json", headers=headers
     )
@@ -2,6 +2,8 @@ from typing import Annotated
 
 from fastapi import Depends
 
+from src import env
+from src.clients.resilience import Deadline
 from src.exceptions import MissingError
 from src.power_tariff_service import PowerTariffService
 from src.repositories.power_tariffs_repository import PowerTariffRepository
@@ -23,3 +25,7 @@ PowerTariffSvc: type[PowerTariffService] = Annotated[
 ]
 
 CountryCode: type[str] = Annotated[str, Depends(validate_country_code)]
+
+LookupDeadline: type[Deadline] = Annotated[
+    Deadline, Depends(lambda: Deadline.after(env.get_elomraden_deadline()))
+]
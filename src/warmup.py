@@ -0,0 +1,113 @@
+import asyncio
+import csv
+from pathlib import Path
+
+from engrate_sdk.utils import log
+
+from src.clients.rate_limit import Priority
+from src.power_tariff_service import PowerTariffService
+
+logger = log.get_logger(__name__)
+
+
+class WarmupStatus:
+    """Progress of the startup cache warmup, as reported by the readiness endpoint."""
+
+    def __init__(self, ready_threshold: float):
+        self.ready_threshold = ready_threshold
+        self.state = "pending"
+        self.total = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    @property
+    def progress(self) -> float:
+        """Share of the entries attempted, failed ones included."""
+        if self.total == 0:
+            return 1.0 if self.state == "done" else 0.0
+        return (self.succeeded + self.failed) / self.total
+
+    @property
+    def success_ratio(self) -> float:
+        """Share of the entries warmed up successfully."""
+        if self.total == 0:
+            return 1.0 if self.state == "done" else 0.0
+        return self.succeeded / self.total
+
+    def is_ready(self) -> bool:
+        """Ready once enough entries were attempted. Failed entries count, so an
+        Elomraden outage at startup doesn't keep the instance unready for good;
+        ``success_ratio`` tells how warm the caches actually are."""
+        return self.progress >= self.ready_threshold
+
+    def as_dict(self) -> dict:
+        return {
+            "state": self.state,
+            "total": self.total,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "progress": round(self.progress, 3),
+            "success_ratio": round(self.success_ratio, 3),
+            "ready_threshold": self.ready_threshold,
+        }
+
+
+def read_entries(path: Path) -> list[tuple[str, str, str]]:
+    """Reads (kind, code, country) rows, kind being ``postal`` or ``mga``."""
+    entries = []
+    with open(path, "r", encoding="utf-8") as file:
+        reader = csv.reader(file, delimiter=";")
+        next(reader, None)  # Skip header
+        for row in reader:
+            if len(row) < 3 or row[0].strip() not in ("postal", "mga"):
+                logger.warning(f"Skipping malformed warmup row: {row}")
+                continue
+            entries.append((row[0].strip(), row[1].strip(), row[2].strip().upper()))
+    return entries
+
+
+async def run(
+    status: WarmupStatus, path: str, service: PowerTariffService, concurrency: int
+):
+    """Resolves the listed postal codes and renders the listed MGAs' responses.
+
+    Resolving a postal code fills the Elomraden area cache, from the stored
+    resolution when there is one and from Elomraden otherwise.
+
+    Lookups run at batch priority, so live traffic keeps precedence for the
+    Elomraden quota.
+    """
+    if not Path(path).exists():
+        logger.warning(f"Warmup file {path} not found, skipping warmup")
+        status.state = "done"
+        return
+
+    entries = read_entries(Path(path))
+    status.total = len(entries)
+    status.state = "running"
+    logger.info(f"Warming up caches with {len(entries)} entries...")
+    slots = asyncio.Semaphore(concurrency)
+
+    async def warm(kind: str, code: str, country_code: str):
+        async with slots:
+            try:
+                if kind == "postal":
+                    area = await service.resolve_postal_code(
+                        int(code), priority=Priority.BATCH
+                    )
+                    code = area.area_code
+                await service.render_power_tariffs_by_mga(country_code, code)
+            except Exception as e:
+                logger.warning(f"Warmup of {kind} {code} failed: {e}")
+                status.failed += 1
+                return
+            status.succeeded += 1
+
+    await asyncio.gather(*(warm(*entry) for entry in entries))
+    status.state = "done"
+    logger.info(f"Warmup done: {status.succeeded} warmed up, {status.failed} failed")
+    if status.success_ratio < status.ready_threshold:
+        logger.warning(
+            f"Only {status.success_ratio:.0%} of the warmup succeeded, "
+            "serving with partly cold caches"
+        )
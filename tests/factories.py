@@ -0,0 +1,90 @@
+from datetime import UTC, datetime
+from uuid import uuid4
+
+from src.model import PowerTariffSpec, TariffCompositionSpec, TimeIntervalSpec
+
+ALL_MONTHS = [
+    "jan",
+    "feb",
+    "mar",
+    "apr",
+    "may",
+    "jun",
+    "jul",
+    "aug",
+    "sep",
+    "oct",
+    "nov",
+    "dec",
+]
+ALL_DAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+def composition(
+    price: float,
+    months: list[str] | None = None,
+    days: list[str] | None = None,
+    fuse_from: str = "",
+    fuse_to: str = "",
+    intervals: tuple[tuple[str, str, float], ...] = (("00:00", "00:00", 1.0),),
+) -> TariffCompositionSpec:
+    return TariffCompositionSpec(
+        months=months or ALL_MONTHS,
+        days=days or ALL_DAYS,
+        fuse_from=fuse_from,
+        fuse_to=fuse_to,
+        unit="kr/kW",
+        price_exc_vat=price,
+        price_inc_vat=price * 1.25,
+        intervals=[
+            TimeIntervalSpec(from_time=start, to_time=end, multiplier=multiplier)
+            for start, end, multiplier in intervals
+        ],
+    )
+
+
+def tariff(
+    compositions: list[TariffCompositionSpec],
+    samples_per_month: int = 3,
+    time_unit: str = "hourly",
+    uid: str | None = None,
+    last_updated: datetime = datetime(2025, 1, 1, tzinfo=UTC),
+) -> PowerTariffSpec:
+    """A tariff with a fresh uid unless given, so cached plans are never shared."""
+    return PowerTariffSpec(
+        uid=uid or str(uuid4()),
+        name="Test tariff",
+        model="avg_monthly_peaks",
+        samples_per_month=samples_per_month,
+        time_unit=time_unit,
+        last_updated=last_updated,
+        voltage="LV",
+        compositions=compositions,
+        metering_grid_areas=[],
+    )
+
+
+def day_night_tariff(**kwargs) -> PowerTariffSpec:
+    """Winter weekday daytime peaks at full price, nights at half, and a summer fee."""
+    return tariff(
+        [
+            composition(
+                60.0,
+                months=["jan", "feb", "mar", "nov", "dec"],
+                days=["mon", "tue", "wed", "thu", "fri"],
+                intervals=(("07:00", "20:00", 1.0), ("22:00", "06:00", 0.5)),
+            ),
+            composition(25.0, months=["apr", "may", "jun", "jul", "aug", "sep"]),
+        ],
+        **kwargs,
+    )
+
+
+class FakeClock:
+    """Monotonic clock whose time is set by the test."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from src.calculation.battery import optimize_battery
+from src.exceptions import IllegalArgumentError
+from tests.factories import day_night_tariff
+
+CAPACITY_KWH = 6.0
+POWER_KW = 2.0
+
+
+def hourly_loads(start: str, days: int, seed: int = 3):
+    timestamps = np.datetime64(start, "s") + np.arange(24 * days) * np.timedelta64(
+        1, "h"
+    )
+    kw = np.random.default_rng(seed).gamma(2.0, 1.5, timestamps.size)
+    return timestamps, kw
+
+
+@pytest.mark.parametrize("efficiency", [1.0, 0.85])
+def test_battery_never_raises_the_fee(efficiency):
+    timestamps, kw = hourly_loads("2024-01-20T00:00", 20)
+
+    dispatch = optimize_battery(
+        day_night_tariff(), timestamps, kw, CAPACITY_KWH, POWER_KW, efficiency
+    )
+
+    without = dispatch.without.fee_exc_vat.sum()
+    with_battery = dispatch.with_battery.fee_exc_vat.sum()
+    assert with_battery <= without + 1e-6
+    assert with_battery < without
+
+
+def test_dispatch_respects_capacity_and_power():
+    timestamps, kw = hourly_loads("2024-02-01T00:00", 10)
+
+    dispatch = optimize_battery(
+        day_night_tariff(), timestamps, kw, CAPACITY_KWH, POWER_KW, 0.9
+    )
+
+    assert np.all(dispatch.charge_kwh >= -1e-6)
+    assert np.all(dispatch.charge_kwh <= CAPACITY_KWH + 1e-6)
+    assert np.all(np.abs(dispatch.battery_kw) <= POWER_KW + 1e-6)
+    assert dispatch.grid_kw == pytest.approx(kw - dispatch.battery_kw)
+
+
+def test_an_empty_battery_only_discharges_what_it_charged():
+    timestamps, kw = hourly_loads("2024-02-01T00:00", 3)
+
+    dispatch = optimize_battery(
+        day_night_tariff(),
+        timestamps,
+        kw,
+        CAPACITY_KWH,
+        POWER_KW,
+        initial_charge_kwh=0.0,
+    )
+
+    # Without losses, the stored energy is what was charged minus discharged
+    assert dispatch.charge_kwh == pytest.approx(np.cumsum(-dispatch.battery_kw))
+    assert np.all(dispatch.charge_kwh >= -1e-6)
+
+
+@pytest.mark.parametrize(
+    "capacity, power, efficiency",
+    [(0.0, 2.0, 1.0), (6.0, -1.0, 1.0), (6.0, 2.0, 0.0), (6.0, 2.0, 1.5)],
+)
+def test_rejects_invalid_batteries(capacity, power, efficiency):
+    timestamps, kw = hourly_loads("2024-02-01T00:00", 1)
+
+    with pytest.raises(IllegalArgumentError):
+        optimize_battery(
+            day_night_tariff(), timestamps, kw, capacity, power, efficiency
+        )
@@ -0,0 +1,71 @@
+from datetime import UTC, date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pytest
+
+from src.calculation import engine
+from src.calculation.curves import time_of_use_curve
+from src.calculation.plan import SLOT_SECONDS
+from src.exceptions import IllegalArgumentError
+from tests.factories import composition, tariff
+
+STOCKHOLM = ZoneInfo("Europe/Stockholm")
+
+
+def day_and_night():
+    return tariff(
+        [
+            composition(
+                40.0, intervals=(("07:00", "20:00", 1.0), ("22:00", "06:00", 0.5))
+            )
+        ]
+    )
+
+
+def plan_multipliers(spec, timestamps: np.ndarray) -> np.ndarray:
+    """Multiplier of each UTC period start read from the plan at local time."""
+    plan, compositions = engine.compile_for(spec, None)
+    expected = []
+    for t in timestamps.astype(np.int64):
+        local = datetime.fromtimestamp(int(t), UTC).astimezone(STOCKHOLM)
+        slot = (local.hour * 3600 + local.minute * 60) // SLOT_SECONDS
+        value = np.fmax.reduce(
+            plan.multipliers[compositions, local.month - 1, local.weekday(), slot]
+        )
+        expected.append(0.0 if np.isnan(value) else value)
+    return np.array(expected)
+
+
+@pytest.mark.parametrize(
+    "day, hours", [(date(2024, 3, 31), 23), (date(2024, 10, 27), 25)]
+)
+@pytest.mark.parametrize("resolution_minutes", [60, 15])
+def test_curve_matches_the_plan_across_dst_days(day, hours, resolution_minutes):
+    spec = day_and_night()
+
+    curve = time_of_use_curve(
+        spec, day, day + timedelta(days=1), None, resolution_minutes
+    )
+
+    assert len(curve) == hours * 60 // resolution_minutes
+    start = datetime(day.year, day.month, day.day, tzinfo=STOCKHOLM)
+    assert curve.timestamps[0] == np.datetime64(int(start.timestamp()), "s")
+    expected = plan_multipliers(spec, curve.timestamps)
+    np.testing.assert_allclose(curve.multiplier, expected)
+    np.testing.assert_allclose(curve.price_exc_vat, 40.0 * expected)
+    np.testing.assert_allclose(curve.price_inc_vat, 50.0 * expected)
+
+
+def test_curve_spans_years():
+    curve = time_of_use_curve(day_and_night(), date(2024, 12, 31), date(2025, 1, 2))
+
+    assert len(curve) == 48
+    assert np.all(np.diff(curve.timestamps.astype(np.int64)) == 3600)
+
+
+def test_curve_rejects_invalid_ranges():
+    with pytest.raises(IllegalArgumentError):
+        time_of_use_curve(day_and_night(), date(2024, 1, 2), date(2024, 1, 1))
+    with pytest.raises(IllegalArgumentError):
+        time_of_use_curve(day_and_night(), date(2024, 1, 1), date(2025, 6, 1))
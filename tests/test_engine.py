@@ -0,0 +1,192 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pytest
+
+from src.calculation import engine
+from src.exceptions import IllegalArgumentError
+from tests.factories import composition, day_night_tariff, tariff
+
+STOCKHOLM = ZoneInfo("Europe/Stockholm")
+
+
+def hours(start: str, count: int) -> np.ndarray:
+    return np.datetime64(start, "s") + np.arange(count) * np.timedelta64(1, "h")
+
+
+def reference_fees(tariff_spec, timestamps, kw) -> dict[tuple[int, int], float]:
+    """Fee exc VAT per local (year, month), reading by reading in wall-clock time."""
+    peaks: dict[tuple[int, int, int], list[float]] = {}
+    for c, comp in enumerate(tariff_spec.compositions):
+        for timestamp, load in zip(timestamps, kw):
+            if np.isnan(load):
+                continue
+            local = datetime.fromtimestamp(int(timestamp.astype(np.int64)), STOCKHOLM)
+            if local.strftime("%b").lower() not in comp.months:
+                continue
+            if local.strftime("%a").lower() not in comp.days:
+                continue
+            minute = local.hour * 60 + local.minute
+            multipliers = [
+                interval.multiplier
+                for interval in comp.intervals
+                if _inside(minute, interval.from_time, interval.to_time)
+            ]
+            if multipliers:
+                key = (c, local.year, local.month)
+                peaks.setdefault(key, []).append(load * max(multipliers))
+    fees: dict[tuple[int, int], float] = {}
+    for (c, year, month), values in peaks.items():
+        billed = np.mean(sorted(values, reverse=True)[: tariff_spec.samples_per_month])
+        price = tariff_spec.compositions[c].price_exc_vat
+        fees[(year, month)] = fees.get((year, month), 0.0) + billed * price
+    return fees
+
+
+def _inside(minute: int, start: str, end: str) -> bool:
+    lo = int(start[:2]) * 60 + int(start[3:])
+    hi = int(end[:2]) * 60 + int(end[3:])
+    return lo <= minute < hi if hi > lo else (minute >= lo or minute < hi)
+
+
+def test_calculate_power_fee_matches_per_reading_reference():
+    rng = np.random.default_rng(7)
+    # Crosses New Year in local time and both 2024 DST changes
+    timestamps = hours("2023-12-31T20:00", 24 * 330)
+    kw = rng.gamma(2.0, 1.5, timestamps.size)
+    kw[rng.random(timestamps.size) < 0.02] = np.nan
+    spec = day_night_tariff()
+
+    result = engine.calculate_power_fee(spec, timestamps, kw)
+
+    expected = reference_fees(spec, timestamps, kw)
+    assert result.months[0] == (2023, 12)
+    assert result.months[-1] == (2024, 11)
+    for i, month in enumerate(result.months):
+        assert result.fee_exc_vat[i] == pytest.approx(expected.get(month, 0.0))
+        assert result.fee_inc_vat[i] == pytest.approx(expected.get(month, 0.0) * 1.25)
+
+
+def test_month_boundary_follows_local_time():
+    spec = tariff([composition(10.0)], samples_per_month=1)
+    timestamps = hours("2024-01-31T20:00", 6)
+    kw = np.ones(timestamps.size)
+    # 2024-01-31T23:00Z is midnight of February 1 in Stockholm
+    kw[3] = 5.0
+
+    result = engine.calculate_power_fee(spec, timestamps, kw)
+
+    assert result.months == [(2024, 1), (2024, 2)]
+    assert result.billed_kw[0].tolist() == [1.0, 5.0]
+
+
+def test_repeated_hour_on_dst_end_is_priced_twice():
+    # Only 02:00-03:00 local is billed; on 2024-10-27 that hour happens twice
+    spec = tariff(
+        [composition(10.0, intervals=(("02:00", "03:00", 1.0),))], samples_per_month=2
+    )
+    timestamps = hours("2024-10-26T22:00", 6)
+    kw = np.array([1.0, 1.0, 3.0, 5.0, 1.0, 1.0])
+
+    result = engine.calculate_power_fee(spec, timestamps, kw)
+
+    assert result.billed_kw[0].tolist() == [4.0]
+    assert result.fee_exc_vat.tolist() == pytest.approx([40.0])
+
+
+def test_missing_hour_on_dst_start_is_not_billed():
+    # 02:00-03:00 local doesn't exist on 2024-03-31
+    spec = tariff([composition(10.0, intervals=(("02:00", "03:00", 1.0),))])
+    timestamps = hours("2024-03-30T22:00", 6)
+
+    result = engine.calculate_power_fee(spec, timestamps, np.full(6, 2.0))
+
+    assert result.billed_kw[0].tolist() == [0.0]
+
+
+def test_missing_readings_are_ignored():
+    spec = tariff([composition(10.0)], samples_per_month=2)
+    timestamps = hours("2024-05-01T00:00", 4)
+
+    result = engine.calculate_power_fee(
+        spec, timestamps, np.array([1.0, np.nan, 3.0, np.nan])
+    )
+
+    assert result.billed_kw[0].tolist() == [2.0]
+
+
+def test_quarter_hour_readings_are_priced_as_hourly_means():
+    spec = day_night_tariff()
+    rng = np.random.default_rng(3)
+    quarters = np.datetime64("2024-01-08T00:00", "s") + np.arange(4 * 24 * 14) * (
+        np.timedelta64(15, "m")
+    )
+    kw = rng.gamma(2.0, 1.5, quarters.size)
+
+    result = engine.calculate_power_fee(spec, quarters, kw)
+
+    hourly = engine.calculate_power_fee(
+        spec, quarters[::4], kw.reshape(-1, 4).mean(axis=1)
+    )
+    assert result.fee_exc_vat == pytest.approx(hourly.fee_exc_vat)
+
+
+def test_resample_averages_quarter_hours_into_hours():
+    utc = np.arange(0, 2 * 3600, 900, dtype=np.int64)
+    kw = np.array([[1.0, 2.0, 3.0, 6.0, 4.0, np.nan, 4.0, 4.0]])
+
+    starts, loads = engine.resample(utc, kw, 3600)
+
+    assert starts.tolist() == [0, 3600]
+    assert loads.tolist() == [[3.0, 4.0]]
+
+
+def test_resample_keeps_series_already_at_the_unit():
+    utc = np.arange(0, 3 * 3600, 3600, dtype=np.int64)
+    kw = np.array([[1.0, 2.0, 3.0]])
+
+    starts, loads = engine.resample(utc, kw, 3600)
+
+    assert starts.tolist() == utc.tolist()
+    assert loads.tolist() == kw.tolist()
+
+
+def test_resample_spreads_hourly_readings_over_quarter_hours():
+    utc = np.array([0, 3600], dtype=np.int64)
+
+    starts, loads = engine.resample(utc, np.array([[2.0, 6.0]]), 900)
+
+    assert starts.tolist() == list(range(0, 7200, 900))
+    assert loads.tolist() == [[2.0] * 4 + [6.0] * 4]
+
+
+def test_resample_handles_mixed_resolutions():
+    # Two hourly readings, then quarter hours from 02:00
+    utc = np.array([0, 3600, 7200, 8100, 9000, 9900], dtype=np.int64)
+    kw = np.array([[2.0, 4.0, 1.0, 2.0, 3.0, 6.0]])
+
+    starts, loads = engine.resample(utc, kw, 3600)
+
+    assert starts.tolist() == [0, 3600, 7200]
+    assert loads.tolist() == [[2.0, 4.0, 3.0]]
+
+
+def test_resample_marks_units_without_readings_missing():
+    utc = np.array([0, 900, 7200], dtype=np.int64)
+
+    starts, loads = engine.resample(utc, np.array([[np.nan, np.nan, 5.0]]), 3600)
+
+    assert starts.tolist() == [0, 7200]
+    assert np.isnan(loads[0, 0])
+    assert loads[0, 1] == 5.0
+
+
+def test_resample_rejects_readings_off_the_quarter_hour():
+    with pytest.raises(IllegalArgumentError):
+        engine.resample(np.array([0, 600], dtype=np.int64), np.ones((1, 2)), 3600)
+
+
+def test_resample_rejects_duplicate_timestamps():
+    with pytest.raises(IllegalArgumentError):
+        engine.resample(np.array([0, 0], dtype=np.int64), np.ones((1, 2)), 3600)
@@ -0,0 +1,101 @@
+import pytest
+
+from src.exceptions import IllegalArgumentError
+from src.fuse_index import FuseIndex, filter_by_fuse, parse_fuse
+from tests.factories import composition, tariff
+
+
+def fuse_index(*ranges: tuple[str, str]) -> FuseIndex:
+    return FuseIndex([composition(10.0, fuse_from=lo, fuse_to=hi) for lo, hi in ranges])
+
+
+def test_lookup_selects_the_ranges_containing_the_fuse():
+    index = fuse_index(("16A", "25A"), ("35A", "63A"), ("80A", ""))
+
+    assert index.lookup(16) == [0]
+    assert index.lookup(20) == [0]
+    assert index.lookup(63) == [1]
+    assert index.lookup(200) == [2]
+    assert index.lookup(30) == []
+    assert index.lookup(10) == []
+
+
+def test_lookup_bounds_are_inclusive():
+    index = fuse_index(("16A", "25A"), ("25A", "35A"))
+
+    assert index.lookup(25) == [0, 1]
+
+
+def test_lookup_finds_nested_and_overlapping_ranges():
+    index = fuse_index(("", ""), ("16A", "63A"), ("20A", "25A"), ("", "16A"))
+
+    assert index.lookup(10) == [0, 3]
+    assert index.lookup(16) == [0, 1, 3]
+    assert index.lookup(22) == [0, 1, 2]
+    assert index.lookup(100) == [0]
+
+
+def test_compositions_sharing_a_range_form_one_band():
+    index = fuse_index(("16A", "25A"), ("16A", "25A"), ("35A", "63A"))
+
+    assert index.band_count == 2
+    assert index.lookup(20) == [0, 1]
+    assert index.all() == [0, 1, 2]
+
+
+def test_lookup_matches_a_linear_scan():
+    ranges = [(f"{lo}A", f"{hi}A") for lo, hi in [(16, 25), (20, 35), (35, 50)]]
+    ranges += [("", "20A"), ("50A", ""), ("10A", "100A")]
+    index = fuse_index(*ranges)
+    bounds = [
+        (float(lo[:-1]) if lo else 0.0, float(hi[:-1]) if hi else float("inf"))
+        for lo, hi in ranges
+    ]
+
+    for amperes in range(120):
+        expected = [i for i, (lo, hi) in enumerate(bounds) if lo <= amperes <= hi]
+        assert index.lookup(amperes) == expected
+
+
+@pytest.mark.parametrize(
+    "fuse, amperes", [("20A", 20.0), ("20", 20.0), ("3x25 A", 25.0)]
+)
+def test_parse_fuse(fuse, amperes):
+    assert parse_fuse(fuse) == amperes
+
+
+def test_parse_fuse_rejects_invalid_sizes():
+    with pytest.raises(IllegalArgumentError):
+        parse_fuse("large")
+
+
+def test_filter_by_fuse_narrows_tariffs_to_the_fuse_compositions():
+    small = composition(10.0, fuse_from="16A", fuse_to="25A")
+    large = composition(20.0, fuse_from="35A", fuse_to="63A")
+    tariffs = [tariff([small, large]), tariff([large])]
+
+    filtered = filter_by_fuse(tariffs, 20.0)
+
+    assert [t.uid for t in filtered] == [tariffs[0].uid]
+    assert filtered[0].compositions == [small]
+
+
+def test_filter_by_fuse_uses_prebuilt_indexes():
+    spec = tariff([composition(10.0, fuse_from="16A", fuse_to="25A")])
+    # An index claiming no ranges shows the prebuilt one was used
+    indexes = {spec.uid: FuseIndex([])}
+
+    assert filter_by_fuse([spec], 20.0, indexes) == []
+    assert len(filter_by_fuse([spec], 20.0)) == 1
+
+
+def test_parsed_fuse_amperes_are_not_serialized():
+    spec = composition(10.0, fuse_from="16A", fuse_to="25A").model_copy(
+        update={"fuse_from_amperes": 16.0, "fuse_to_amperes": 25.0}
+    )
+
+    dumped = spec.model_dump(by_alias=True)
+
+    assert "fuseFromAmperes" not in dumped
+    assert "fuseToAmperes" not in dumped
+    assert dumped["fuseFrom"] == "16A"
@@ -0,0 +1,137 @@
+import json
+from datetime import UTC, datetime
+
+import numpy as np
+import pytest
+
+from src.calculation import engine
+from src.calculation.live import PeakTracker
+from src.exceptions import IllegalArgumentError
+from tests.factories import day_night_tariff
+
+
+def quarter_hours(start: str, count: int) -> np.ndarray:
+    return np.datetime64(start, "s") + np.arange(count) * np.timedelta64(15, "m")
+
+
+def loads(count: int, seed: int = 11) -> np.ndarray:
+    return np.random.default_rng(seed).gamma(2.0, 1.5, count)
+
+
+def round_trip(tracker: PeakTracker, spec) -> PeakTracker:
+    return PeakTracker.from_state(spec, json.loads(json.dumps(tracker.to_state())))
+
+
+def test_month_to_date_matches_engine():
+    spec = day_night_tariff()
+    timestamps = quarter_hours("2024-02-01T00:00", 4 * 24 * 10)
+    kw = loads(timestamps.size)
+    tracker = PeakTracker(spec, resolution_minutes=15)
+
+    tracker.add(timestamps, kw)
+
+    expected = engine.calculate_power_fee(spec, timestamps, kw)
+    assert tracker.month_to_date().fee_exc_vat == pytest.approx(expected.fee_exc_vat)
+
+
+def _sorted_heaps(months: dict) -> dict:
+    return {label: [sorted(heap) for heap in heaps] for label, heaps in months.items()}
+
+
+def test_state_round_trip_keeps_peaks_and_held_readings():
+    spec = day_night_tariff()
+    timestamps = quarter_hours("2024-02-01T00:00", 4 * 24 * 10)
+    kw = loads(timestamps.size)
+    tracker = PeakTracker(spec, fuse=None, resolution_minutes=15)
+    # Stops mid-hour, so two quarter hours are held back
+    tracker.add(timestamps[:-10], kw[:-10])
+
+    restored = round_trip(tracker, spec)
+
+    state, restored_state = tracker.to_state(), restored.to_state()
+    # Heaps are restored sorted, the same values in another heap order
+    assert _sorted_heaps(restored_state.pop("months")) == _sorted_heaps(
+        state.pop("months")
+    )
+    assert restored_state == state
+    assert restored.last_reading == tracker.last_reading
+    assert restored.month_to_date().fee_exc_vat == pytest.approx(
+        tracker.month_to_date().fee_exc_vat
+    )
+    # Both go on from the held readings to the same fee as a single pass
+    tracker.add(timestamps[-10:], kw[-10:])
+    restored.add(timestamps[-10:], kw[-10:])
+    expected = engine.calculate_power_fee(spec, timestamps, kw)
+    for result in (tracker.month_to_date(), restored.month_to_date()):
+        assert result.fee_exc_vat == pytest.approx(expected.fee_exc_vat)
+
+
+def test_state_of_another_tariff_version_is_rejected():
+    spec = day_night_tariff()
+    tracker = PeakTracker(spec)
+    tracker.add(quarter_hours("2024-02-01T00:00", 8)[::4], np.array([1.0, 2.0]))
+    state = json.loads(json.dumps(tracker.to_state()))
+
+    updated = spec.model_copy(update={"last_updated": datetime(2025, 6, 1, tzinfo=UTC)})
+    with pytest.raises(IllegalArgumentError):
+        PeakTracker.from_state(updated, state)
+    with pytest.raises(IllegalArgumentError):
+        PeakTracker.from_state(day_night_tariff(), state)
+
+
+def test_month_to_date_follows_the_latest_month():
+    spec = day_night_tariff()
+    tracker = PeakTracker(spec)
+    january = np.datetime64("2024-01-15T10:00", "s")
+    april = np.datetime64("2024-04-15T10:00", "s")
+
+    tracker.add(np.array([january]), np.array([4.0]))
+    assert tracker.month_to_date().months == [(2024, 1)]
+    tracker.add(np.array([april]), np.array([2.0]))
+
+    result = round_trip(tracker, spec).month_to_date()
+    assert result.months == [(2024, 4)]
+    assert result.billed_kw[:, 0].tolist() == [0.0, 2.0]
+
+
+def test_a_re_sent_batch_leaves_the_fee_unchanged():
+    spec = day_night_tariff()
+    timestamps = quarter_hours("2024-02-01T00:00", 4 * 24 * 3 + 2)
+    kw = loads(timestamps.size)
+    tracker = PeakTracker(spec, resolution_minutes=15)
+
+    assert tracker.add(timestamps, kw) == 0
+    fee = tracker.month_to_date().fee_exc_vat
+    # Every reading is ignored, the two held back ones included
+    assert tracker.add(timestamps, kw) == timestamps.size
+
+    assert tracker.month_to_date().fee_exc_vat == pytest.approx(fee)
+
+
+def test_readings_of_counted_units_are_ignored_after_a_round_trip():
+    spec = day_night_tariff()
+    timestamps = quarter_hours("2024-02-01T00:00", 4 * 24 * 3)
+    kw = loads(timestamps.size)
+    tracker = PeakTracker(spec, resolution_minutes=15)
+    tracker.add(timestamps, kw)
+    expected = tracker.month_to_date().fee_exc_vat
+
+    restored = round_trip(tracker, spec)
+
+    assert restored.add(timestamps[-8:], kw[-8:] * 10) == 8
+    assert restored.month_to_date().fee_exc_vat == pytest.approx(expected)
+
+
+def test_checkpoints_without_committed_unit_ignore_counted_readings():
+    spec = day_night_tariff()
+    timestamps = quarter_hours("2024-02-01T00:00", 4 * 24 + 2)
+    kw = loads(timestamps.size)
+    tracker = PeakTracker(spec, resolution_minutes=15)
+    tracker.add(timestamps, kw)
+    state = json.loads(json.dumps(tracker.to_state()))
+    del state["committedUntil"]
+
+    restored = PeakTracker.from_state(spec, state)
+
+    assert restored.add(timestamps[-6:], kw[-6:]) == 6
+    assert restored.to_state()["committedUntil"] == tracker.to_state()["committedUntil"]
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from src.clients.background_refresh import BackgroundRefresher
+from src.clients.lookup_cache import LookupCache
+from src.exceptions import MissingError
+from tests.factories import FakeClock
+
+
+class Upstream:
+    def __init__(self, error: Exception | None = None):
+        self.calls = 0
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return f"value {self.calls}"
+
+
+def cache(clock: FakeClock, **kwargs) -> LookupCache:
+    options = {"max_entries": 10, "ttl": 60.0, "negative_ttl": 5.0}
+    return LookupCache("test", clock=clock, **{**options, **kwargs})
+
+
+def test_results_are_cached_until_the_ttl():
+    clock, upstream = FakeClock(), Upstream()
+    areas = cache(clock)
+
+    async def scenario():
+        assert await areas.get_or_load("k", upstream) == "value 1"
+        clock.now = 59.0
+        assert await areas.get_or_load("k", upstream) == "value 1"
+        clock.now = 60.0
+        assert await areas.get_or_load("k", upstream) == "value 2"
+
+    asyncio.run(scenario())
+    assert upstream.calls == 2
+    assert (areas.hits, areas.misses) == (1, 2)
+
+
+def test_least_recently_used_entries_are_evicted():
+    clock, upstream = FakeClock(), Upstream()
+    areas = cache(clock, max_entries=2)
+
+    async def scenario():
+        await areas.get_or_load("a", upstream)
+        await areas.get_or_load("b", upstream)
+        await areas.get_or_load("a", upstream)
+        await areas.get_or_load("c", upstream)
+
+    asyncio.run(scenario())
+    assert areas.lookup("a") == (True, "value 1")
+    assert areas.lookup("c") == (True, "value 3")
+    assert areas.lookup("b") == (False, None)
+
+
+def test_missing_results_are_cached_for_the_negative_ttl():
+    clock, upstream = FakeClock(), Upstream(MissingError("post number", "99999"))
+    areas = cache(clock)
+
+    async def scenario():
+        for now in (0.0, 4.0, 5.0):
+            clock.now = now
+            with pytest.raises(MissingError):
+                await areas.get_or_load("k", upstream)
+
+    asyncio.run(scenario())
+    assert upstream.calls == 2
+
+
+def test_other_errors_are_not_cached():
+    clock, upstream = FakeClock(), Upstream(RuntimeError("upstream down"))
+    areas = cache(clock)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await areas.get_or_load("k", upstream)
+
+    asyncio.run(scenario())
+    assert upstream.calls == 2
+    assert areas.lookup("k") == (False, None)
+
+
+def test_stale_entries_are_served_and_refreshed_in_the_background():
+    clock, upstream = FakeClock(), Upstream()
+    areas = cache(
+        clock, soft_ttl=30.0, refresher=BackgroundRefresher("test", concurrency=1)
+    )
+
+    async def scenario():
+        await areas.get_or_load("k", upstream)
+        clock.now = 45.0
+        assert areas.lookup("k", refresh=upstream) == (True, "value 1")
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert areas.stale_hits == 1
+    assert areas.lookup("k") == (True, "value 2")
+
+
+def test_put_caches_values_loaded_elsewhere():
+    areas = cache(FakeClock())
+
+    areas.put("k", "stored")
+
+    assert areas.lookup("k") == (True, "stored")
@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import pytest
+
+from src import mga_resolver
+from src.mga_resolver import MgaResolver
+
+BOUNDARIES = Path(__file__).parent / "fixtures" / "mga_boundaries.geojson"
+
+
+@pytest.fixture
+def resolver() -> MgaResolver:
+    return MgaResolver.from_geojson(BOUNDARIES, border_margin_m=200.0)
+
+
+def test_loads_polygons_with_codes(resolver):
+    # The feature without a code is skipped, the multipolygon gives two
+    assert len(resolver) == 4
+
+
+@pytest.mark.parametrize(
+    "lat, lon, code",
+    [
+        (59.2, 14.2, "AAA"),
+        (59.8, 15.7, "BBB"),
+        (59.25, 17.25, "CCC"),
+        (59.25, 18.25, "CCC"),
+    ],
+)
+def test_points_inside_resolve_to_their_area(resolver, lat, lon, code):
+    assert resolver.resolve(lat, lon) == code
+    # Memoized interior cells answer the same
+    assert resolver.resolve(lat, lon) == code
+
+
+@pytest.mark.parametrize(
+    "lat, lon",
+    [
+        (59.5, 14.5),  # In the hole of AAA
+        (59.25, 17.75),  # Between the parts of CCC
+        (58.0, 15.0),  # South of every area
+        (59.5, 20.5),  # In the area without a code
+    ],
+)
+def test_points_outside_every_area_are_unresolved(resolver, lat, lon):
+    assert resolver.resolve(lat, lon) is None
+
+
+def test_points_near_a_border_are_left_to_the_fallback(resolver):
+    # About 55 m from the AAA/BBB border, then about 560 m
+    assert resolver.resolve(59.5, 14.999) is None
+    assert resolver.resolve(59.5, 15.001) is None
+    assert resolver.resolve(59.5, 14.99) == "AAA"
+    assert resolver.resolve(59.5, 15.01) == "BBB"
+
+
+def test_a_missing_boundaries_file_keeps_local_resolution_off(tmp_path):
+    assert mga_resolver.load(str(tmp_path / "missing.geojson")) is None
@@ -0,0 +1,86 @@
+from datetime import UTC, datetime
+
+import numpy as np
+import pytest
+
+from src.calculation.plan import TariffPlanCache, slot_multipliers
+from src.exceptions import IllegalArgumentError
+from tests.factories import composition, tariff
+
+
+def test_cache_reuses_plan_while_tariff_is_unchanged():
+    cache = TariffPlanCache()
+    spec = tariff([composition(10.0)], uid="t1")
+
+    assert cache.get(spec) is cache.get(spec.model_copy())
+    assert len(cache) == 1
+
+
+def test_cache_recompiles_when_last_updated_changes():
+    cache = TariffPlanCache()
+    spec = tariff([composition(10.0)], uid="t1")
+    plan = cache.get(spec)
+
+    updated = tariff(
+        [composition(20.0)],
+        uid="t1",
+        last_updated=datetime(2025, 6, 1, tzinfo=UTC),
+    )
+    recompiled = cache.get(updated)
+
+    assert recompiled is not plan
+    assert recompiled.price_exc_vat.tolist() == [20.0]
+    assert cache.get(updated) is recompiled
+    assert len(cache) == 1
+
+
+def test_cache_evicts_least_recently_used_plans():
+    cache = TariffPlanCache(max_entries=2)
+    first, second, third = (tariff([composition(10.0)], uid=u) for u in "abc")
+    first_plan = cache.get(first)
+    second_plan = cache.get(second)
+    cache.get(first)
+    cache.get(third)
+
+    assert len(cache) == 2
+    assert cache.get(first) is first_plan
+    assert cache.get(second) is not second_plan
+
+
+def test_cache_never_stores_tariffs_without_uid():
+    cache = TariffPlanCache()
+    spec = tariff([composition(10.0)]).model_copy(update={"uid": None})
+
+    assert cache.get(spec) is not cache.get(spec)
+    assert len(cache) == 0
+
+
+def test_plan_requires_fuse_for_tariffs_priced_per_fuse():
+    cache = TariffPlanCache()
+    spec = tariff(
+        [
+            composition(10.0, fuse_from="16A", fuse_to="25A"),
+            composition(20.0, fuse_from="35A", fuse_to="63A"),
+        ]
+    )
+    plan = cache.get(spec)
+
+    with pytest.raises(IllegalArgumentError):
+        plan.compositions_for(None)
+    assert plan.compositions_for("35A").tolist() == [1]
+    with pytest.raises(IllegalArgumentError):
+        plan.compositions_for("30A")
+
+
+def test_slot_multipliers_wrap_past_midnight_and_keep_the_highest():
+    spec = composition(
+        10.0, intervals=(("22:00", "06:00", 0.5), ("05:00", "07:00", 1.0))
+    )
+
+    multipliers = slot_multipliers(spec)
+
+    assert multipliers[0] == 0.5  # 00:00
+    assert multipliers[5 * 4] == 1.0  # 05:00, both intervals
+    assert multipliers[6 * 4] == 1.0  # 06:00
+    assert np.isnan(multipliers[7 * 4])  # 07:00
+    assert multipliers[23 * 4] == 0.5  # 23:00
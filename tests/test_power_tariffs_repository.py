@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+from src.repositories.power_tariffs_repository import PowerTariffRepository
+from tests.factories import composition, tariff
+
+
+def association(country_code: str, code: str, power_tariff):
+    mga = SimpleNamespace(
+        code=code,
+        name=f"{country_code} {code}",
+        country_code=country_code,
+        metering_business_area="SE3",
+        grid_operator=SimpleNamespace(uid=None, name="Grid", ediel=12345),
+    )
+    return SimpleNamespace(metering_grid_area=mga, power_tariff=power_tariff)
+
+
+def test_groups_the_same_mga_code_per_country():
+    shared = tariff([composition(40.0)])
+    associations = [
+        association("SE", "ABC", shared),
+        association("NO", "ABC", shared),
+        association("SE", "ABC", tariff([composition(50.0)])),
+    ]
+
+    grouped = PowerTariffRepository.group_power_tariffs_by_mga(associations)
+
+    assert set(grouped) == {("SE", "ABC"), ("NO", "ABC")}
+    assert len(grouped[("SE", "ABC")]) == 2
+    for (country_code, code), tariffs in grouped.items():
+        for spec in tariffs:
+            (mga,) = spec.metering_grid_areas
+            assert (mga.country_code, mga.code) == (country_code, code)
+    assert grouped[("NO", "ABC")][0].uid == shared.uid
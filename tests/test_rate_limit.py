@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from src.clients.rate_limit import Priority, TokenBucket
+from src.exceptions import RateLimitedError
+
+
+def bucket(**kwargs) -> TokenBucket:
+    options = {"rate": 200.0, "burst": 1, "max_wait": 5.0, "max_queue": 10}
+    return TokenBucket("test", **{**options, **kwargs})
+
+
+def test_takes_tokens_immediately_within_the_burst():
+    limiter = bucket(burst=3)
+
+    async def scenario():
+        for _ in range(3):
+            await limiter.acquire()
+
+    asyncio.run(scenario())
+    assert limiter.stats()["queued"] == 0
+
+
+def test_queued_callers_are_served_by_priority_then_arrival():
+    limiter = bucket()
+    served = []
+
+    async def acquire(name: str, priority: Priority):
+        await limiter.acquire(priority)
+        served.append(name)
+
+    async def scenario():
+        await limiter.acquire()
+        await asyncio.gather(
+            acquire("background", Priority.BACKGROUND),
+            acquire("batch 1", Priority.BATCH),
+            acquire("interactive", Priority.INTERACTIVE),
+            acquire("batch 2", Priority.BATCH),
+        )
+
+    asyncio.run(scenario())
+    assert served == ["interactive", "batch 1", "batch 2", "background"]
+
+
+def test_a_full_queue_evicts_the_newest_lower_priority_caller():
+    limiter = bucket(rate=50.0, max_queue=2)
+
+    async def scenario():
+        await limiter.acquire()
+        first = asyncio.ensure_future(limiter.acquire(Priority.BACKGROUND))
+        second = asyncio.ensure_future(limiter.acquire(Priority.BACKGROUND))
+        await asyncio.sleep(0)
+        await limiter.acquire(Priority.INTERACTIVE)
+        await first
+        with pytest.raises(RateLimitedError):
+            await second
+
+    asyncio.run(scenario())
+
+
+def test_a_full_queue_rejects_callers_without_lower_priority_ones_to_evict():
+    limiter = bucket(rate=50.0, max_queue=1)
+
+    async def scenario():
+        await limiter.acquire()
+        queued = asyncio.ensure_future(limiter.acquire(Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+        with pytest.raises(RateLimitedError):
+            await limiter.acquire(Priority.BACKGROUND)
+        await queued
+
+    asyncio.run(scenario())
+
+
+def test_rejects_callers_that_would_wait_past_the_budget():
+    limiter = bucket(rate=1.0, max_wait=0.5)
+
+    async def scenario():
+        await limiter.acquire()
+        with pytest.raises(RateLimitedError) as error:
+            await limiter.acquire()
+        assert error.value.retry_after == pytest.approx(1.0, abs=0.05)
+
+    asyncio.run(scenario())
@@ -0,0 +1,92 @@
+import pytest
+
+from src.clients.resilience import CircuitBreaker, CircuitState
+from src.exceptions import UpstreamUnavailableError
+from tests.factories import FakeClock
+
+
+def breaker(clock: FakeClock) -> CircuitBreaker:
+    return CircuitBreaker("test", failure_threshold=3, reset_timeout=30.0, clock=clock)
+
+
+def fail(circuit: CircuitBreaker, times: int) -> None:
+    for _ in range(times):
+        circuit.before_call()
+        circuit.record_failure()
+
+
+def test_opens_after_consecutive_failures():
+    circuit = breaker(FakeClock())
+
+    fail(circuit, 2)
+    assert circuit.state is CircuitState.CLOSED
+    fail(circuit, 1)
+
+    assert circuit.state is CircuitState.OPEN
+    with pytest.raises(UpstreamUnavailableError) as error:
+        circuit.before_call()
+    assert error.value.retry_after == pytest.approx(30.0)
+
+
+def test_a_success_resets_the_failure_count():
+    circuit = breaker(FakeClock())
+
+    fail(circuit, 2)
+    circuit.before_call()
+    circuit.record_success()
+    fail(circuit, 2)
+
+    assert circuit.state is CircuitState.CLOSED
+
+
+def test_lets_one_probe_through_after_the_reset_timeout():
+    clock = FakeClock()
+    circuit = breaker(clock)
+    fail(circuit, 3)
+
+    clock.now = 30.0
+    circuit.before_call()
+
+    assert circuit.state is CircuitState.HALF_OPEN
+    with pytest.raises(UpstreamUnavailableError):
+        circuit.before_call()
+
+
+def test_a_successful_probe_closes_the_circuit():
+    clock = FakeClock()
+    circuit = breaker(clock)
+    fail(circuit, 3)
+    clock.now = 30.0
+
+    circuit.before_call()
+    circuit.record_success()
+
+    assert circuit.state is CircuitState.CLOSED
+    circuit.before_call()
+
+
+def test_a_failed_probe_reopens_the_circuit():
+    clock = FakeClock()
+    circuit = breaker(clock)
+    fail(circuit, 3)
+    clock.now = 30.0
+
+    fail(circuit, 1)
+
+    assert circuit.state is CircuitState.OPEN
+    clock.now = 59.0
+    with pytest.raises(UpstreamUnavailableError):
+        circuit.before_call()
+
+
+def test_a_released_probe_lets_the_next_one_through():
+    clock = FakeClock()
+    circuit = breaker(clock)
+    fail(circuit, 3)
+    clock.now = 30.0
+
+    circuit.before_call()
+    circuit.release()
+
+    assert circuit.state is CircuitState.HALF_OPEN
+    circuit.before_call()
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from src.calculation import batch
+from src.calculation.simulation import perturb, simulate_power_fees
+from src.model import LoadPerturbationSpec
+from tests.factories import day_night_tariff
+
+PERTURBATION = LoadPerturbationSpec(
+    scale_std=0.2, noise_std=0.1, heat_pump_kw=1.5, ev_kw=7.0, ev_daily_probability=0.5
+)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def worker_pool():
+    yield
+    batch.shutdown()
+
+
+def hourly_loads(days: int = 10):
+    timestamps = np.datetime64("2024-01-25T00:00", "s") + np.arange(
+        24 * days
+    ) * np.timedelta64(1, "h")
+    kw = np.random.default_rng(1).gamma(2.0, 1.0, timestamps.size)
+    return timestamps, kw
+
+
+def test_a_seeded_simulation_is_reproducible():
+    spec = day_night_tariff()
+    timestamps, kw = hourly_loads()
+
+    # More scenarios than one worker chunk holds
+    first = simulate_power_fees(spec, timestamps, kw, PERTURBATION, 150, seed=42)
+    second = simulate_power_fees(spec, timestamps, kw, PERTURBATION, 150, seed=42)
+    other = simulate_power_fees(spec, timestamps, kw, PERTURBATION, 150, seed=43)
+
+    assert len(first) == 150
+    assert first.months == [(2024, 1), (2024, 2)]
+    np.testing.assert_array_equal(first.fee_exc_vat, second.fee_exc_vat)
+    np.testing.assert_array_equal(first.fee_inc_vat, second.fee_inc_vat)
+    assert not np.array_equal(first.fee_exc_vat, other.fee_exc_vat)
+
+
+def test_perturb_draws_the_same_loads_from_the_same_generator():
+    timestamps, kw = hourly_loads()
+
+    loads = [
+        perturb(timestamps, kw, PERTURBATION, 5, np.random.default_rng([7, 0]))
+        for _ in range(2)
+    ]
+
+    assert loads[0].shape == (5, kw.size)
+    np.testing.assert_array_equal(loads[0], loads[1])
+
+
+def test_without_perturbation_every_scenario_is_the_base_load():
+    timestamps, kw = hourly_loads(2)
+
+    loads = perturb(timestamps, kw, LoadPerturbationSpec(), 3, np.random.default_rng())
+
+    np.testing.assert_allclose(loads, np.tile(kw, (3, 1)))
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from src.clients.single_flight import SingleFlight
+
+
+def test_concurrent_calls_with_the_same_key_share_one_execution():
+    group = SingleFlight("test")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "area"
+
+    async def scenario():
+        return await asyncio.gather(*(group.do("k", fetch) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["area"] * 5
+    assert len(calls) == 1
+    assert group.stats()["upstream_calls"] == 1
+    assert group.stats()["in_flight"] == 0
+
+
+def test_different_keys_run_separately():
+    group = SingleFlight("test")
+
+    async def scenario():
+        return await asyncio.gather(
+            group.do("a", _value("a")), group.do("b", _value("b"))
+        )
+
+    assert asyncio.run(scenario()) == ["a", "b"]
+    assert group.executions == 2
+
+
+def test_errors_are_shared_and_not_kept():
+    group = SingleFlight("test")
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def scenario():
+        results = await asyncio.gather(
+            *(group.do("k", failing) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        # A later call starts a new execution
+        with pytest.raises(RuntimeError):
+            await group.do("k", failing)
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+
+def test_a_cancelled_caller_does_not_cancel_the_others():
+    group = SingleFlight("test")
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "area"
+
+    async def scenario():
+        first = asyncio.ensure_future(group.do("k", fetch))
+        second = asyncio.ensure_future(group.do("k", fetch))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == "area"
+
+
+def _value(value):
+    async def fetch():
+        await asyncio.sleep(0)
+        return value
+
+    return fetch
@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from src.calculation import engine
+from src.calculation.streaming import (
+    PowerFeeAccumulator,
+    ReadingChunk,
+    read_csv_chunks,
+    read_parquet_chunks,
+)
+from src.exceptions import IllegalArgumentError
+from tests.factories import day_night_tariff
+
+METERS = ("m1", "m2", "m3")
+
+
+def readings(seed: int = 5) -> tuple[ReadingChunk, dict[str, tuple]]:
+    """Quarter-hour readings of a few meters over a month boundary, long format."""
+    rng = np.random.default_rng(seed)
+    timestamps = np.datetime64("2024-01-29T00:00", "s") + np.arange(4 * 24 * 6) * (
+        np.timedelta64(15, "m")
+    )
+    series = {}
+    for meter in METERS:
+        kw = rng.gamma(2.0, 1.5, timestamps.size)
+        kw[rng.random(timestamps.size) < 0.03] = np.nan
+        series[meter] = (timestamps, kw)
+    chunk = ReadingChunk(
+        np.repeat(np.array(METERS), timestamps.size),
+        np.tile(timestamps, len(METERS)),
+        np.concatenate([series[meter][1] for meter in METERS]),
+    )
+    return chunk, series
+
+
+def accumulate(accumulator: PowerFeeAccumulator, chunk: ReadingChunk, size: int):
+    finished = []
+    for lo in range(0, len(chunk), size):
+        finished += accumulator.add(chunk[lo : lo + size])
+    return finished + accumulator.finish()
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 3, 97, 576, 10_000])
+def test_accumulator_matches_engine_whatever_the_chunk_size(chunk_rows):
+    spec = day_night_tariff()
+    chunk, series = readings()
+
+    finished = accumulate(PowerFeeAccumulator(spec), chunk, chunk_rows)
+
+    assert [meter for meter, _ in finished] == list(METERS)
+    for meter, result in finished:
+        expected = engine.calculate_power_fee(spec, *series[meter])
+        assert result.months == expected.months
+        assert result.billed_kw == pytest.approx(expected.billed_kw)
+        assert result.fee_exc_vat == pytest.approx(expected.fee_exc_vat)
+
+
+def test_accumulator_returns_meters_as_soon_as_they_end():
+    spec = day_night_tariff()
+    chunk, _ = readings()
+    accumulator = PowerFeeAccumulator(spec)
+    per_meter = len(chunk) // len(METERS)
+
+    assert accumulator.add(chunk[:per_meter]) == []
+    # The latest hour is held back until a later one starts
+    assert accumulator.add(chunk[per_meter : per_meter + 4]) == []
+    finished = accumulator.add(chunk[per_meter + 4 : per_meter + 5])
+    assert [meter for meter, _ in finished] == ["m1"]
+
+
+def test_read_csv_chunks_parses_lines_in_chunks():
+    lines = [
+        "MeterId;Timestamp;Kw",
+        "m1;2024-01-01T00:00:00Z;1.5",
+        "m1;2024-01-01T01:00:00;",
+        "",
+        "m2;2024-01-01T00:00:00Z;2",
+    ]
+
+    chunks = list(read_csv_chunks(lines, chunk_rows=2))
+
+    assert [len(c) for c in chunks] == [2, 1]
+    assert chunks[0].meter_ids.tolist() == ["m1", "m1"]
+    assert chunks[0].timestamps[1] == np.datetime64("2024-01-01T01:00:00")
+    assert np.isnan(chunks[0].kw[1])
+    assert chunks[1].kw.tolist() == [2.0]
+
+
+def test_read_csv_chunks_rejects_invalid_readings():
+    with pytest.raises(IllegalArgumentError):
+        list(read_csv_chunks(["m1;yesterday;1.0"], chunk_rows=10))
+
+
+def test_read_parquet_chunks_reads_utc_readings(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "meters.parquet"
+    table = pa.table(
+        {
+            "meter_id": ["m1", "m1", "m2"],
+            "timestamp": pa.array(
+                [0, 3600, 0], pa.timestamp("s", tz="Europe/Stockholm")
+            ),
+            "kw": [1.5, None, 2.0],
+        }
+    )
+    pq.write_table(table, path)
+
+    chunks = list(read_parquet_chunks(path, chunk_rows=2))
+
+    assert [len(c) for c in chunks] == [2, 1]
+    assert chunks[0].meter_ids.tolist() == ["m1", "m1"]
+    assert chunks[0].timestamps[1] == np.datetime64("1970-01-01T01:00:00")
+    assert np.isnan(chunks[0].kw[1])
+    assert chunks[1].kw.tolist() == [2.0]
@@ -0,0 +1,30 @@
+from src.warmup import WarmupStatus
+
+
+def status(total: int, succeeded: int, failed: int) -> WarmupStatus:
+    warmup = WarmupStatus(ready_threshold=0.8)
+    warmup.state = "running"
+    warmup.total, warmup.succeeded, warmup.failed = total, succeeded, failed
+    return warmup
+
+
+def test_ready_once_enough_entries_were_attempted():
+    assert not status(10, 5, 2).is_ready()
+    assert status(10, 6, 2).is_ready()
+
+
+def test_failed_entries_do_not_keep_the_instance_unready():
+    warmup = status(10, 1, 9)
+    warmup.state = "done"
+
+    assert warmup.is_ready()
+    assert warmup.as_dict()["success_ratio"] == 0.1
+
+
+def test_an_empty_warmup_is_ready_once_done():
+    warmup = WarmupStatus(ready_threshold=0.8)
+    assert not warmup.is_ready()
+
+    warmup.state = "done"
+
+    assert warmup.is_ready()